@@ -1,4 +1,7 @@
 from robo.ativos.executor import executar_robo
 from robo.ativos.processador import processar_clientes
+from robo.ativos.pipeline import processar_clientes_pipeline
+from robo.ativos.motor_api import executar_robo_api
+from robo.ativos.shards import executar_em_shards
 
-__all__ = ["executar_robo", "processar_clientes"]
+__all__ = ["executar_robo", "executar_robo_api", "executar_em_shards", "processar_clientes", "processar_clientes_pipeline"]
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List
+
+from playwright.sync_api import Page  # type: ignore[import-untyped]
+
+import config
+from robo.passivos import csv_io
+from robo.passivos import perfil_timeouts
+from robo.comms import fluxo_consulta
+from robo.comms import formulario
+from robo.comms import historico
+from robo.comms import indice_historico
+from robo.comms import navegacao
+from robo.comms import rede
+from robo.comms import termo
+from robo.passivos.saida import SaidaResultados
+from robo.passivos.modelos import Cliente
+
+
+_JS_ALGUM_CPF_NA_PAGINA = """(cpfs) => { const t = document.body ? document.body.innerText : ''; return cpfs.some(c => t.includes(c)); }"""
+
+
+@dataclass
+class ConsultaPendente:
+    cliente: Cliente
+    cpf_site: str
+    banco: str
+
+
+def _exige_fluxo_completo(page: Page, banco: str, estado: dict) -> bool:
+    """Reações ao "Consultar saldo" que o pipeline não trata sozinho (modal/termo e mensagens de erro do formulário)."""
+    chave_modal = "modal_autorizacao_celcoin" if "celcoin" in banco.lower() else "modal_autorizacao"
+    if any(estado[chave] for chave in ("restricao_emissao", "cpf_invalido", "cpf_nao_encontrado", "registro_nao_encontrado", chave_modal, "sem_vinculo")):
+        return True
+    if "celcoin" in banco.lower() and termo.extrair_link_termo_pagina(page):
+        return True
+    return False
+
+
+def submeter_consulta(page: Page, cliente: Cliente, cpf_site: str, banco: str, lista_saida: SaidaResultados, timeout_ms: int) -> str:
+    """Estágio 1: seleciona o banco, preenche o CPF e clica "Consultar saldo" sem esperar o histórico. Antes de
+    enviar, faz a mesma checagem do fluxo sequencial (`historico.processar_resultado_existente_no_historico`): par
+    que já tem resultado no histórico é colhido dali, sem gastar outra consulta de margem.
+    Devolve "enviada", "existente" (colhido do histórico), "fluxo_completo" (a página pediu termo ou mostrou erro;
+    segue por `continuar_apos_consulta`, sem reenviar), "falha_selecao" ou "falha_cpf" (o CPF não ficou no campo)."""
+    form = formulario.obter_formulario(page)
+    if not form.selecionar_banco(banco):
+        return "falha_selecao"
+    if not form.preencher_cpf(cpf_site):
+        return "falha_cpf"
+    if historico.processar_resultado_existente_no_historico(page, cpf_site, banco, cliente, lista_saida, timeout_ms):
+        return "existente"
+    coletor = rede.obter_coletor(page)
+    if coletor:
+        coletor.esquecer_consulta(cliente.cpf, banco)
+    form.consultar()
+
+    def aguardar_reacao(espera_ms: int) -> str | None:
+        for _ in range(max(1, espera_ms // 200)):
+            page.wait_for_timeout(200)
+            estado = fluxo_consulta.sondar_estado_pagina(page, cpf_site, cliente.cpf)
+            if _exige_fluxo_completo(page, banco, estado):
+                return "fluxo_completo"
+            if estado["linha_cpf"]:
+                return "enviada"
+        return None
+
+    if "celcoin" in banco.lower():
+        reacao = perfil_timeouts.esperar("PAUSA_ESPERA_MODAL_CELCOIN_MS", aguardar_reacao, getattr(config, "PAUSA_ESPERA_MODAL_CELCOIN_MS", 800), acertou=lambda r: r is not None)
+    else:
+        reacao = perfil_timeouts.esperar("PAUSA_ESPERA_REACAO_QITECH_MS", aguardar_reacao, 600, acertou=lambda r: r is not None)
+    return reacao or "enviada"
+
+
+def _colher_resultado(page: Page, pendente: ConsultaPendente, lista_saida: SaidaResultados, timeout_ms: int) -> None:
+    if not historico.processar_resultado_existente_no_historico(page, pendente.cpf_site, pendente.banco, pendente.cliente, lista_saida, timeout_ms):
+        csv_io.log_critico(lista_saida, pendente.cliente, pendente.banco, "falha_historico", "Linha do histórico não encontrada na colheita")
+    navegacao.voltar_para_consulta_limpa(page)
+
+
+def colher_pendentes(
+    page: Page, pendentes: List[ConsultaPendente], lista_saida: SaidaResultados, timeout_ms: int, concluidos: set[tuple[str, str]] | None = None
+) -> None:
+    """Estágio 2: lê o histórico uma vez (`IndiceHistorico`) e colhe cada par que chegou a Sucesso ou Erro.
+    Um único "Recarregar" por varredura atende todos os CPFs ainda em Processando. Os pares colhidos sem exceção
+    entram em `concluidos` (os que podem ir para o cache)."""
+    max_varreduras = getattr(config, "MAX_RECARREGAR_PROCESSANDO", 15)
+    espera_ms = config.PAUSA_APOS_RECARREGAR_MS
+    indice = indice_historico.obter_indice(page) or indice_historico.IndiceHistorico(page)
+    coletor = rede.obter_coletor(page)
+    for varredura in range(max_varreduras + 1):
+        try:
+            page.wait_for_function(_JS_ALGUM_CPF_NA_PAGINA, arg=[p.cpf_site for p in pendentes], timeout=min(3000, timeout_ms // 5))
+        except Exception:
+            pass
+        indice.ler()
+        for pendente in list(pendentes):
+            entrada = indice.obter(pendente.cliente.cpf, pendente.banco)
+            st = (coletor.status(pendente.cliente.cpf, pendente.banco) if coletor else None) or (entrada.status if entrada else None)
+            if not st or st == "processando":
+                continue
+            pendentes.remove(pendente)
+            if st == "erro":
+                csv_io.log_critico(lista_saida, pendente.cliente, pendente.banco, "erro_na_consulta", config.UI_TEXTO_ERRO_NA_CONSULTA)
+                continue
+            try:
+                _colher_resultado(page, pendente, lista_saida, timeout_ms)
+                if concluidos is not None:
+                    concluidos.add((pendente.cliente.cpf, pendente.banco))
+            except Exception as e:
+                csv_io.log_critico(lista_saida, pendente.cliente, pendente.banco, "falha_historico", str(e).replace("\n", " ").replace("\r", "")[:500])
+                navegacao.voltar_para_consulta_limpa(page)
+        if not pendentes or varredura >= max_varreduras:
+            break
+        try:
+            page.get_by_role("button", name=config.UI_BOTAO_RECARREGAR).first.click(timeout=5000)
+            page.wait_for_load_state("domcontentloaded", timeout=10000)
+        except Exception:
+            pass
+        page.wait_for_timeout(espera_ms)
+        espera_ms = min(espera_ms * 2, getattr(config, "PAUSA_MAX_ESPERA_HISTORICO_MS", 4000))
+    for pendente in pendentes:
+        csv_io.log_critico(lista_saida, pendente.cliente, pendente.banco, "processando_timeout", "Status permaneceu Processando após recarregar")
+    pendentes.clear()
@@ -1,50 +1,357 @@
 from __future__ import annotations
 
+import itertools
 import os
-from typing import cast
+import queue
+import threading
+import time
+from typing import Iterable, Iterator, cast
 
-from playwright.sync_api import sync_playwright, ViewportSize  # type: ignore[import-untyped]
+from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page, Playwright, ViewportSize  # type: ignore[import-untyped]
 
 import config
+from robo.passivos import cpf_utils
 from robo.passivos import csv_io
+from robo.passivos.cache_resultados import CacheResultados, abrir_cache
+from robo.passivos.diario import DiarioResultados, caminho_diario_para, caminho_saida_do_diario, posicao_banco
+from robo.passivos.saida import SaidaResultados
+from robo.passivos.modelos import Cliente
+from robo.comms import esperas
 from robo.comms import navegacao
+from robo.comms import perfil_rede
+from robo.comms import rede
 from robo.ativos.processador import processar_clientes
+from robo.ativos.pipeline import processar_clientes_pipeline
+from robo.ativos.varredura import colher_processando, executar_varredura_inicial
 
 
-def executar_robo(caminho_entrada: str | None = None, dir_saida: str | None = None, headless: bool = False) -> None:
+def _abrir_navegador(p: Playwright, headless: bool, caminho_sessao: str | None = None) -> tuple[Browser, BrowserContext, Page]:
+    browser = p.chromium.launch(headless=headless, slow_mo=config.SLOW_MO_HEADED_MS if not headless else 0)
+    viewport = cast(ViewportSize, {"width": config.VIEWPORT_LARGURA, "height": config.VIEWPORT_ALTURA})
+    if caminho_sessao and os.path.exists(caminho_sessao):
+        context = browser.new_context(viewport=viewport, storage_state=caminho_sessao, **esperas.opcoes_contexto())
+    else:
+        context = browser.new_context(viewport=viewport, **esperas.opcoes_contexto())
+    esperas.instalar_sem_animacoes(context)
+    context.grant_permissions(["geolocation"])
+    context.set_geolocation({"latitude": -23.5505, "longitude": -46.6333})
+    rede.instalar_coletor(context)
+    perfil_rede.instalar_perfil_rede(context)
+    page = context.new_page()
+    page.set_default_timeout(15000)
+    page.set_default_navigation_timeout(30000)
+    return browser, context, page
+
+
+def _fechar_navegador(browser: Browser, context: BrowserContext, rotulo: str = "") -> None:
+    perfil = perfil_rede.obter_perfil_rede(context)
+    if perfil is not None:
+        print(f"{rotulo}{perfil.resumo()}")
+    try:
+        for pg in context.pages:
+            if not pg.is_closed():
+                pg.close()
+    except Exception:
+        pass
+    browser.close()
+
+
+def _consumir_fila(fila: "queue.Queue[Cliente | None]", page: Page) -> Iterator[Cliente]:
+    """Entrega clientes da fila compartilhada enquanto a página do worker estiver viva; None marca o fim da entrada."""
+    while not page.is_closed():
+        try:
+            cliente = fila.get(timeout=1)
+        except queue.Empty:
+            continue
+        if cliente is None:
+            return
+        yield cliente
+
+
+def _por_na_fila(fila: "queue.Queue[Cliente | None]", item: Cliente | None, parar: threading.Event) -> bool:
+    while not parar.is_set():
+        try:
+            fila.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _alimentar_fila(clientes: Iterator[Cliente], fila: "queue.Queue[Cliente | None]", workers: int, parar: threading.Event, esgotada: threading.Event) -> None:
+    """Thread que puxa clientes da leitura em fluxo para a fila limitada; no fim, um None por worker."""
+    try:
+        for cliente in clientes:
+            if not _por_na_fila(fila, cliente, parar):
+                return
+        esgotada.set()
+    except Exception as e:
+        print(f"Falha ao ler a entrada: {type(e).__name__}: {str(e)[:300]}")
+    finally:
+        for _ in range(workers):
+            if not _por_na_fila(fila, None, parar):
+                break
+
+
+def _executar_worker(
+    indice: int,
+    fila: "queue.Queue[Cliente | None]",
+    headless: bool,
+    lista_saida: SaidaResultados,
+    caminho_sessao: str | None,
+    sessao_pronta: threading.Event,
+    pipeline: bool = False,
+    bancos_paralelos: bool = False,
+    pares_resolvidos: set[tuple[str, str]] | None = None,
+) -> None:
+    """O worker 0 valida/renova a sessão e sinaliza `sessao_pronta`; os demais só abrem o contexto
+    depois disso, já carregando o storage_state salvo (sem login próprio, salvo se a sessão expirar)."""
+    try:
+        if indice > 0:
+            sessao_pronta.wait()
+            pausa_ms = getattr(config, "PAUSA_ENTRE_WORKERS_MS", 2000)
+            if pausa_ms > 0:
+                time.sleep(indice * pausa_ms / 1000)
+        with sync_playwright() as p:
+            browser, context, page = _abrir_navegador(p, headless, caminho_sessao)
+            try:
+                try:
+                    navegacao.garantir_sessao(page, caminho_sessao)
+                finally:
+                    sessao_pronta.set()
+                if pipeline:
+                    processar_clientes_pipeline(page, _consumir_fila(fila, page), None, lista_saida, pares_resolvidos)
+                else:
+                    processar_clientes(page, _consumir_fila(fila, page), None, lista_saida, bancos_paralelos, pares_resolvidos)
+            finally:
+                _fechar_navegador(browser, context, f"[worker {indice}] ")
+    except Exception as e:
+        sessao_pronta.set()
+        print(f"[worker {indice}] encerrado com erro: {type(e).__name__}: {str(e)[:300]}")
+
+
+def _executar_com_workers(
+    clientes: Iterator[Cliente],
+    headless: bool,
+    workers: int,
+    caminho_sessao: str | None,
+    saidas: list[SaidaResultados],
+    pipeline: bool = False,
+    bancos_paralelos: bool = False,
+    pares_resolvidos: set[tuple[str, str]] | None = None,
+    diario: DiarioResultados | None = None,
+    cache: CacheResultados | None = None,
+) -> None:
+    """Abre um navegador isolado por worker (a API sync do Playwright não é thread-safe) e
+    distribui os clientes por uma fila limitada, alimentada por uma thread que lê a entrada em fluxo
+    (os workers começam antes de o arquivo acabar). Cada worker tem sua `SaidaResultados` (acrescentada
+    a `saidas`), todas gravando no mesmo diário e no mesmo cache."""
+    fila: "queue.Queue[Cliente | None]" = queue.Queue(maxsize=workers * getattr(config, "LOTE_LEITURA_CLIENTES", 500))
+    parar = threading.Event()
+    esgotada = threading.Event()
+    alimentador = threading.Thread(target=_alimentar_fila, args=(clientes, fila, workers, parar, esgotada), name="robo-entrada", daemon=True)
+    alimentador.start()
+    print(f"Iniciando {workers} workers.")
+    saidas_workers = [SaidaResultados(diario, cache=cache) for _ in range(workers)]
+    saidas.extend(saidas_workers)
+    sessao_pronta = threading.Event()
+    threads = [
+        threading.Thread(
+            target=_executar_worker,
+            args=(i, fila, headless, saidas_workers[i], caminho_sessao, sessao_pronta, pipeline, bancos_paralelos, pares_resolvidos),
+            name=f"robo-worker-{i}",
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            while t.is_alive():
+                t.join(timeout=1)
+    finally:
+        parar.set()
+        alimentador.join(timeout=5)
+        sobras = 0
+        while True:
+            try:
+                sobras += fila.get_nowait() is not None
+            except queue.Empty:
+                break
+        if sobras or not esgotada.is_set():
+            print(f"Atenção: {sobras} clientes na fila{'' if esgotada.is_set() else ' e o resto da entrada'} não foram processados (workers encerrados).")
+
+
+def _executar_com_varredura(
+    page: Page,
+    clientes: Iterable[Cliente],
+    lista_saida: SaidaResultados,
+    pipeline: bool,
+    bancos_paralelos: bool,
+    pares_resolvidos: set[tuple[str, str]],
+) -> None:
+    """`--varredura-historico`: colhe o que já tem Sucesso no histórico, consulta só os pares restantes e,
+    no fim, colhe os que estavam em Processando. Clientes com par em Processando só são concluídos no diário
+    depois dessa colheita."""
+    varredura = executar_varredura_inicial(page, clientes, lista_saida, pares_resolvidos)
+    lista_saida.fechar_por_par()
+    lista_saida.adiar_conclusao(varredura.cpfs_processando())
+    pares = varredura.pares_resolvidos | pares_resolvidos
+    if pipeline:
+        processar_clientes_pipeline(page, varredura.a_consultar, None, lista_saida, pares)
+    else:
+        processar_clientes(page, varredura.a_consultar, None, lista_saida, bancos_paralelos, pares)
+    colher_processando(page, varredura, lista_saida)
+    lista_saida.fechar_por_par()
+    lista_saida.concluir_adiados()
+
+
+def _salvar_resultado(caminho_saida: str, ordem: dict[str, int], saidas: list[SaidaResultados], diario: DiarioResultados | None) -> None:
+    """CSV final na ordem da entrada (`ordem`: posição de cada CPF lido) e, dentro do CPF, na dos bancos. Com diário, as linhas são lidas dele em
+    fluxo (inclui as de execuções anteriores retomadas); sem diário, vêm das linhas retidas em memória."""
+    for saida in saidas:
+        saida.fechar()
+    if diario is not None:
+        csv_io.salvar_dataframe_final(caminho_saida, diario.iterar_linhas(ordem))
+        return
+    linhas = [r for saida in saidas for r in saida]
+    linhas.sort(key=lambda r: (ordem.get(r.get("cpf", ""), len(ordem)), posicao_banco(r.get("banco", ""))))
+    csv_io.salvar_dataframe_final(caminho_saida, linhas)
+
+
+def _reaproveitar_cache(
+    clientes: Iterable[Cliente],
+    cache: CacheResultados,
+    lista_saida: SaidaResultados,
+    pares_resolvidos: set[tuple[str, str]],
+) -> Iterator[Cliente]:
+    """`--delta`: repõe em `lista_saida` (uma saída só para isso) os pares com resultado fresco no cache, com
+    nome/contato da entrada atual, e os marca em `pares_resolvidos`. Entrega, em fluxo, só os clientes com algum
+    banco ausente ou vencido no cache."""
+    restantes = 0
+    reaproveitados = 0
+    for cliente in clientes:
+        if not cpf_utils.cpf_valido_11(cliente.cpf):
+            csv_io.log_critico(lista_saida, cliente, "", "cpf_invalido", "CPF com tamanho diferente de 11 dígitos (provável perda no CSV)")
+            lista_saida.fechar_cliente(cliente.cpf)
+            continue
+        completo = True
+        for banco in ("QiTech", "Celcoin"):
+            if (cliente.cpf, banco) in pares_resolvidos:
+                continue
+            linhas = cache.obter(cliente.cpf, banco)
+            if linhas is None:
+                completo = False
+                continue
+            for linha in linhas:
+                linha.update(nome=cliente.nome, contato=cliente.contato, email=cliente.email)
+            lista_saida.extend(linhas)
+            lista_saida.fechar_par(cliente.cpf, banco, gravar_cache=False)
+            pares_resolvidos.add((cliente.cpf, banco))
+            reaproveitados += 1
+            if completo and CacheResultados.encerra_cliente(linhas):
+                break
+        if completo:
+            lista_saida.fechar_cliente(cliente.cpf)
+        else:
+            restantes += 1
+            yield cliente
+    print(f"Cache de resultados: {reaproveitados} pares reaproveitados, {restantes} clientes consultados.")
+
+
+def executar_robo(
+    caminho_entrada: str | None = None,
+    dir_saida: str | None = None,
+    headless: bool = False,
+    workers: int = 1,
+    nova_sessao: bool = False,
+    caminho_saida: str | None = None,
+    pipeline: bool = False,
+    bancos_paralelos: bool = False,
+    varredura_historico: bool = False,
+    retomar: str | None = None,
+    delta: bool = False,
+) -> None:
+    """Com DIARIO_ATIVO (padrão), cada par/cliente concluído vai para `<csv>.diario.jsonl` durante a execução e o CSV
+    final é montado a partir dele. `retomar` aponta para o diário de uma execução interrompida: clientes e pares já
+    registrados são pulados e o CSV final (o mesmo da execução original, salvo `caminho_saida`) inclui as linhas antigas.
+    Com CACHE_RESULTADOS_ATIVO (padrão), cada par concluído vai também para o cache SQLite; com `delta`, os pares
+    frescos no cache (CACHE_TTL_H) entram na saída sem consulta e só o resto passa pelo navegador."""
     if caminho_entrada is None:
         caminho_entrada = os.path.join(config.DIR_ENTRADA_PADRAO, config.ARQUIVO_ENTRADA_PADRAO)
     if dir_saida is None:
         dir_saida = config.DIR_SAIDA_PADRAO
     if not os.path.exists(caminho_entrada):
         raise FileNotFoundError(f"Arquivo de entrada não encontrado: {caminho_entrada}")
-    clientes = csv_io.ler_clientes(caminho_entrada)
-    if not clientes:
+    if retomar and not os.path.exists(retomar):
+        raise FileNotFoundError(f"Diário para retomar não encontrado: {retomar}")
+    leitura = csv_io.LeituraClientes(caminho_entrada)
+    fluxo = iter(leitura)
+    primeiro = next(fluxo, None)
+    if primeiro is None:
         print("Nenhum cliente válido encontrado no CSV.")
         return
-    caminho_saida = csv_io.criar_caminho_csv_saida(dir_saida)
+    clientes: Iterator[Cliente] = itertools.chain([primeiro], fluxo)
+    if caminho_saida is None:
+        caminho_saida = caminho_saida_do_diario(retomar) if retomar else csv_io.criar_caminho_csv_saida(dir_saida)
     print(f"CSV de saída: {caminho_saida}")
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless, slow_mo=config.SLOW_MO_HEADED_MS if not headless else 0)
-        viewport = cast(ViewportSize, {"width": config.VIEWPORT_LARGURA, "height": config.VIEWPORT_ALTURA})
-        context = browser.new_context(viewport=viewport)
-        context.grant_permissions(["geolocation"])
-        context.set_geolocation({"latitude": -23.5505, "longitude": -46.6333})
-        page = context.new_page()
-        page.set_default_timeout(15000)
-        page.set_default_navigation_timeout(30000)
-        try:
-            navegacao.login_e_ir_para_consulta(page)
-            processar_clientes(page, clientes, caminho_saida)
-        except Exception as e:
-            if "TargetClosedError" in type(e).__name__:
-                print("O navegador foi fechado durante a execução. Não feche a janela manualmente; confira o .env (ADMIN_EMAIL e ADMIN_SENHA) e tente de novo.")
-            raise
-        finally:
+    diario: DiarioResultados | None = None
+    if retomar:
+        diario = DiarioResultados(retomar)
+    elif getattr(config, "DIARIO_ATIVO", True):
+        caminho_diario = caminho_diario_para(caminho_saida)
+        if os.path.exists(caminho_diario):
+            os.remove(caminho_diario)
+        diario = DiarioResultados(caminho_diario)
+    pares_resolvidos: set[tuple[str, str]] = set()
+    if diario is not None:
+        print(f"Diário de resultados: {diario.caminho}")
+        if retomar:
+            concluidos = diario.clientes_concluidos
+            pares_resolvidos = set(diario.pares_concluidos)
+            clientes = (c for c in clientes if c.cpf not in concluidos)
+            print(f"Retomando: {len(concluidos)} clientes já concluídos, {len(pares_resolvidos)} pares registrados.")
+    cache = abrir_cache()
+    if delta and cache is None:
+        print("--delta sem cache de resultados (CACHE_RESULTADOS_ATIVO=False); consultando todos os clientes.")
+    lista_saida = SaidaResultados(diario, cache=cache)
+    saidas: list[SaidaResultados] = [lista_saida]
+    try:
+        if delta and cache is not None:
+            saida_cache = SaidaResultados(diario)
+            saidas.append(saida_cache)
+            clientes = _reaproveitar_cache(clientes, cache, saida_cache, pares_resolvidos)
+        primeiro = next(clientes, None)
+        if primeiro is None:
+            print("Nada a consultar; o navegador não foi aberto.")
+            return
+        restantes = itertools.chain([primeiro], clientes)
+        caminho_sessao = config.ARQUIVO_SESSAO if getattr(config, "USAR_SESSAO_SALVA", False) else None
+        if caminho_sessao and nova_sessao and os.path.exists(caminho_sessao):
+            os.remove(caminho_sessao)
+        if workers > 1:
+            if varredura_historico:
+                print("Varredura inicial do histórico só roda com um navegador (--workers 1); seguindo sem ela.")
+            _executar_com_workers(restantes, headless, workers, caminho_sessao, saidas, pipeline, bancos_paralelos, pares_resolvidos, diario, cache)
+            return
+        with sync_playwright() as p:
+            browser, context, page = _abrir_navegador(p, headless, caminho_sessao)
             try:
-                for pg in context.pages:
-                    if not pg.is_closed():
-                        pg.close()
-            except Exception:
-                pass
-            browser.close()
+                navegacao.garantir_sessao(page, caminho_sessao)
+                if varredura_historico:
+                    _executar_com_varredura(page, restantes, lista_saida, pipeline, bancos_paralelos, pares_resolvidos)
+                elif pipeline:
+                    processar_clientes_pipeline(page, restantes, None, lista_saida, pares_resolvidos)
+                else:
+                    processar_clientes(page, restantes, None, lista_saida, bancos_paralelos, pares_resolvidos)
+            except Exception as e:
+                if "TargetClosedError" in type(e).__name__:
+                    print("O navegador foi fechado durante a execução. Não feche a janela manualmente; confira o .env (ADMIN_EMAIL e ADMIN_SENHA) e tente de novo.")
+                raise
+            finally:
+                _fechar_navegador(browser, context)
+    finally:
+        _salvar_resultado(caminho_saida, leitura.ordem, saidas, diario)
+        if cache is not None:
+            cache.fechar()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from robo.comms import historico
+from robo.comms.api import ClienteApi
+from robo.passivos import cpf_utils
+from robo.passivos import csv_io
+from robo.passivos.modelos import Cliente, ErroApi
+
+# status devolvidos por `consultar` que encerram o par sem histórico: (status no CSV, texto em config, encerra o cliente)
+_RECUSAS_CONSULTA = {
+    "cpf_invalido": ("cpf_invalido", "UI_TEXTO_CPF_INVALIDO", True),
+    "cpf_nao_encontrado": ("cpf_nao_encontrado", "UI_TEXTO_CPF_NAO_ENCONTRADO", True),
+    "registro_nao_encontrado": ("registro_nao_encontrado", "UI_TEXTO_REGISTRO_NAO_ENCONTRADO_MSG", False),
+    "restricao_emissao": ("restricao_emissao", "UI_TEXTO_RESTRICAO_EMISSAO", False),
+    "sem_vinculo": ("sem_vinculo", "UI_TEXTO_SEM_VINCULO", False),
+    "autorizacao_pendente": ("aguardar_formulario_autorizacao", "", False),
+}
+
+
+def _aguardar_status(api: ClienteApi, id_consulta: str) -> dict:
+    """Consulta o status até sair de "processando" (mesmo limite de tentativas do Recarregar da UI)."""
+    intervalo_s = getattr(config, "API_INTERVALO_STATUS_MS", 1000) / 1000
+    resp: dict = {"status": "processando"}
+    tentativas = getattr(config, "MAX_RECARREGAR_PROCESSANDO", 15) + 1
+    for tentativa in range(tentativas):
+        resp = api.status_consulta(id_consulta)
+        if str(resp.get("status", "")).lower() != "processando" or tentativa == tentativas - 1:
+            return resp
+        time.sleep(intervalo_s * min(2 ** tentativa, 4))
+    return resp
+
+
+def _simular_prazos(api: ClienteApi, id_consulta: str, valor_maximo_parcela: str, cliente: Cliente, banco: str, lista_saida: list) -> None:
+    """Mesmas linhas de `historico.simular_tabelas`: uma "parcela" por prazo (6/12/18/24) e a linha "limite_meses".
+    Valor maior que o disponível refaz o prazo com Tipo "Valor Total", como a UI; a linha mantém esse status com os valores refeitos."""
+    for meses in (6, 12, 18, 24):
+        try:
+            sim = api.simular(id_consulta, meses, valor_maximo_parcela)
+            status = "sucesso"
+            if str(sim.get("status", "")).lower() == "valor_maior_que_disponivel":
+                status = "valor_maior_que_disponivel"
+                sim = {**api.simular(id_consulta, meses, valor_maximo_parcela, tipo="valor_total"), "qtd_parcelas": meses}
+            if sim.get("status"):
+                resultado = (str(sim["status"]), "", "", "", str(meses), str(sim.get("mensagem", ""))[:500])
+            else:
+                qtd = str(sim.get("qtd_parcelas") or meses)
+                resultado = (
+                    status,
+                    f"{float(sim['valor_liberado']):.2f}",
+                    f"{qtd}x {float(sim['valor_parcela']):.2f}",
+                    f"{float(sim['valor_total']):.2f}",
+                    qtd,
+                    "",
+                )
+            linha = historico.montar_linha_parcela(cliente, banco, valor_maximo_parcela, meses, resultado)
+        except (ErroApi, KeyError, TypeError, ValueError) as e:
+            linha = historico.montar_linha_parcela(cliente, banco, valor_maximo_parcela, meses, None, str(e).replace("\n", " ")[:500])
+        if linha is not None:
+            lista_saida.append(linha)
+    lista_saida.append(historico.montar_linha_limite_meses(cliente, banco))
+
+
+def _processar_banco(api: ClienteApi, cliente: Cliente, banco: str, lista_saida: list) -> bool:
+    """Processa um par cliente/banco pela API. Devolve True quando o cliente deve ser encerrado."""
+    resp = api.consultar(cliente.cpf, banco)
+    st = str(resp.get("status", "")).lower()
+    if st in _RECUSAS_CONSULTA:
+        status_csv, chave_texto, encerra = _RECUSAS_CONSULTA[st]
+        mensagem = getattr(config, chave_texto, "") if chave_texto else "Aguardar formulário de autorização"
+        csv_io.log_critico(lista_saida, cliente, banco, status_csv, str(resp.get("mensagem") or mensagem))
+        return encerra
+    id_consulta = resp.get("id")
+    if not id_consulta:
+        csv_io.log_critico(lista_saida, cliente, banco, "falha_historico", str(resp.get("mensagem") or "Consulta sem identificador na resposta da API"))
+        return False
+    resp = _aguardar_status(api, str(id_consulta))
+    st = str(resp.get("status", "")).lower()
+    if st == "processando":
+        csv_io.log_critico(lista_saida, cliente, banco, "processando_timeout", "Status permaneceu Processando após recarregar")
+        return False
+    if st == "erro":
+        csv_io.log_critico(lista_saida, cliente, banco, "erro_na_consulta", config.UI_TEXTO_ERRO_NA_CONSULTA)
+        return False
+    if st != "sucesso":
+        csv_io.log_critico(lista_saida, cliente, banco, st or "falha_historico", str(resp.get("mensagem") or ""))
+        return False
+    valor_maximo_parcela = str(resp.get("valor_maximo_parcela") or "")
+    if not valor_maximo_parcela:
+        csv_io.log_critico(lista_saida, cliente, banco, "falha_historico", "Valor máximo da parcela não encontrado")
+        return False
+    _simular_prazos(api, str(id_consulta), valor_maximo_parcela, cliente, banco, lista_saida)
+    return False
+
+
+def _processar_cliente(api: ClienteApi, cliente: Cliente) -> tuple[list, ErroApi | None]:
+    """Linhas do cliente e, se a API recusou a sessão (401/403), o erro; as linhas já montadas voltam junto."""
+    lista_saida: list = []
+    if not cpf_utils.cpf_valido_11(cliente.cpf):
+        csv_io.log_critico(lista_saida, cliente, "", "cpf_invalido", "CPF com tamanho diferente de 11 dígitos (provável perda no CSV)")
+        return lista_saida, None
+    for banco in ("QiTech", "Celcoin"):
+        try:
+            if _processar_banco(api, cliente, banco, lista_saida):
+                break
+        except ErroApi as e:
+            csv_io.log_critico(lista_saida, cliente, banco, "falha_historico", str(e))
+            if e.status_http in (401, 403):
+                return lista_saida, e
+    return lista_saida, None
+
+
+def executar_robo_api(
+    caminho_entrada: str | None = None,
+    dir_saida: str | None = None,
+    concorrencia: int | None = None,
+    caminho_saida: str | None = None,
+    url_base: str | None = None,
+) -> None:
+    """Motor experimental `--motor api`: chama as rotas de consulta/status/simulação direto por HTTP, com os
+    cookies da sessão salva, sem abrir navegador. Produz as mesmas linhas (`parcela`, `limite_meses`, `erro`)."""
+    if caminho_entrada is None:
+        caminho_entrada = os.path.join(config.DIR_ENTRADA_PADRAO, config.ARQUIVO_ENTRADA_PADRAO)
+    if dir_saida is None:
+        dir_saida = config.DIR_SAIDA_PADRAO
+    if not os.path.exists(caminho_entrada):
+        raise FileNotFoundError(f"Arquivo de entrada não encontrado: {caminho_entrada}")
+    clientes = csv_io.ler_clientes(caminho_entrada)
+    if not clientes:
+        print("Nenhum cliente válido encontrado no CSV.")
+        return
+    if caminho_saida is None:
+        caminho_saida = csv_io.criar_caminho_csv_saida(dir_saida)
+    print(f"CSV de saída: {caminho_saida}")
+    unicos: list[Cliente] = []
+    vistos: set[str] = set()
+    for cliente in clientes:
+        if cliente.cpf in vistos:
+            print(f"CPF {cliente.cpf} já processado, pulando.")
+            continue
+        vistos.add(cliente.cpf)
+        unicos.append(cliente)
+    caminho_sessao = config.ARQUIVO_SESSAO if getattr(config, "USAR_SESSAO_SALVA", False) else None
+    api = ClienteApi(url_base, caminho_sessao)
+    lista_saida: list = []
+    sessao_recusada: ErroApi | None = None
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concorrencia or getattr(config, "API_CONCORRENCIA", 8))) as pool:
+            futuros = [(cliente, pool.submit(_processar_cliente, api, cliente)) for cliente in unicos]
+            # resultado (ou erro) de cada cliente separado: uma sessão recusada não descarta os que já terminaram
+            for cliente, futuro in futuros:
+                if sessao_recusada is not None and futuro.cancel():
+                    csv_io.log_critico(lista_saida, cliente, "", "falha_historico", f"Não consultado: {sessao_recusada}")
+                    continue
+                try:
+                    linhas, erro_sessao = futuro.result()
+                except Exception as e:
+                    csv_io.log_critico(lista_saida, cliente, "", "falha_historico", str(e).replace("\n", " ")[:500])
+                    continue
+                lista_saida.extend(linhas)
+                if erro_sessao is not None and sessao_recusada is None:
+                    sessao_recusada = erro_sessao
+    finally:
+        csv_io.salvar_dataframe_final(caminho_saida, lista_saida)
+    if sessao_recusada is not None:
+        raise sessao_recusada
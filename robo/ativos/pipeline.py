@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import Iterable, List
+
+from playwright.sync_api import Page  # type: ignore[import-untyped]
+
+import config
+from robo.passivos import cpf_utils
+from robo.passivos import csv_io
+from robo.comms import navegacao
+from robo.passivos.saida import SaidaResultados
+from robo.passivos.modelos import Cliente
+from robo.ativos.consultas import ConsultaPendente, colher_pendentes, submeter_consulta
+from robo.ativos.processador import continuar_apos_consulta
+
+
+def processar_clientes_pipeline(
+    page: Page,
+    clientes: Iterable[Cliente],
+    caminho_saida: str | None,
+    lista_saida: SaidaResultados | None = None,
+    pares_resolvidos: set[tuple[str, str]] | None = None,
+) -> SaidaResultados:
+    """Modo pipeline (`--pipeline`): para cada janela de TAMANHO_JANELA_PIPELINE clientes, envia todas as
+    consultas (QiTech e Celcoin) em sequência e depois colhe o histórico, de modo que o processamento
+    do portal de um CPF se sobreponha ao dos outros. Pares que já têm resultado no histórico são colhidos antes
+    do envio; os que exigem termo ou mostram erro no formulário seguem por `continuar_apos_consulta`, a partir
+    da página como ficou (a consulta não é refeita).
+    Pares (cpf, banco) em pares_resolvidos (colhidos pela varredura inicial) não são enviados.
+    Depois de cada colheita, os clientes da janela são fechados em lista_saida (com diário, saem da memória)."""
+    timeout_ms = config.TIMEOUT_PROCESSAR_MS
+    janela = max(1, getattr(config, "TAMANHO_JANELA_PIPELINE", 10))
+    if lista_saida is None:
+        lista_saida = SaidaResultados()
+    cpfs_ja_processados: set[str] = set()
+    pares_concluidos: set[tuple[str, str]] = set()
+    pendentes: List[ConsultaPendente] = []
+    na_janela = 0
+    cpfs_janela: List[str] = []
+    for cliente in clientes:
+        cpfs_janela.append(cliente.cpf)
+        if not cpf_utils.cpf_valido_11(cliente.cpf):
+            csv_io.log_critico(lista_saida, cliente, "", "cpf_invalido", "CPF com tamanho diferente de 11 dígitos (provável perda no CSV)")
+            continue
+        if cliente.cpf in cpfs_ja_processados:
+            print(f"CPF {cliente.cpf} já processado, pulando.")
+            continue
+        cpfs_ja_processados.add(cliente.cpf)
+        cpf_site = cpf_utils.cpf_com_mascara(cliente.cpf)
+        print(f"Enviando consultas CPF {cliente.cpf} - {cliente.nome}")
+        try:
+            for banco in ["QiTech", "Celcoin"]:
+                if pares_resolvidos and (cliente.cpf, banco) in pares_resolvidos:
+                    continue
+                envio = submeter_consulta(page, cliente, cpf_site, banco, lista_saida, timeout_ms)
+                if envio == "falha_selecao":
+                    csv_io.log_critico(lista_saida, cliente, banco, "erro_selecao_banco", "Não foi possível selecionar o banco no formulário")
+                    break
+                if envio == "falha_cpf":
+                    csv_io.log_critico(lista_saida, cliente, banco, "erro_preenchimento_cpf", "Não foi possível preencher o CPF no formulário")
+                    break
+                if envio == "existente":
+                    pares_concluidos.add((cliente.cpf, banco))
+                    navegacao.voltar_para_consulta_limpa(page)
+                    continue
+                if envio == "fluxo_completo":
+                    encerrar = continuar_apos_consulta(page, cliente, cpf_site, banco, lista_saida, timeout_ms)
+                    pares_concluidos.add((cliente.cpf, banco))
+                    navegacao.voltar_para_consulta_limpa(page)
+                    if encerrar:
+                        break
+                    continue
+                pendentes.append(ConsultaPendente(cliente=cliente, cpf_site=cpf_site, banco=banco))
+        except Exception as e:
+            print(f"Erro ao enviar consultas do cliente {cliente.cpf}: {e}")
+            csv_io.log_critico(lista_saida, cliente, "", "falha_historico", str(e).replace("\n", " ").replace("\r", "")[:500])
+            navegacao.voltar_para_consulta_limpa(page)
+        na_janela += 1
+        if na_janela >= janela:
+            colher_pendentes(page, pendentes, lista_saida, timeout_ms, pares_concluidos)
+            lista_saida.fechar_clientes(cpfs_janela, pares_concluidos)
+            na_janela = 0
+            cpfs_janela = []
+            pares_concluidos = set()
+    if pendentes:
+        colher_pendentes(page, pendentes, lista_saida, timeout_ms, pares_concluidos)
+    lista_saida.fechar_clientes(cpfs_janela, pares_concluidos)
+    if caminho_saida:
+        csv_io.salvar_dataframe_final(caminho_saida, lista_saida)
+    return lista_saida
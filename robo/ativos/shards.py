@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+import zlib
+from typing import List
+
+import config
+from robo.passivos import csv_io
+
+_RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def indice_shard(cpf: str, shards: int) -> int:
+    """Shard estável do CPF (crc32; `hash()` do Python muda a cada processo)."""
+    return zlib.crc32(cpf.encode("utf-8")) % shards
+
+
+def _aguardar_sessao_inicial(processo: subprocess.Popen, caminho_sessao: str) -> None:
+    """Sem sessão salva, deixa o primeiro shard fazer o login antes de abrir os demais."""
+    limite = time.monotonic() + config.TIMEOUT_LOGIN_MS / 1000 * 2
+    while time.monotonic() < limite and processo.poll() is None:
+        if os.path.exists(caminho_sessao):
+            return
+        time.sleep(1)
+
+
+def executar_em_shards(
+    caminho_entrada: str | None = None,
+    dir_saida: str | None = None,
+    shards: int = 2,
+    headless: bool = False,
+    workers: int = 1,
+    motor: str = "sync",
+    pipeline: bool = False,
+    bancos_paralelos: bool = False,
+    varredura_historico: bool = False,
+    delta: bool = False,
+    nova_sessao: bool = False,
+    caminho_saida: str | None = None,
+) -> None:
+    """Divide os clientes por hash do CPF em `shards` subprocessos (`python -m robo.main`), cada um com
+    seu CSV parcial, e mescla as partes num único CSV (`caminho_saida` ou um novo `resultado_*.csv`) na ordem
+    da entrada. Um shard que falhe não invalida as partes gravadas pelos outros. `nova_sessao` descarta a sessão
+    salva aqui, antes do primeiro shard: ele faz o login e os demais esperam a sessão nova."""
+    if caminho_entrada is None:
+        caminho_entrada = os.path.join(config.DIR_ENTRADA_PADRAO, config.ARQUIVO_ENTRADA_PADRAO)
+    if dir_saida is None:
+        dir_saida = config.DIR_SAIDA_PADRAO
+    if not os.path.exists(caminho_entrada):
+        raise FileNotFoundError(f"Arquivo de entrada não encontrado: {caminho_entrada}")
+    if caminho_saida is None:
+        caminho_saida = csv_io.criar_caminho_csv_saida(dir_saida)
+    dir_partes = os.path.splitext(caminho_saida)[0] + "_partes"
+    os.makedirs(dir_partes, exist_ok=True)
+    leitura = csv_io.LeituraClientes(caminho_entrada)
+    tamanhos = csv_io.particionar_clientes(leitura, [os.path.join(dir_partes, f"entrada_{k}.csv") for k in range(shards)], lambda c: indice_shard(c.cpf, shards))
+    if not leitura.ordem:
+        os.rmdir(dir_partes)
+        print("Nenhum cliente válido encontrado no CSV.")
+        return
+    print(f"CSV de saída: {caminho_saida} (partes em {dir_partes})")
+    caminho_sessao = config.ARQUIVO_SESSAO if getattr(config, "USAR_SESSAO_SALVA", False) else None
+    if caminho_sessao and nova_sessao and os.path.exists(caminho_sessao):
+        os.remove(caminho_sessao)
+    partes: List[str] = []
+    processos: List[tuple[int, subprocess.Popen]] = []
+    try:
+        for k, tamanho in enumerate(tamanhos):
+            if not tamanho:
+                continue
+            entrada_k = os.path.join(dir_partes, f"entrada_{k}.csv")
+            saida_k = os.path.join(dir_partes, f"parte_{k}.csv")
+            cmd = [sys.executable, "-m", "robo.main", "--entrada", entrada_k, "--arquivo-saida", saida_k, "--workers", str(workers), "--motor", motor]
+            if headless:
+                cmd.append("--headless")
+            if pipeline:
+                cmd.append("--pipeline")
+            if bancos_paralelos:
+                cmd.append("--bancos-paralelos")
+            if varredura_historico:
+                cmd.append("--varredura-historico")
+            if delta:
+                cmd.append("--delta")
+            print(f"[shard {k}] {tamanho} clientes")
+            proc = subprocess.Popen(cmd, cwd=_RAIZ_PROJETO)
+            if not processos and caminho_sessao and not os.path.exists(caminho_sessao):
+                _aguardar_sessao_inicial(proc, caminho_sessao)
+            partes.append(saida_k)
+            processos.append((k, proc))
+        for k, proc in processos:
+            rc = proc.wait()
+            if rc != 0:
+                print(f"[shard {k}] terminou com código {rc}; as demais partes serão mescladas mesmo assim.")
+    except KeyboardInterrupt:
+        print("Interrompido: encerrando shards e mesclando as partes já gravadas.")
+        for _k, proc in processos:
+            if proc.poll() is None:
+                proc.terminate()
+        for _k, proc in processos:
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        raise
+    finally:
+        csv_io.mesclar_csvs_saida(partes, caminho_saida, list(leitura.ordem))
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Set, Tuple
+
+from playwright.sync_api import Page  # type: ignore[import-untyped]
+
+import config
+from robo.passivos import cpf_utils
+from robo.comms import historico
+from robo.comms import indice_historico
+from robo.comms import navegacao
+from robo.passivos.modelos import Cliente
+from robo.passivos.saida import SaidaResultados
+from robo.ativos.consultas import ConsultaPendente, colher_pendentes
+
+
+@dataclass
+class ResultadoVarredura:
+    """Separação dos clientes pelo histórico lido antes do loop principal."""
+    com_sucesso: List[ConsultaPendente] = field(default_factory=list)
+    processando: List[ConsultaPendente] = field(default_factory=list)
+    a_consultar: List[Cliente] = field(default_factory=list)
+    pares_resolvidos: Set[Tuple[str, str]] = field(default_factory=set)
+    ordem: Dict[str, int] = field(default_factory=dict)  # CPF -> posição na entrada
+
+    def cpfs_processando(self) -> List[str]:
+        """CPFs com algum par em Processando, na ordem em que apareceram (só são concluídos depois de `colher_processando`)."""
+        return list(dict.fromkeys(p.cliente.cpf for p in self.processando))
+
+
+def _sucesso_recente(data_hora: str) -> bool:
+    """Sem data na linha conta como recente (mesma regra do atalho por CPF); com data, vale até VARREDURA_IDADE_MAX_SUCESSO_H."""
+    if not data_hora:
+        return True
+    for formato in ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"):
+        try:
+            quando = datetime.strptime(data_hora, formato)
+            break
+        except ValueError:
+            continue
+    else:
+        return True
+    return datetime.now() - quando <= timedelta(hours=getattr(config, "VARREDURA_IDADE_MAX_SUCESSO_H", 24))
+
+
+def classificar_clientes(page: Page, clientes: Iterable[Cliente], pares_ignorados: Set[Tuple[str, str]] | None = None) -> ResultadoVarredura:
+    """Lê o histórico uma vez (todas as páginas até VARREDURA_MAX_PAGINAS) e separa cada par cliente/banco em
+    Sucesso recente (colher já), Processando (colher depois) ou nova consulta. Pares em `pares_ignorados`
+    (já registrados no diário de uma execução retomada) ficam de fora."""
+    indice = indice_historico.obter_indice(page) or indice_historico.IndiceHistorico(page)
+    try:
+        page.locator("tr, [role='row']").first.wait_for(state="visible", timeout=getattr(config, "TIMEOUT_FORM_CONSULTA_MS", 10000))
+    except Exception:
+        pass
+    indice.ler(getattr(config, "VARREDURA_MAX_PAGINAS", 10))
+    resultado = ResultadoVarredura()
+    for cliente in clientes:
+        if cliente.cpf in resultado.ordem:
+            continue
+        resultado.ordem[cliente.cpf] = len(resultado.ordem)
+        if not cpf_utils.cpf_valido_11(cliente.cpf):
+            resultado.a_consultar.append(cliente)
+            continue
+        precisa_consulta = False
+        for banco in ("QiTech", "Celcoin"):
+            if pares_ignorados and (cliente.cpf, banco) in pares_ignorados:
+                continue
+            entrada = indice.obter(cliente.cpf, banco)
+            pendente = ConsultaPendente(cliente=cliente, cpf_site=cpf_utils.cpf_com_mascara(cliente.cpf), banco=banco)
+            if entrada is not None and entrada.status == "sucesso" and _sucesso_recente(entrada.data_hora):
+                resultado.com_sucesso.append(pendente)
+            elif entrada is not None and entrada.status == "processando":
+                resultado.processando.append(pendente)
+                resultado.pares_resolvidos.add((cliente.cpf, banco))
+            else:
+                precisa_consulta = True
+        if precisa_consulta:
+            resultado.a_consultar.append(cliente)
+    return resultado
+
+
+def executar_varredura_inicial(page: Page, clientes: Iterable[Cliente], lista_saida: SaidaResultados, pares_ignorados: Set[Tuple[str, str]] | None = None) -> ResultadoVarredura:
+    """Fase anterior ao loop principal: colhe os pares com Sucesso recente no histórico (resultado + simulação) e
+    marca os que ainda estão em Processando para `colher_processando` ao final. `a_consultar` traz só os clientes
+    com algum banco sem resultado; `pares_resolvidos` é passado ao loop para não repetir esses bancos."""
+    timeout_ms = config.TIMEOUT_PROCESSAR_MS
+    resultado = classificar_clientes(page, clientes, pares_ignorados)
+    print(f"Varredura do histórico: {len(resultado.com_sucesso)} pares com Sucesso, {len(resultado.processando)} em Processando, {len(resultado.a_consultar)} clientes a consultar.")
+    for pendente in resultado.com_sucesso:
+        try:
+            colhido = historico.processar_resultado_existente_no_historico(page, pendente.cpf_site, pendente.banco, pendente.cliente, lista_saida, timeout_ms)
+        except Exception:
+            colhido = False
+        navegacao.voltar_para_consulta_limpa(page)
+        if colhido:
+            resultado.pares_resolvidos.add((pendente.cliente.cpf, pendente.banco))
+        elif pendente.cliente not in resultado.a_consultar:
+            resultado.a_consultar.append(pendente.cliente)
+    resultado.a_consultar.sort(key=lambda c: resultado.ordem.get(c.cpf, len(resultado.ordem)))
+    return resultado
+
+
+def colher_processando(page: Page, resultado: ResultadoVarredura, lista_saida: SaidaResultados) -> None:
+    """Depois do loop principal: colhe de uma vez (um Recarregar por varredura) os pares que estavam em Processando."""
+    if resultado.processando:
+        navegacao.voltar_para_consulta_limpa(page)
+        colher_pendentes(page, list(resultado.processando), lista_saida, config.TIMEOUT_PROCESSAR_MS)
@@ -1,5 +1,10 @@
-from robo.comms.historico import abrir_resultado_historico, buscar_linha_historico, extrair_valor_maximo_parcela, processar_resultado_existente_no_historico, simular_tabelas, tratar_recusa_ou_requisicao_mal_formatada
-from robo.comms.navegacao import fechar_pagina_se_aberta, login_e_ir_para_consulta, obter_pagina_consulta_principal, voltar_para_consulta_limpa
+from robo.comms.historico import abrir_resultado_historico, buscar_linha_historico, extrair_valor_maximo_parcela, localizar_linha_historico, processar_resultado_existente_no_historico, simular_tabelas, tratar_recusa_ou_requisicao_mal_formatada
+from robo.comms.navegacao import fechar_pagina_se_aberta, garantir_sessao, login_e_ir_para_consulta, obter_pagina_consulta_principal, salvar_sessao, sessao_valida, voltar_para_consulta_limpa
+from robo.comms.esperas import instalar_sem_animacoes, pausa_transicao
+from robo.comms.formulario import FormularioConsulta, obter_formulario
+from robo.comms.indice_historico import EntradaHistorico, IndiceHistorico, obter_indice
+from robo.comms.perfil_rede import PerfilRedeEnxuta, instalar_perfil_rede, obter_perfil_rede
+from robo.comms.rede import ColetorRespostas, instalar_coletor, obter_coletor
 from robo.comms.termo import abrir_termo_em_nova_aba, extrair_link_termo_do_modal, extrair_link_termo_pagina
 from robo.comms.fluxo_consulta import (
     garantir_cpf_preenchido,
@@ -10,19 +15,37 @@ from robo.comms.fluxo_consulta import (
     pagina_tem_registro_nao_encontrado,
     pagina_tem_restricao_emissao,
     selecionar_banco,
+    sondar_estado_pagina,
 )
 
 __all__ = [
     "abrir_resultado_historico",
     "buscar_linha_historico",
     "extrair_valor_maximo_parcela",
+    "localizar_linha_historico",
     "processar_resultado_existente_no_historico",
     "simular_tabelas",
     "tratar_recusa_ou_requisicao_mal_formatada",
     "fechar_pagina_se_aberta",
+    "garantir_sessao",
     "login_e_ir_para_consulta",
     "obter_pagina_consulta_principal",
+    "salvar_sessao",
+    "sessao_valida",
     "voltar_para_consulta_limpa",
+    "instalar_sem_animacoes",
+    "pausa_transicao",
+    "FormularioConsulta",
+    "obter_formulario",
+    "EntradaHistorico",
+    "IndiceHistorico",
+    "obter_indice",
+    "PerfilRedeEnxuta",
+    "instalar_perfil_rede",
+    "obter_perfil_rede",
+    "ColetorRespostas",
+    "instalar_coletor",
+    "obter_coletor",
     "abrir_termo_em_nova_aba",
     "extrair_link_termo_do_modal",
     "extrair_link_termo_pagina",
@@ -34,4 +57,5 @@ __all__ = [
     "pagina_tem_registro_nao_encontrado",
     "pagina_tem_restricao_emissao",
     "selecionar_banco",
+    "sondar_estado_pagina",
 ]
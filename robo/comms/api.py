@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import os
+import urllib.error
+import urllib.request
+from typing import Any, Tuple
+from urllib.parse import urljoin, urlparse
+
+import config
+from robo.passivos.modelos import ErroApi
+
+# Contrato do motor api (implementado por servidor_simulado.py); rotas relativas à URL base, {id} = identificador da consulta
+ROTA_CONSULTAR = "consultas"
+ROTA_CONSULTA = "consultas/{id}"
+ROTA_SIMULAR = "consultas/{id}/simulacoes"
+
+
+def _cabecalhos_da_sessao(caminho_sessao: str | None, url_base: str) -> dict:
+    """Monta Cookie (e Authorization, se houver token no localStorage) a partir do storage_state salvo pelo login.
+    Só entram os cookies cujo domínio é exatamente o host da URL base: a sessão do admin não vaza para outro host."""
+    if not caminho_sessao or not os.path.exists(caminho_sessao):
+        return {}
+    with open(caminho_sessao, encoding="utf-8") as f:
+        estado = json.load(f)
+    host = (urlparse(url_base).hostname or "").lower()
+    cookies = []
+    for c in estado.get("cookies", []):
+        dominio = str(c.get("domain", "")).lstrip(".").lower()
+        if dominio and dominio == host:
+            cookies.append(f"{c.get('name')}={c.get('value')}")
+    cabecalhos = {"Cookie": "; ".join(cookies)} if cookies else {}
+    chaves_token = {k.lower() for k in getattr(config, "API_CHAVES_TOKEN", ["token", "access_token", "accessToken"])}
+    for origem in estado.get("origins", []):
+        for item in origem.get("localStorage", []):
+            if str(item.get("name", "")).lower() in chaves_token and item.get("value"):
+                cabecalhos["Authorization"] = "Bearer " + str(item["value"]).strip('"')
+                return cabecalhos
+    return cabecalhos
+
+
+class ClienteApi:
+    """Cliente HTTP (urllib) das rotas de consulta, status e simulação, autenticado com a sessão salva.
+    Rotas em ROTA_*; `servidor_simulado.py` implementa o mesmo contrato para testes offline."""
+
+    def __init__(self, url_base: str | None = None, caminho_sessao: str | None = None) -> None:
+        url_base = url_base or getattr(config, "API_URL_BASE", "")
+        if not url_base:
+            raise ErroApi("Motor api sem URL base: informe --api-url ou ROBO_API_URL.")
+        self.url_base = url_base.rstrip("/") + "/"
+        self.timeout_s = getattr(config, "API_TIMEOUT_S", 20)
+        self.cabecalhos = {"Accept": "application/json", "Content-Type": "application/json"}
+        self.cabecalhos.update(_cabecalhos_da_sessao(caminho_sessao, self.url_base))
+
+    def _requisitar(self, metodo: str, rota: str, corpo: dict | None = None) -> Tuple[int, dict]:
+        url = urljoin(self.url_base, rota.lstrip("/"))
+        dados = json.dumps(corpo).encode("utf-8") if corpo is not None else None
+        req = urllib.request.Request(url, data=dados, method=metodo, headers=self.cabecalhos)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout_s) as resp:
+                return (resp.status, self._json(resp.read()))
+        except urllib.error.HTTPError as e:
+            if e.code in (401, 403):
+                raise ErroApi("Sessão recusada pela API; rode o motor sync uma vez (ou --nova-sessao) para renovar o login.", e.code)
+            if e.code >= 500:
+                raise ErroApi(f"HTTP {e.code} em {rota}", e.code)
+            return (e.code, self._json(e.read()))
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise ErroApi(f"Falha de conexão em {rota}: {e}")
+
+    @staticmethod
+    def _json(corpo: bytes) -> dict:
+        if not corpo:
+            return {}
+        try:
+            dado: Any = json.loads(corpo.decode("utf-8"))
+        except ValueError:
+            raise ErroApi("Resposta da API não é JSON")
+        return dado if isinstance(dado, dict) else {"dados": dado}
+
+    def consultar(self, cpf: str, banco: str) -> dict:
+        """Dispara a consulta de saldo. Resposta: {"id", "status": "processando"} ou {"status": <recusa>, "mensagem"}."""
+        _http, resp = self._requisitar("POST", ROTA_CONSULTAR, {"cpf": cpf, "banco": banco})
+        return resp
+
+    def status_consulta(self, id_consulta: str) -> dict:
+        """{"status": "processando" | "sucesso" | "erro" | "recusa_politica_banco", "valor_maximo_parcela", "mensagem"}."""
+        _http, resp = self._requisitar("GET", ROTA_CONSULTA.format(id=id_consulta))
+        return resp
+
+    def simular(self, id_consulta: str, meses: int, valor: str, tipo: str = "valor_parcela") -> dict:
+        """{"qtd_parcelas", "valor_liberado", "valor_parcela", "valor_total"} ou {"status": <falha>, "mensagem"}.
+        `tipo` é o campo Tipo da UI: "valor_parcela" (padrão) ou "valor_total" (`valor` passa a ser o total)."""
+        _http, resp = self._requisitar("POST", ROTA_SIMULAR.format(id=id_consulta), {"prazo": meses, "tipo": tipo, "valor": valor})
+        return resp
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Dict
+
+import config
+
+if TYPE_CHECKING:
+    from playwright.sync_api import BrowserContext, Locator, Page
+
+# Injetado antes de qualquer script da página (e em toda aba do contexto): zera duração e atraso de transições e
+# animações CSS. Com duração zero as transições do Vue terminam no mesmo quadro, sem esperar transitionend.
+SCRIPT_SEM_ANIMACOES = """(() => {
+    const css = '*, *::before, *::after { transition-duration: 0s !important; transition-delay: 0s !important;'
+        + ' animation-duration: 0s !important; animation-delay: 0s !important; scroll-behavior: auto !important; }';
+    const aplicar = () => {
+        if (document.getElementById('robo-sem-animacoes')) return;
+        const raiz = document.head || document.documentElement;
+        if (!raiz) return;
+        const estilo = document.createElement('style');
+        estilo.id = 'robo-sem-animacoes';
+        estilo.textContent = css;
+        raiz.appendChild(estilo);
+    };
+    aplicar();
+    document.addEventListener('DOMContentLoaded', aplicar);
+})();"""
+
+
+def animacoes_desligadas() -> bool:
+    return bool(getattr(config, "SEM_ANIMACOES", False))
+
+
+def opcoes_contexto() -> Dict[str, Any]:
+    """Argumentos extras de `browser.new_context`: emulação de movimento reduzido no modo sem animações."""
+    return {"reduced_motion": "reduce"} if animacoes_desligadas() else {}
+
+
+def instalar_sem_animacoes(context: "BrowserContext") -> bool:
+    """Registra SCRIPT_SEM_ANIMACOES no contexto (vale para as abas abertas depois). Nada com SEM_ANIMACOES=False."""
+    if not animacoes_desligadas():
+        return False
+    context.add_init_script(script=SCRIPT_SEM_ANIMACOES)
+    return True
+
+
+def pausa_transicao(alvo: "Page | Locator | None", ms: int, condicao: Callable[[int], Any] | None = None) -> None:
+    """Pausa fixa que só existia para a transição do front terminar. Com animações, espera `ms` como antes (Locator
+    sem wait_for_timeout não espera, como nos `wait_fn` originais). Sem animações, a transição já acabou: espera só
+    `condicao(timeout_ms)` (um wait_for, por exemplo), limitada aos mesmos `ms`, ou volta na hora se não houver.
+    Falha ou timeout da condição não interrompe o fluxo: o passo seguinte tem a própria espera."""
+    if not animacoes_desligadas():
+        esperar = getattr(alvo, "wait_for_timeout", None)
+        if esperar is not None:
+            esperar(ms)
+        return
+    if condicao is not None:
+        try:
+            condicao(max(1, ms))
+        except Exception:
+            pass
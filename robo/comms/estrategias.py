@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import config
+
+_REGISTRO: "RegistroEstrategias | None" = None
+_TRAVA_REGISTRO = threading.Lock()
+
+
+class RegistroEstrategias:
+    """Placar das estratégias de fallback (seleção do banco, abertura do dropdown Tabela): sucessos, falhas e tempo
+    médio de sucesso por grupo. `ordenar` põe na frente quem já funcionou nesta tela; as nunca tentadas mantêm a
+    ordem original e as que só falharam vão para o fim. Persistido em JSON entre execuções."""
+
+    def __init__(self, caminho: str | None = None) -> None:
+        self.caminho = caminho
+        self.placar: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._trava = threading.Lock()
+        self._alterado = False
+        if caminho and os.path.exists(caminho):
+            try:
+                with open(caminho, encoding="utf-8") as f:
+                    dado = json.load(f)
+                if isinstance(dado, dict):
+                    self.placar = dado
+            except (OSError, ValueError):
+                self.placar = {}
+
+    def ordenar(self, grupo: str, nomes: Sequence[str]) -> List[str]:
+        with self._trava:
+            stats = dict(self.placar.get(grupo, {}))
+
+        def chave(item: Tuple[int, str]) -> tuple:
+            indice, nome = item
+            s = stats.get(nome)
+            if not s:
+                return (1, 0.0, 0.0, indice)
+            tentativas = s.get("sucessos", 0) + s.get("falhas", 0)
+            if not s.get("sucessos"):
+                return (2, 0.0, 0.0, indice)
+            taxa = s["sucessos"] / tentativas
+            return (0, -taxa, s.get("tempo_s", 0.0) / s["sucessos"], indice)
+
+        return [nome for _i, nome in sorted(enumerate(nomes), key=chave)]
+
+    def registrar(self, grupo: str, nome: str, sucesso: bool, duracao_s: float) -> None:
+        with self._trava:
+            s = self.placar.setdefault(grupo, {}).setdefault(nome, {"sucessos": 0, "falhas": 0, "tempo_s": 0.0})
+            if sucesso:
+                s["sucessos"] += 1
+                s["tempo_s"] = round(s.get("tempo_s", 0.0) + duracao_s, 3)
+            else:
+                s["falhas"] += 1
+            self._alterado = True
+
+    def salvar(self) -> None:
+        """Grava o placar (arquivo temporário + os.replace, para não deixar JSON pela metade)."""
+        if not self.caminho or not self._alterado:
+            return
+        with self._trava:
+            conteudo = json.dumps(self.placar, ensure_ascii=False, indent=1)
+            self._alterado = False
+        try:
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            temporario = f"{self.caminho}.{os.getpid()}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                f.write(conteudo)
+            os.replace(temporario, self.caminho)
+        except OSError:
+            pass
+
+
+def obter_registro() -> RegistroEstrategias | None:
+    """Registro do processo (um por execução, carregado de config.ARQUIVO_ESTRATEGIAS e salvo na saída).
+    None quando APRENDER_ESTRATEGIAS=False: as estratégias rodam na ordem fixa do código."""
+    global _REGISTRO
+    if not getattr(config, "APRENDER_ESTRATEGIAS", True):
+        return None
+    with _TRAVA_REGISTRO:
+        if _REGISTRO is None:
+            _REGISTRO = RegistroEstrategias(getattr(config, "ARQUIVO_ESTRATEGIAS", None))
+            atexit.register(_REGISTRO.salvar)
+        return _REGISTRO
+
+
+def tentar_em_ordem(
+    grupo: str,
+    estrategias: Sequence[Tuple[str, Callable[[], bool]]],
+    registro: Optional[RegistroEstrategias] = None,
+    verificar: Callable[[], bool | None] | None = None,
+) -> str | None:
+    """Executa as estratégias (nome, função) na ordem aprendida até a primeira devolver True; devolve o nome dela
+    ou None. Exceções contam como falha. Com `verificar`, o True da estratégia só vale depois de conferido na tela:
+    False conta como falha (segue para a próxima) e None (nada legível para conferir) aceita a estratégia sem
+    registrá-la no placar, para que um clique que não selecionou nada não suba na ordem aprendida."""
+    if registro is None:
+        registro = obter_registro()
+    por_nome = dict(estrategias)
+    nomes = [nome for nome, _fn in estrategias]
+    if registro is not None:
+        nomes = registro.ordenar(grupo, nomes)
+    for nome in nomes:
+        inicio = time.monotonic()
+        try:
+            ok = bool(por_nome[nome]())
+        except Exception:
+            ok = False
+        conferido: bool | None = ok
+        if ok and verificar is not None:
+            try:
+                conferido = verificar()
+            except Exception:
+                conferido = None
+            ok = conferido is not False
+        if registro is not None and conferido is not None:
+            registro.registrar(grupo, nome, ok, time.monotonic() - inicio)
+        if ok:
+            return nome
+    return None
@@ -5,68 +5,82 @@ import re
 from playwright.sync_api import Page  # type: ignore[import-untyped]
 
 import config
+from robo.comms import esperas, estrategias
 
 
-def pagina_tem_restricao_emissao(page: Page) -> bool:
-    try:
-        loc = page.get_by_text(config.UI_TEXTO_RESTRICAO_EMISSAO, exact=False).or_(page.get_by_text(re.compile(r"n[aã]o\s*[eé]\s*permitida.*emiss[aã]o.*proposta|empresa\s*consultada\s*em\s*menos\s*de\s*2\s*anos", re.IGNORECASE)))
-        if loc.first.is_visible():
-            return True
-    except Exception:
-        pass
+_RE_RESTRICAO_EMISSAO = r"n[aã]o\s*[eé]\s*permitida.*emiss[aã]o.*proposta|empresa\s*consultada\s*em\s*menos\s*de\s*2\s*anos"
+_RE_CPF_INVALIDO = r"cpf.*inv[aá]lido|cpf.*n[aã]o.*v[aá]lido|o?\s*cpf\s*informado\s*n[aã]o\s*[eé]?\s*v[aá]lido"
+_RE_CPF_NAO_ENCONTRADO = r"cpf\s*n[aã]o\s*encontrado\s*na\s*base|trabalhador\s*ineleg[ií]vel"
+
+_JS_SONDAR_ESTADO = """
+([condicoes, cpfs]) => {
+    const norm = (t) => (t || '').replace(/[^\\S\\n]+/g, ' ').toLowerCase();
+    const texto = norm(document.body ? document.body.innerText : '');
+    const estado = {};
+    for (const [chave, cond] of Object.entries(condicoes)) {
+        let achou = cond.textos.some(t => t && texto.includes(norm(t)));
+        if (!achou && cond.regex) {
+            achou = new RegExp(cond.regex, 'i').test(texto);
+        }
+        estado[chave] = achou;
+    }
+    const visivel = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    estado.linha_cpf = cpfs.length > 0 && Array.from(document.querySelectorAll('tr')).some(
+        tr => visivel(tr) && cpfs.some(c => (tr.innerText || '').includes(c))
+    );
+    return estado;
+}
+"""
+
+
+def _condicoes_estado() -> dict:
+    """Textos (de config) e regexes de cada condição avaliada por `sondar_estado_pagina`."""
+    return {
+        "restricao_emissao": {"textos": [config.UI_TEXTO_RESTRICAO_EMISSAO], "regex": _RE_RESTRICAO_EMISSAO},
+        "cpf_invalido": {
+            "textos": [config.UI_TEXTO_CPF_INVALIDO, getattr(config, "UI_TEXTO_CPF_INVALIDO_ALT", "O CPF informado não é válido"), getattr(config, "UI_TEXTO_CPF_INVALIDO_ALT2", "CPF informado não é válido")],
+            "regex": _RE_CPF_INVALIDO,
+        },
+        "cpf_nao_encontrado": {"textos": [config.UI_TEXTO_CPF_NAO_ENCONTRADO, getattr(config, "UI_TEXTO_CPF_NAO_ENCONTRADO_ALT", "")], "regex": _RE_CPF_NAO_ENCONTRADO},
+        "registro_nao_encontrado": {"textos": [getattr(config, "UI_TEXTO_REGISTRO_NAO_ENCONTRADO", "")], "regex": ""},
+        "erro_na_consulta": {"textos": [config.UI_TEXTO_ERRO_NA_CONSULTA], "regex": ""},
+        "modal_autorizacao": {"textos": [config.UI_TEXTO_MODAL_AUTORIZACAO], "regex": ""},
+        "modal_autorizacao_celcoin": {"textos": list(getattr(config, "UI_TEXTO_MODAL_AUTORIZACAO_CELCOIN", [config.UI_TEXTO_MODAL_AUTORIZACAO])), "regex": ""},
+        "sem_vinculo": {"textos": [config.UI_TEXTO_SEM_VINCULO, getattr(config, "UI_TEXTO_SEM_VINCULO_ALT", "")], "regex": ""},
+    }
+
+
+def sondar_estado_pagina(page: Page, cpf_site: str = "", cpf: str = "") -> dict:
+    """Avalia todas as condições da consulta numa única chamada à página (texto visível do body + linhas `tr` do CPF).
+    Chaves: restricao_emissao, cpf_invalido, cpf_nao_encontrado, registro_nao_encontrado, erro_na_consulta,
+    modal_autorizacao, modal_autorizacao_celcoin, sem_vinculo, linha_cpf. Em erro de avaliação, tudo False."""
+    condicoes = _condicoes_estado()
     try:
-        texto = page.evaluate("() => document.body?.innerText || ''")
-        if re.search(r"n[aã]o\s*[eé]\s*permitida\s*a\s*emiss[aã]o\s*de\s*proposta|empresa\s*consultada\s*em\s*menos\s*de\s*2\s*anos", texto, re.IGNORECASE):
-            return True
+        return page.evaluate(_JS_SONDAR_ESTADO, [condicoes, [c for c in (cpf_site, cpf) if c]])
     except Exception:
-        pass
-    return False
+        estado = {chave: False for chave in condicoes}
+        estado["linha_cpf"] = False
+        return estado
+
+
+def pagina_tem_restricao_emissao(page: Page) -> bool:
+    return sondar_estado_pagina(page)["restricao_emissao"]
 
 
 def pagina_tem_cpf_invalido(page: Page) -> bool:
-    try:
-        loc = page.get_by_text(config.UI_TEXTO_CPF_INVALIDO, exact=False)\
-            .or_(page.get_by_text(getattr(config, "UI_TEXTO_CPF_INVALIDO_ALT", "O CPF informado não é válido"), exact=False))\
-            .or_(page.get_by_text(getattr(config, "UI_TEXTO_CPF_INVALIDO_ALT2", "CPF informado não é válido"), exact=False))\
-            .or_(page.get_by_text(re.compile(r"cpf.*inv[aá]lido|cpf.*n[aã]o.*v[aá]lido|o?\s*cpf\s*informado\s*n[aã]o\s*[eé]?\s*v[aá]lido", re.IGNORECASE)))
-        return loc.first.is_visible()
-    except Exception:
-        return False
+    return sondar_estado_pagina(page)["cpf_invalido"]
 
 
 def pagina_tem_cpf_nao_encontrado(page: Page) -> bool:
-    try:
-        loc = page.get_by_text(config.UI_TEXTO_CPF_NAO_ENCONTRADO, exact=False).or_(page.get_by_text(getattr(config, "UI_TEXTO_CPF_NAO_ENCONTRADO_ALT", ""), exact=False)).or_(page.get_by_text(re.compile(r"cpf\s*n[aã]o\s*encontrado\s*na\s*base|trabalhador\s*ineleg[ií]vel", re.IGNORECASE)))
-        if loc.first.is_visible():
-            return True
-    except Exception:
-        pass
-    try:
-        texto = page.evaluate("() => document.body?.innerText || ''")
-        if re.search(r"cpf\s*n[aã]o\s*encontrado\s*na\s*base|trabalhador\s*ineleg[ií]vel", texto, re.IGNORECASE):
-            return True
-    except Exception:
-        pass
-    return False
+    return sondar_estado_pagina(page)["cpf_nao_encontrado"]
 
 
 def pagina_tem_erro_na_consulta(page: Page) -> bool:
-    try:
-        if page.get_by_text(config.UI_TEXTO_ERRO_NA_CONSULTA, exact=False).first.is_visible():
-            return True
-    except Exception:
-        pass
-    return False
+    return sondar_estado_pagina(page)["erro_na_consulta"]
 
 
 def pagina_tem_registro_nao_encontrado(page: Page) -> bool:
-    try:
-        texto_reg = getattr(config, "UI_TEXTO_REGISTRO_NAO_ENCONTRADO", "")
-        if texto_reg and page.get_by_text(texto_reg, exact=False).first.is_visible():
-            return True
-    except Exception:
-        pass
-    return False
+    return sondar_estado_pagina(page)["registro_nao_encontrado"]
 
 
 def garantir_cpf_preenchido(page: Page, cpf_site: str) -> None:
@@ -109,117 +123,160 @@ def garantir_cpf_preenchido(page: Page, cpf_site: str) -> None:
                 pass
 
 
-def selecionar_banco(pg: Page, banco: str) -> bool:
-    alvo = "celcoin" if "celcoin" in banco.lower() else "qitech"
-    form = pg.locator("form").first
-    sel = form.locator("select").first
-    try:
-        if sel.count() > 0 and sel.is_visible():
-            options = sel.locator("option").all_inner_texts()
-            for opt in options:
-                if alvo in (opt or "").lower():
-                    sel.select_option(label=opt)
-                    return True
-    except Exception:
-        pass
-    combobox = form.get_by_role("combobox").first
-    try:
-        if combobox.count() > 0 and combobox.is_visible():
-            combobox.click()
-            pg.wait_for_timeout(400)
-            listbox = pg.get_by_role("listbox").first
-            listbox.wait_for(state="visible", timeout=2000)
-            option = listbox.get_by_role("option").filter(has_text=re.compile(alvo, re.IGNORECASE)).first
-            option.click()
-            return True
-    except Exception:
-        pass
-    try:
-        pg.get_by_text(re.compile(alvo, re.IGNORECASE)).first.click(timeout=1500)
-        return True
-    except Exception:
-        pass
-    is_qitech = banco and "qitech" in banco.lower()
-    is_celcoin = banco and "celcoin" in banco.lower()
-    try:
-        ok = pg.evaluate("""(isQ) => {
-            const sel = document.querySelector('form select[name*="banco"], form select[id*="banco"], form select');
-            if (sel) {
-                for (const opt of sel.options) {
-                    const t = (opt.text || opt.label || '').toLowerCase();
-                    if (isQ && t.indexOf('qitech') >= 0) { opt.selected = true; sel.dispatchEvent(new Event('change', { bubbles: true })); return true; }
-                    if (!isQ && t.indexOf('celcoin') >= 0) { opt.selected = true; sel.dispatchEvent(new Event('change', { bubbles: true })); return true; }
-                }
+def _banco_select_nativo(pg: Page, alvo: str) -> bool:
+    sel = pg.locator("form").first.locator("select").first
+    if sel.count() > 0 and sel.is_visible():
+        for opt in sel.locator("option").all_inner_texts():
+            if alvo in (opt or "").lower():
+                sel.select_option(label=opt)
+                return True
+    return False
+
+
+def _banco_combobox(pg: Page, alvo: str) -> bool:
+    combobox = pg.locator("form").first.get_by_role("combobox").first
+    if combobox.count() == 0 or not combobox.is_visible():
+        return False
+    combobox.click()
+    esperas.pausa_transicao(pg, 400)
+    listbox = pg.get_by_role("listbox").first
+    listbox.wait_for(state="visible", timeout=2000)
+    listbox.get_by_role("option").filter(has_text=re.compile(alvo, re.IGNORECASE)).first.click()
+    return True
+
+
+def _banco_texto_pagina(pg: Page, alvo: str) -> bool:
+    pg.get_by_text(re.compile(alvo, re.IGNORECASE)).first.click(timeout=1500)
+    return True
+
+
+def _banco_select_js(pg: Page, alvo: str) -> bool:
+    return bool(pg.evaluate("""(isQ) => {
+        const sel = document.querySelector('form select[name*="banco"], form select[id*="banco"], form select');
+        if (sel) {
+            for (const opt of sel.options) {
+                const t = (opt.text || opt.label || '').toLowerCase();
+                if (isQ && t.indexOf('qitech') >= 0) { opt.selected = true; sel.dispatchEvent(new Event('change', { bubbles: true })); return true; }
+                if (!isQ && t.indexOf('celcoin') >= 0) { opt.selected = true; sel.dispatchEvent(new Event('change', { bubbles: true })); return true; }
             }
-            return false;
-        }""", is_qitech)
-        if ok:
+        }
+        return false;
+    }""", alvo == "qitech"))
+
+
+def _banco_select_label_config(pg: Page, alvo: str) -> bool:
+    sel = pg.locator("form select").first
+    sel.wait_for(state="visible", timeout=1200)
+    if alvo == "qitech":
+        try:
+            sel.select_option(label=config.UI_OPCAO_QITECH_ALT)
+        except Exception:
+            sel.select_option(label="QITECH")
+    else:
+        sel.select_option(label=config.UI_OPCAO_CELCOIN)
+    return True
+
+
+def _banco_campo_rotulado(pg: Page, alvo: str) -> bool:
+    campo_banco = pg.get_by_label(config.UI_LABEL_BANCO).or_(pg.locator("form").first.locator('[role="combobox"], select, [class*="select"], [class*="dropdown"]').first).first
+    campo_banco.wait_for(state="visible", timeout=1500)
+    campo_banco.click()
+    esperas.pausa_transicao(pg, 400)
+    padrao = re.compile(alvo, re.IGNORECASE)
+    pg.get_by_role("option").filter(has_text=padrao).or_(pg.get_by_text(padrao)).first.click(timeout=3000)
+    esperas.pausa_transicao(pg, 200, lambda t: pg.get_by_role("listbox").first.wait_for(state="hidden", timeout=t))
+    return True
+
+
+def _banco_gatilho_celcoin(pg: Page, alvo: str) -> bool:
+    trigger = pg.locator("form").first.get_by_text("Celcoin", exact=True).first
+    trigger.wait_for(state="visible", timeout=1800)
+    trigger.click(no_wait_after=True)
+    esperas.pausa_transicao(pg, 120)
+    listbox = pg.get_by_role("listbox").first
+    listbox.wait_for(state="visible", timeout=600)
+    listbox.get_by_text(re.compile(alvo, re.IGNORECASE)).first.click(no_wait_after=True, timeout=1000)
+    return True
+
+
+def _banco_opcao_role(pg: Page, alvo: str) -> bool:
+    opcao = pg.get_by_role("option", name=re.compile(alvo, re.IGNORECASE)).first
+    opcao.wait_for(state="visible", timeout=600)
+    opcao.click(no_wait_after=True)
+    return True
+
+
+def _banco_menu(pg: Page, alvo: str) -> bool:
+    menu = pg.get_by_role("menu").first
+    menu.wait_for(state="visible", timeout=500)
+    menu.get_by_text(re.compile(alvo, re.IGNORECASE)).first.click(no_wait_after=True, timeout=800)
+    return True
+
+
+def _banco_texto_form(pg: Page, alvo: str) -> bool:
+    pg.locator("form").first.get_by_text(re.compile(alvo, re.IGNORECASE)).first.click(no_wait_after=True, timeout=800)
+    return True
+
+
+# Banco mostrado no formulário: texto da opção escolhida nos <select> e o texto/valor dos combobox (inclusive os
+# componentes com class*=select; texto com os dois bancos é a lista aberta e não conta). true = mostra o alvo, false = mostra o outro banco, null = nada legível para conferir.
+_JS_BANCO_SELECIONADO = r"""(alvo) => {
+    const norm = (t) => (t || '').toLowerCase().replace(/\s+/g, '');
+    const outro = alvo === 'qitech' ? 'celcoin' : 'qitech';
+    const form = document.querySelector('form') || document.body;
+    const textos = [];
+    for (const sel of form.querySelectorAll('select')) {
+        const opt = sel.options[sel.selectedIndex];
+        if (opt) textos.push(opt.text || opt.label || '');
+    }
+    for (const el of form.querySelectorAll("[role='combobox'], [class*='select']:not(select)")) {
+        if (!el.getClientRects().length) continue;
+        textos.push(el.value || el.getAttribute('aria-valuetext') || el.innerText || '');
+    }
+    let viuOutro = false;
+    for (const t of textos.map(norm)) {
+        if (t.includes(alvo) && t.includes(outro)) continue;  // lista de opções aberta, não o valor escolhido
+        if (t.includes(alvo)) return true;
+        if (t.includes(outro)) viuOutro = true;
+    }
+    return viuOutro ? false : null;
+}"""
+
+
+def _banco_selecionado(pg: Page, alvo: str) -> bool | None:
+    """Confere no formulário se o banco ficou selecionado (o front pode levar um quadro para atualizar o texto)."""
+    conferido = pg.evaluate(_JS_BANCO_SELECIONADO, alvo)
+    if conferido is False:
+        try:
+            pg.wait_for_function(f"(alvo) => ({_JS_BANCO_SELECIONADO})(alvo) === true", arg=alvo, timeout=500)
             return True
-    except Exception:
-        pass
-    try:
-        sel = pg.locator("form select").first
-        sel.wait_for(state="visible", timeout=1200)
-        if is_qitech:
-            try:
-                sel.select_option(label=config.UI_OPCAO_QITECH_ALT)
-            except Exception:
-                sel.select_option(label="QITECH")
-        else:
-            sel.select_option(label=config.UI_OPCAO_CELCOIN)
-        return True
-    except Exception:
-        pass
-    try:
-        campo_banco = pg.get_by_label(config.UI_LABEL_BANCO).or_(pg.locator("form").first.locator('[role="combobox"], select, [class*="select"], [class*="dropdown"]').first).first
-        campo_banco.wait_for(state="visible", timeout=1500)
-        campo_banco.click()
-        pg.wait_for_timeout(400)
-        if is_celcoin:
-            pg.get_by_role("option").filter(has_text=re.compile(r"celcoin", re.IGNORECASE)).or_(pg.get_by_text(re.compile(r"celcoin", re.IGNORECASE))).first.click(timeout=3000)
-        else:
-            pg.get_by_role("option").filter(has_text=re.compile(r"qitech", re.IGNORECASE)).or_(pg.get_by_text(re.compile(r"qitech", re.IGNORECASE))).first.click(timeout=3000)
-        pg.wait_for_timeout(200)
-        return True
-    except Exception:
-        pass
-    try:
-        trigger = form.get_by_text("Celcoin", exact=True).first
-        trigger.wait_for(state="visible", timeout=1800)
-        trigger.click(no_wait_after=True)
-        pg.wait_for_timeout(120)
-        listbox = pg.get_by_role("listbox").first
-        listbox.wait_for(state="visible", timeout=600)
-        if is_celcoin:
-            listbox.get_by_text(re.compile(r"celcoin", re.IGNORECASE)).first.click(no_wait_after=True, timeout=1000)
-        else:
-            listbox.get_by_text(re.compile(r"qitech", re.IGNORECASE)).first.click(no_wait_after=True, timeout=1000)
-        return True
-    except Exception:
-        pass
-    try:
-        pattern = re.compile(r"celcoin", re.IGNORECASE) if is_celcoin else re.compile(r"qitech", re.IGNORECASE)
-        opcao = pg.get_by_role("option", name=pattern).first
-        opcao.wait_for(state="visible", timeout=600)
-        opcao.click(no_wait_after=True)
-        return True
-    except Exception:
-        pass
-    try:
-        menu = pg.get_by_role("menu").first
-        menu.wait_for(state="visible", timeout=500)
-        pattern = re.compile(r"celcoin", re.IGNORECASE) if is_celcoin else re.compile(r"qitech", re.IGNORECASE)
-        menu.get_by_text(pattern).first.click(no_wait_after=True, timeout=800)
-        return True
-    except Exception:
-        pass
-    try:
-        pattern = re.compile(r"celcoin", re.IGNORECASE) if is_celcoin else re.compile(r"qitech", re.IGNORECASE)
-        form.get_by_text(pattern).first.click(no_wait_after=True, timeout=800)
-        return True
-    except Exception:
-        pass
-    return False
+        except Exception:
+            return False
+    return conferido
+
+
+# Ordem original (fallback quando não há histórico); estrategias.tentar_em_ordem reordena pelo que já funcionou
+_ESTRATEGIAS_BANCO = [
+    ("select_nativo", _banco_select_nativo),
+    ("combobox", _banco_combobox),
+    ("texto_pagina", _banco_texto_pagina),
+    ("select_js", _banco_select_js),
+    ("select_label_config", _banco_select_label_config),
+    ("campo_rotulado", _banco_campo_rotulado),
+    ("gatilho_celcoin", _banco_gatilho_celcoin),
+    ("opcao_role", _banco_opcao_role),
+    ("menu", _banco_menu),
+    ("texto_form", _banco_texto_form),
+]
+
+
+def selecionar_banco(pg: Page, banco: str) -> bool:
+    """Seleciona QiTech/Celcoin no formulário. As estratégias são tentadas na ordem aprendida (grupo "banco:<alvo>"):
+    a que venceu nos clientes anteriores vai primeiro, e as que só falham param de custar timeout a cada CPF.
+    Cada estratégia só conta como sucesso depois de `_banco_selecionado` conferir o banco mostrado no formulário."""
+    alvo = "celcoin" if "celcoin" in (banco or "").lower() else "qitech"
+    tentativas = [(nome, (lambda fn=fn: fn(pg, alvo))) for nome, fn in _ESTRATEGIAS_BANCO]
+    return estrategias.tentar_em_ordem("banco:" + alvo, tentativas, verificar=lambda: _banco_selecionado(pg, alvo)) is not None
 
 
 def historico_tem_linha_sucesso_cpf(page: Page, cpf_site: str) -> bool:
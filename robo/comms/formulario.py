@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import re
+from typing import Dict
+
+from playwright.sync_api import Locator, Page  # type: ignore[import-untyped]
+
+import config
+from robo.comms import fluxo_consulta
+from robo.passivos import perfil_timeouts
+
+_FORMULARIOS: Dict[int, "FormularioConsulta"] = {}
+
+# Acha o campo CPF, o botão "Consultar saldo" e (se houver) o <select> de banco numa única passada e marca cada um
+# com data-robo-form. Devolve null enquanto o campo ou o botão não estiverem visíveis (serve de predicado do wait_for_function).
+_JS_RESOLVER = """({rotulo, placeholder, idBotao, textoBotao}) => {
+    const visivel = (el) => !!el && el.getClientRects().length > 0;
+    const norm = (s) => (s || '').replace(/[\\s*:]+$/, '').trim().toLowerCase();
+    let campo = null;
+    for (const lb of document.querySelectorAll('label')) {
+        if (norm(lb.innerText) !== norm(rotulo)) continue;
+        const alvo = lb.control || (lb.htmlFor ? document.getElementById(lb.htmlFor) : null) || lb.querySelector('input');
+        if (visivel(alvo)) { campo = alvo; break; }
+    }
+    if (!campo) {
+        campo = Array.from(document.querySelectorAll('input')).find((el) => visivel(el) && (
+            norm(el.getAttribute('aria-label')) === norm(rotulo) || el.getAttribute('placeholder') === placeholder
+            || el.name === 'cpf' || (el.id || '').includes('cpf'))) || null;
+    }
+    let botao = idBotao ? document.getElementById(idBotao) : null;
+    if (!visivel(botao)) {
+        const re = /consultar\\s*saldo/i;
+        botao = Array.from(document.querySelectorAll("button, [role='button'], input[type='submit']")).find((b) => visivel(b) && (
+            norm(b.innerText || b.value) === norm(textoBotao) || re.test(b.innerText || b.value || ''))) || null;
+    }
+    if (!campo || !botao) return null;
+    const banco = Array.from(document.querySelectorAll('form select')).find((s) => visivel(s)
+        && Array.from(s.options).some((o) => /qi\\s*tech|celcoin/i.test(o.text))) || null;
+    document.querySelectorAll('[data-robo-form]').forEach((el) => el.removeAttribute('data-robo-form'));
+    campo.setAttribute('data-robo-form', 'cpf');
+    botao.setAttribute('data-robo-form', 'consultar');
+    if (banco) banco.setAttribute('data-robo-form', 'banco');
+    return {banco: !!banco};
+}"""
+
+# Confirma o preenchimento: dispara input/change/blur (máscara e validação do front) e devolve o valor final do campo.
+_JS_CONFIRMAR_CPF = """(el) => {
+    for (const tipo of ['input', 'change', 'blur']) el.dispatchEvent(new Event(tipo, { bubbles: true }));
+    return el.value || '';
+}"""
+
+# Mesmo fallback de garantir_cpf_preenchido quando o fill falha, pelo setter nativo (campos controlados pelo framework).
+_JS_ESCREVER_CPF = """(el, val) => {
+    const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    setter.call(el, val);
+    for (const tipo of ['input', 'change', 'blur']) el.dispatchEvent(new Event(tipo, { bubbles: true }));
+    return el.value || '';
+}"""
+
+# Seleciona no <select> marcado a opção do banco (QiTech/Celcoin) e devolve se ficou selecionada.
+_JS_SELECIONAR_BANCO = """(sel, isQ) => {
+    const re = isQ ? /qi\\s*tech/i : /celcoin/i;
+    const opt = Array.from(sel.options).find((o) => re.test(o.text));
+    if (!opt) return false;
+    if (sel.value !== opt.value) {
+        Object.getOwnPropertyDescriptor(HTMLSelectElement.prototype, 'value').set.call(sel, opt.value);
+        sel.dispatchEvent(new Event('input', { bubbles: true }));
+        sel.dispatchEvent(new Event('change', { bubbles: true }));
+    }
+    return sel.value === opt.value;
+}"""
+
+
+def _digitos(valor: str) -> str:
+    return re.sub(r"\D", "", valor or "")
+
+
+class FormularioConsulta:
+    """Formulário de consulta de uma aba (campo CPF, seletor de banco e botão "Consultar saldo"). Os elementos são
+    achados uma vez por carregamento de página (`_JS_RESOLVER`, marca `data-robo-form`) e depois usados por seletor
+    direto, sem as cadeias de `.or_()`. Uma navegação do frame principal (goto, reload, troca de rota do SPA) aumenta
+    `geracao` e força nova resolução; se o front redesenhar o formulário sem navegar, a ação falha uma vez e também
+    resolve de novo."""
+
+    def __init__(self, page: Page) -> None:
+        self.page = page
+        self.geracao = 0
+        self._geracao_resolvida = -1
+        self._tem_select_banco = False
+        try:
+            page.on("framenavigated", self._ao_navegar)
+        except Exception:
+            pass
+
+    def _ao_navegar(self, frame) -> None:
+        if frame == self.page.main_frame:
+            self.geracao += 1
+
+    def invalidar(self) -> None:
+        self._geracao_resolvida = -1
+
+    def resolver(self, forcar: bool = False, timeout_ms: int | None = None) -> None:
+        """Espera o formulário aparecer e marca os elementos (nada a fazer se já resolvido nesta geração).
+        Levanta o TimeoutError do Playwright se o campo ou o botão não aparecerem."""
+        if not forcar and self._geracao_resolvida == self.geracao:
+            return
+        geracao = self.geracao
+        alvo = {
+            "rotulo": config.UI_LABEL_CPF,
+            "placeholder": config.UI_PLACEHOLDER_CPF,
+            "idBotao": getattr(config, "UI_ID_BOTAO_CONSULTAR_SALDO", ""),
+            "textoBotao": config.UI_BOTAO_CONSULTAR_SALDO,
+        }
+        if timeout_ms is None:
+            resultado = perfil_timeouts.esperar(
+                "TIMEOUT_FORM_CONSULTA_MS", lambda t: self.page.wait_for_function(_JS_RESOLVER, arg=alvo, timeout=t, polling=100).json_value()
+            )
+        else:
+            resultado = self.page.wait_for_function(_JS_RESOLVER, arg=alvo, timeout=timeout_ms, polling=100).json_value()
+        self._tem_select_banco = bool((resultado or {}).get("banco"))
+        self._geracao_resolvida = geracao
+
+    @property
+    def campo_cpf(self) -> Locator:
+        self.resolver()
+        return self.page.locator("[data-robo-form='cpf']")
+
+    @property
+    def botao_consultar(self) -> Locator:
+        self.resolver()
+        return self.page.locator("[data-robo-form='consultar']")
+
+    def _escrever(self, cpf_site: str) -> str:
+        """Um fill e um evaluate de confirmação; valor final do campo. Se o fill falhar (campo redesenhado, que some
+        da marcação, ou que recusa o fill), resolve o formulário de novo e escreve pelo setter nativo, com o mesmo
+        timeout curto: o evaluate não fica esperando o timeout padrão por um elemento que não existe mais."""
+        limite = getattr(config, "TIMEOUT_ACAO_FORMULARIO_MS", 3000)
+        try:
+            campo = self.campo_cpf
+            campo.fill(cpf_site, timeout=limite)
+            return campo.evaluate(_JS_CONFIRMAR_CPF, timeout=limite)
+        except Exception:
+            self.resolver(forcar=True)
+            return self.campo_cpf.evaluate(_JS_ESCREVER_CPF, cpf_site, timeout=limite)
+
+    def preencher_cpf(self, cpf_site: str) -> bool:
+        """Preenche o CPF e confere os dígitos no mesmo passo. Só reescreve se o valor não bater (uma vez, após
+        resolver de novo, cobrindo o formulário redesenhado sem navegação). Devolve se o campo ficou com o CPF."""
+        for tentativa in range(2):
+            try:
+                if _digitos(self._escrever(cpf_site)) == _digitos(cpf_site):
+                    return True
+            except Exception:
+                if tentativa:
+                    return False
+            self.invalidar()
+        return False
+
+    def cpf_confere(self, cpf_site: str) -> bool:
+        try:
+            return _digitos(self.campo_cpf.input_value(timeout=1000)) == _digitos(cpf_site)
+        except Exception:
+            return False
+
+    def selecionar_banco(self, banco: str) -> bool:
+        """Com <select> de banco marcado, seleciona por um evaluate; senão (ou se falhar), `fluxo_consulta.selecionar_banco`
+        com as estratégias aprendidas."""
+        try:
+            self.resolver()
+            if self._tem_select_banco and self.page.locator("[data-robo-form='banco']").evaluate(_JS_SELECIONAR_BANCO, "celcoin" not in (banco or "").lower()):
+                return True
+        except Exception:
+            pass
+        return fluxo_consulta.selecionar_banco(self.page, banco)
+
+    def consultar(self, cpf_site: str | None = None, force: bool = True) -> bool:
+        """Clica "Consultar saldo". Com `cpf_site`, antes confere o campo (uma leitura) e só preenche de novo se
+        ele tiver mudado, por exemplo depois do atalho pelo histórico. False, sem clicar, se o CPF não ficou no campo."""
+        if cpf_site is not None and not self.cpf_confere(cpf_site) and not self.preencher_cpf(cpf_site):
+            return False
+        try:
+            self.botao_consultar.click(force=force, timeout=getattr(config, "TIMEOUT_ACAO_FORMULARIO_MS", 3000))
+        except Exception:
+            self.invalidar()
+            self.botao_consultar.click(force=force)
+        return True
+
+
+def obter_formulario(page: Page) -> FormularioConsulta:
+    """Controlador do formulário da aba (criado na primeira chamada, descartado quando a aba fecha)."""
+    formulario = _FORMULARIOS.get(id(page))
+    if formulario is None or formulario.page is not page:
+        formulario = FormularioConsulta(page)
+        _FORMULARIOS[id(page)] = formulario
+
+        def _descartar(_p) -> None:
+            _FORMULARIOS.pop(id(page), None)
+
+        try:
+            page.on("close", _descartar)
+        except Exception:
+            pass
+    return formulario
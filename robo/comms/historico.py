@@ -4,11 +4,14 @@ import re
 from typing import TYPE_CHECKING, Callable, List, Optional, Tuple, cast
 
 import config
+from robo.passivos import perfil_timeouts
 from robo.passivos.csv_io import log_critico
+from robo.comms import esperas, estrategias, indice_historico, rede
 from robo.passivos.modelos import Cliente
 
 if TYPE_CHECKING:
     from playwright.sync_api import Locator, Page
+    from robo.passivos.saida import SaidaResultados
 
 
 def _get_page(loc_or_page: "Page | Locator") -> "Page | None":
@@ -131,7 +134,7 @@ def _abrir_tabela_clique_e_enter(escopo: "Page | Locator", pagina_ui: "Page | Lo
             el = bloco_tabela.get_by_text(ph, exact=True).first
             if el.count() > 0 and el.is_visible():
                 el.click(timeout=2000)
-                page.wait_for_timeout(200)
+                esperas.pausa_transicao(page, 200)
                 page.keyboard.press("Enter")
                 return True
     except Exception:
@@ -140,7 +143,7 @@ def _abrir_tabela_clique_e_enter(escopo: "Page | Locator", pagina_ui: "Page | Lo
         el = escopo.get_by_text(ph, exact=True).first
         if el.count() > 0 and el.is_visible():
             el.click(timeout=2000)
-            page.wait_for_timeout(200)
+            esperas.pausa_transicao(page, 200)
             page.keyboard.press("Enter")
             return True
     except Exception:
@@ -151,7 +154,7 @@ def _abrir_tabela_clique_e_enter(escopo: "Page | Locator", pagina_ui: "Page | Lo
             el = escopo.locator(locator_custom).first
             if el.count() > 0 and el.is_visible():
                 el.click(timeout=2000)
-                page.wait_for_timeout(200)
+                esperas.pausa_transicao(page, 200)
                 page.keyboard.press("Enter")
                 return True
         except Exception:
@@ -159,6 +162,76 @@ def _abrir_tabela_clique_e_enter(escopo: "Page | Locator", pagina_ui: "Page | Lo
     return False
 
 
+_JS_LOCALIZAR_LINHA = r"""
+({cpfs, banco, marca, textos}) => {
+    const norm = (t) => (t || '').toLowerCase().replace(/[^a-z0-9]/g, '');
+    const bancoN = norm(banco);
+    const visivel = (el) => el.getClientRects().length > 0;
+    const casa = (el) => {
+        const t = el.innerText || '';
+        return cpfs.some(c => c && t.includes(c)) && (!bancoN || norm(t).includes(bancoN));
+    };
+    const grupos = ["tr", "[role='row']", "[data-testid*='row']", "[class*='row']", "li", "div"];
+    // uma passada pelos nós de texto: só os que têm o CPF sobem até a linha (o ancestral mais próximo de cada grupo
+    // que também tem o banco). Vale o grupo mais específico e, dentro dele, o primeiro do DOM (a linha mais recente).
+    let achado = null;
+    let melhor = grupos.length;
+    const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT);
+    for (let no = walker.nextNode(); no && melhor > 0; no = walker.nextNode()) {
+        const texto = no.nodeValue || '';
+        if (!cpfs.some(c => c && texto.includes(c))) continue;
+        const el = no.parentElement;
+        if (!el) continue;
+        for (let i = 0; i < melhor; i++) {
+            let linha = el.closest(grupos[i]);
+            while (linha && !casa(linha)) linha = linha.parentElement ? linha.parentElement.closest(grupos[i]) : null;
+            if (linha && visivel(linha)) { achado = linha; melhor = i; break; }
+        }
+    }
+    if (achado === null) return null;
+    for (const el of document.querySelectorAll('[data-robo-linha="' + marca + '"]')) el.removeAttribute('data-robo-linha');
+    achado.setAttribute('data-robo-linha', marca);
+    const texto = achado.innerText || '';
+    const tem = (t) => t && texto.toLowerCase().includes(t.toLowerCase());
+    const status = tem(textos.erro) ? 'erro' : textos.processando.some(tem) ? 'processando' : tem(textos.sucesso) ? 'sucesso' : '';
+    let ver = null;
+    for (const b of achado.querySelectorAll("button, a, [role='button']")) {
+        if (/ver\s*resultado/i.test(b.innerText || '') && visivel(b)) {
+            const r = b.getBoundingClientRect();
+            ver = {x: r.x + r.width / 2, y: r.y + r.height / 2};
+            break;
+        }
+    }
+    return {status, texto: texto.replace(/\s+/g, ' ').trim().slice(0, 300), ver_resultado: ver};
+}
+"""
+
+
+def localizar_linha_historico(pagina_consulta: "Page", cpf_site: str, cpf: str, banco_atual: str, timeout_ms: int) -> dict | None:
+    """Procura a linha do histórico do CPF (com ou sem máscara) e banco numa única varredura dentro da página, repetida
+    até a linha aparecer ou `timeout_ms` acabar. Percorre os nós de texto uma vez e, de cada um com o CPF, sobe até o ancestral
+    mais próximo de cada grupo (tr, [role=row], ..., div) que também tenha o banco; prefere tr/[role=row] e, no mesmo grupo,
+    vale o primeiro do DOM (a linha mais recente, como o antigo `.first`). A linha recebe o atributo data-robo-linha, e o Locator devolvido aponta só para ela.
+    Devolve {"linha", "status" ("erro" | "processando" | "sucesso" | ""), "texto", "ver_resultado" ({"x", "y"} ou None)}."""
+    marca = re.sub(r"[^a-z0-9]", "", f"{cpf}{banco_atual}".lower()) or "linha"
+    textos = {
+        "erro": config.UI_TEXTO_ERRO_NA_CONSULTA,
+        "processando": [t for t in (getattr(config, "UI_TEXTO_PROCESSANDO", "Processando"), getattr(config, "UI_TEXTO_PROCESSANDO_ALT", "")) if t],
+        "sucesso": config.UI_TEXTO_SUCESSO,
+    }
+    arg = {"cpfs": [c for c in (cpf_site, cpf) if c], "banco": banco_atual or "", "marca": marca, "textos": textos}
+    try:
+        handle = pagina_consulta.wait_for_function(_JS_LOCALIZAR_LINHA, arg=arg, timeout=max(1, timeout_ms), polling=150)
+        dados = handle.json_value()
+        handle.dispose()
+    except Exception:
+        return None
+    if not isinstance(dados, dict):
+        return None
+    dados["linha"] = pagina_consulta.locator(f"[data-robo-linha='{marca}']").first
+    return dados
+
+
 def buscar_linha_historico(
     pagina_consulta: "Page",
     cpf_site: str,
@@ -167,61 +240,148 @@ def buscar_linha_historico(
     timeout_por_tentativa: int,
     max_tentativas: int = 2,
     usar_recarregar: bool = False,
+    ponto_timeout: str | None = None,
 ) -> Tuple["Locator | None", List["Locator"]]:
-    cpf_digitos = cliente.cpf
+    """Linha do histórico do CPF/banco via `localizar_linha_historico` (uma varredura por tentativa, que retorna assim
+    que a linha aparece). O segundo item são locadores tr/[role=row] de reserva, usados para relocalizar após Recarregar.
+    Com `ponto_timeout`, cada tentativa usa o perfil de timeouts (teto `timeout_por_tentativa`)."""
     if banco_atual:
         locadores_linha = [
-            pagina_consulta.locator(f"tr:has-text('{cpf_digitos}'):has-text('{banco_atual}')").first,
-            pagina_consulta.locator(f"[role='row']:has-text('{cpf_digitos}'):has-text('{banco_atual}')").first,
             pagina_consulta.locator(f"tr:has-text('{cpf_site}'):has-text('{banco_atual}')").first,
             pagina_consulta.locator(f"[role='row']:has-text('{cpf_site}'):has-text('{banco_atual}')").first,
-            pagina_consulta.locator(f"div:has-text('{cpf_site}'):has-text('{banco_atual}')").first,
-            pagina_consulta.locator("tr, [role='row'], div").filter(has_text=re.compile(re.escape(cpf_site))).filter(has_text=re.compile(re.escape(banco_atual), re.I)).first,
-            pagina_consulta.locator(f"[class*='row']:has-text('{cpf_site}'):has-text('{banco_atual}')").first,
-            pagina_consulta.locator(f"[data-testid*='row']:has-text('{cpf_site}')").first,
         ]
     else:
         locadores_linha = [
-            pagina_consulta.locator(f"tr:has-text('{cliente.cpf}')").first,
             pagina_consulta.locator(f"tr:has-text('{cpf_site}')").first,
             pagina_consulta.locator(f"[role='row']:has-text('{cpf_site}')").first,
-            pagina_consulta.locator(f"li:has-text('{cpf_site}')").first,
-            pagina_consulta.locator(f"div:has-text('{cpf_site}')").first,
-            pagina_consulta.locator("tr, [role='row'], li, div").filter(has=pagina_consulta.get_by_text(cpf_site, exact=False)).filter(has=pagina_consulta.get_by_role("button", name=config.UI_BOTAO_VER_RESULTADO)).first,
         ]
-    linha_cpf = None
     for tentativa in range(max_tentativas):
-        for loc in locadores_linha:
-            try:
-                loc.wait_for(state="visible", timeout=timeout_por_tentativa)
-                linha_cpf = loc
-                break
-            except Exception:
-                pass
-        if linha_cpf is not None:
-            break
+        if ponto_timeout:
+            achado = perfil_timeouts.esperar(
+                ponto_timeout, lambda t: localizar_linha_historico(pagina_consulta, cpf_site, cliente.cpf, banco_atual, t), timeout_por_tentativa, acertou=lambda r: r is not None
+            )
+        else:
+            achado = localizar_linha_historico(pagina_consulta, cpf_site, cliente.cpf, banco_atual, timeout_por_tentativa)
+        if achado is not None:
+            return (achado["linha"], locadores_linha)
         if tentativa < max_tentativas - 1:
             pagina_consulta.wait_for_timeout(500)
-    if linha_cpf is None and usar_recarregar:
+    if usar_recarregar:
         try:
             pagina_consulta.get_by_role("button", name=config.UI_BOTAO_RECARREGAR).first.click(timeout=5000)
             pagina_consulta.wait_for_load_state("domcontentloaded", timeout=10000)
             pagina_consulta.wait_for_timeout(config.PAUSA_APOS_RECARREGAR_MS)
-            for tentativa2 in range(max_tentativas):
-                for loc in locadores_linha:
-                    try:
-                        loc.wait_for(state="visible", timeout=timeout_por_tentativa)
-                        linha_cpf = loc
-                        break
-                    except Exception:
-                        pass
-                if linha_cpf is not None:
-                    break
-                if tentativa2 < max_tentativas - 1:
-                    pagina_consulta.wait_for_timeout(500)
+            achado = localizar_linha_historico(pagina_consulta, cpf_site, cliente.cpf, banco_atual, timeout_por_tentativa * max_tentativas)
+            if achado is not None:
+                return (achado["linha"], locadores_linha)
+        except Exception:
+            pass
+    return (None, locadores_linha)
+
+
+def ler_status_linha_historico(linha_cpf: "Locator", cpf: str = "", banco: str = "") -> str:
+    """Status da linha do histórico: "erro", "processando" ou "sucesso" (sem texto conhecido conta como processando).
+    Com `cpf` e `banco`, usa primeiro o status recebido pela rede (`rede.ColetorRespostas`) e só lê o DOM se não houver."""
+    if cpf and banco:
+        coletor = rede.obter_coletor(_get_page(linha_cpf))
+        st_rede = coletor.status(cpf, banco) if coletor else None
+        if st_rede:
+            return st_rede
+    try:
+        if linha_cpf.get_by_text(config.UI_TEXTO_ERRO_NA_CONSULTA, exact=False).first.is_visible():
+            return "erro"
+    except Exception:
+        pass
+    for texto_proc in (getattr(config, "UI_TEXTO_PROCESSANDO", "Processando"), getattr(config, "UI_TEXTO_PROCESSANDO_ALT", "")):
+        try:
+            if texto_proc and linha_cpf.get_by_text(texto_proc, exact=False).first.is_visible():
+                return "processando"
         except Exception:
             pass
-    return (linha_cpf, locadores_linha)
+    try:
+        if linha_cpf.get_by_text(config.UI_TEXTO_SUCESSO, exact=False).first.is_visible():
+            return "sucesso"
+    except Exception:
+        pass
+    return "processando"
+
+
+_JS_STATUS_MUDOU = """([el, textos]) => !el.isConnected || !textos.some(t => (el.innerText || '').includes(t))"""
+
+
+def _aguardar_status_sair_de_processando(pagina_consulta: "Page", linha_cpf: "Locator", espera_ms: int) -> bool:
+    """Observa a linha dentro da página e retorna assim que o texto de Processando some (ou a linha é re-renderizada).
+    False quando o prazo `espera_ms` acaba sem mudança."""
+    textos = [t for t in (getattr(config, "UI_TEXTO_PROCESSANDO", "Processando"), getattr(config, "UI_TEXTO_PROCESSANDO_ALT", "")) if t]
+    try:
+        handle = linha_cpf.element_handle(timeout=1000)
+    except Exception:
+        return False
+    try:
+        pagina_consulta.wait_for_function(_JS_STATUS_MUDOU, arg=[handle, textos], timeout=max(1, espera_ms))
+        return True
+    except Exception:
+        return False
+    finally:
+        try:
+            handle.dispose()
+        except Exception:
+            pass
+
+
+def _relocalizar_linha(pagina_consulta: "Page", locadores_linha: List["Locator"], cpf_site: str, cpf: str, banco_atual: str, timeout_ms: int) -> "Locator | None":
+    """Depois do Recarregar (a marca data-robo-linha some com a re-renderização): nova varredura única na página;
+    os locadores de reserva só são conferidos com prazo curto se ela não achar."""
+    achado = localizar_linha_historico(pagina_consulta, cpf_site, cpf, banco_atual, timeout_ms)
+    if achado is not None:
+        return achado["linha"]
+    for loc in locadores_linha:
+        try:
+            loc.wait_for(state="visible", timeout=300)
+            return loc
+        except Exception:
+            pass
+    return None
+
+
+def aguardar_status_historico(
+    pagina_consulta: "Page",
+    linha_cpf: "Locator",
+    locadores_linha: List["Locator"],
+    cpf_site: str,
+    cliente: Cliente,
+    banco_atual: str,
+    timeout_linha_ms: int,
+) -> Tuple[str, "Locator | None"]:
+    """Espera a linha do histórico sair de Processando. Entre um Recarregar e outro observa a linha na própria
+    página (retorna assim que o status muda) por um prazo que cresce de PAUSA_APOS_RECARREGAR_MS até
+    PAUSA_MAX_ESPERA_HISTORICO_MS; no máximo MAX_RECARREGAR_PROCESSANDO recargas.
+    Devolve ("sucesso" | "erro" | "processando_timeout" | "linha_nao_encontrada", linha)."""
+    max_recarregar = getattr(config, "MAX_RECARREGAR_PROCESSANDO", 15)
+    espera_ms = getattr(config, "PAUSA_APOS_RECARREGAR_MS", 800)
+    espera_max_ms = getattr(config, "PAUSA_MAX_ESPERA_HISTORICO_MS", 4000)
+    linha: "Locator" = linha_cpf
+    for tentativa in range(max_recarregar + 1):
+        st = ler_status_linha_historico(linha, cliente.cpf, banco_atual)
+        if st != "processando":
+            return (st, linha)
+        if _aguardar_status_sair_de_processando(pagina_consulta, linha, espera_ms):
+            st = ler_status_linha_historico(linha, cliente.cpf, banco_atual)
+            if st != "processando":
+                return (st, linha)
+        espera_ms = min(espera_ms * 2, espera_max_ms)
+        if tentativa >= max_recarregar:
+            break
+        try:
+            pagina_consulta.get_by_role("button", name=config.UI_BOTAO_RECARREGAR).first.click(timeout=5000)
+            pagina_consulta.wait_for_load_state("domcontentloaded", timeout=10000)
+        except Exception:
+            pass
+        nova_linha = _relocalizar_linha(pagina_consulta, locadores_linha, cpf_site, cliente.cpf, banco_atual, timeout_linha_ms)
+        if nova_linha is None:
+            return ("linha_nao_encontrada", None)
+        linha = nova_linha
+    return ("processando_timeout", linha)
 
 
 def abrir_resultado_historico(ctx, btn_ver_resultado, pagina_consulta=None) -> Tuple["Page | None", bool]:
@@ -256,11 +416,13 @@ def abrir_resultado_historico(ctx, btn_ver_resultado, pagina_consulta=None) -> T
 
 
 def extrair_valor_maximo_parcela(pagina: "Page", timeout_ms: int | None = None) -> str:
-    if timeout_ms is None:
-        timeout_ms = config.TIMEOUT_VALOR_MAX_MS
+    """Sem `timeout_ms`, a espera usa o perfil de timeouts (ponto TIMEOUT_VALOR_MAX_MS)."""
     try:
         bloco_valor = pagina.get_by_text(config.UI_TEXTO_VALOR_MAXIMO_PARCELA, exact=False).first
-        bloco_valor.wait_for(state="visible", timeout=timeout_ms)
+        if timeout_ms is None:
+            perfil_timeouts.esperar("TIMEOUT_VALOR_MAX_MS", lambda t: bloco_valor.wait_for(state="visible", timeout=t))
+        else:
+            bloco_valor.wait_for(state="visible", timeout=timeout_ms)
         texto = bloco_valor.evaluate("el => el.closest('div')?.innerText || el.parentElement?.innerText || ''")
         match = re.search(r"[\d.,]+", texto.replace("R$", "").strip())
         return match.group(0).replace(".", "").replace(",", ".") if match else ""
@@ -273,7 +435,7 @@ def tratar_recusa_ou_requisicao_mal_formatada(
     page: "Page",
     cliente: Cliente,
     banco_atual: str,
-    lista_saida: list,
+    lista_saida: "SaidaResultados",
 ) -> Tuple[bool, str]:
     from robo.comms import navegacao
     texto_recusa = getattr(config, "UI_TEXTO_RECUSA_POLITICA_BANCO", "")
@@ -508,6 +670,26 @@ def _clicar_tabela_via_js_pagina(pagina: "Page | Locator") -> bool:
         return False
 
 
+def _clicar_locator_tabela_custom(escopo: "Page | Locator", pagina_ui: "Page | Locator") -> bool:
+    """Clique forçado no seletor de config.LOCATOR_TABELA_DROPDOWN (no escopo; se falhar, na página inteira)."""
+    seletor = getattr(config, "LOCATOR_TABELA_DROPDOWN", None)
+    if not seletor or not isinstance(seletor, str):
+        return False
+    try:
+        el = escopo.locator(seletor).first
+        if el.count() > 0:
+            el.scroll_into_view_if_needed(timeout=2000)
+            el.click(force=True, timeout=2000)
+            return True
+    except Exception:
+        pass
+    try:
+        pagina_ui.locator(seletor).first.click(force=True, timeout=2000)
+        return True
+    except Exception:
+        return False
+
+
 def _obter_escopo_simulacao(escopo: "Page | Locator") -> "Page | Locator":
     """Prioriza bloco Vue (tr.expanded-row > .simulation/.simulation-table); fallback por texto."""
     try:
@@ -547,38 +729,18 @@ def _obter_escopo_simulacao(escopo: "Page | Locator") -> "Page | Locator":
     return escopo
 
 
-def simular_tabelas(
+def _escolher_prazo(
     escopo: "Page | Locator",
-    valor_maximo_parcela: str,
-    cliente: Cliente,
+    pagina_ui: "Page | Locator",
+    pagina_resultado: "Page | None",
+    _meses: int,
+    label_tabela: str,
     banco_atual: str,
-    lista_saida: list,
-    pagina_resultado: "Page | None" = None,
     on_abrir_tabela: Optional[Callable[[bool, str], None]] = None,
-) -> tuple[bool, bool]:
-    """
-    Para cada mês (6, 12, 18, 24) de baixo para cima: abre o dropdown Tabela, escolhe o mês, clica Simular e grava; ao final grava "Limite de opções de meses alcançado".
-    Ordem: _abrir_tabela_clique_e_enter, _disparar_clique_real_tabela, LOCATOR_TABELA_DROPDOWN, _abrir_tabela_por_teclado,
-    _clicar_tabela_via_js, _clicar_tabela_via_js_pagina. Só considera aberto se opções ficarem visíveis (timeout 800 ms).
-    """
-    pagina_ui: "Page | Locator" = pagina_resultado if pagina_resultado is not None else escopo
-    timeout_bloco = getattr(config, "TIMEOUT_ESPERA_BLOCO_SIMULACAO_MS", 10000)
-    try:
-        escopo.locator(".simulation, .simulation-table, tr.expanded-row").first.wait_for(state="visible", timeout=timeout_bloco)
-    except Exception:
-        try:
-            escopo.get_by_text(config.UI_TEXTO_VALOR_MAXIMO_PARCELA, exact=False).first.wait_for(state="visible", timeout=timeout_bloco)
-        except Exception:
-            pass
-    escopo = _obter_escopo_simulacao(escopo)
-    meses_array = [6, 12, 18, 24]
-    labels_celcoin = ["6 meses (C)", "12 meses (C)", "18 meses (C)", "24 meses (C)"]
-    labels_qitech = ["6 meses", "12 meses", "18 meses", "24 meses"]
-    is_celcoin = "celcoin" in (banco_atual or "").lower()
-    opcoes_com_meses = [
-        (meses_array[i], labels_celcoin[i] if is_celcoin else labels_qitech[i])
-        for i in range(len(meses_array))
-    ]
+) -> bool:
+    """Abre o dropdown Tabela e escolhe o prazo. Primeiro o select nativo; depois as aberturas do dropdown
+    (_abrir_tabela_clique_e_enter, _disparar_clique_real_tabela, LOCATOR_TABELA_DROPDOWN, _abrir_tabela_por_teclado,
+    _clicar_tabela_via_js, _clicar_tabela_via_js_pagina) na ordem aprendida pelo registro de estratégias ("tabela")."""
     variantes_por_mes = getattr(config, "UI_TABELA_VARIANTES_MESES", None)
     if variantes_por_mes is None:
         variantes_por_mes = {6: ["6 meses (C)", "6 meses"], 12: ["12 meses (C)", "12 meses"], 18: ["18 meses (C)", "18 meses"], 24: ["24 meses (C)", "24 meses"]}
@@ -586,325 +748,490 @@ def simular_tabelas(
     timeout_opcao = getattr(config, "TIMEOUT_OPCAO_TABELA_MS", 2500)
     timeout_validacao_ms = getattr(config, "TIMEOUT_VALIDACAO_OPCOES_TABELA_MS", 800)
     timeout_opcoes_visiveis = min(1500, timeout_opcao)
-    gravou_alguma = False
-    alguma_vez_opcao_clicada = False
-    for _meses, label_tabela in opcoes_com_meses:
-        linha_status = "falha_simulacao"
-        valor_liberado = ""
-        valor_parcela = ""
-        valor_total = ""
-        qtd_parcelas = str(_meses)
-        erro_linha = ""
-        trigger_aberto = False
-        opcao_clicada = False
+    trigger_aberto = False
+    opcao_clicada = False
+
+    if _selecionar_tabela_select_nativo(escopo, _meses, label_tabela, timeout_opcao, banco_atual):
+        opcao_clicada = True
+    if not opcao_clicada:
+        def abriu(disparou: bool) -> bool:
+            if not disparou:
+                return False
+            esperas.pausa_transicao(pagina_ui, 250)
+            return _opcoes_dropdown_visiveis(pagina_ui, label_tabela, timeout_validacao_ms)
+
+        tentativas: List[Tuple[str, Callable[[], bool]]] = [
+            ("clique_e_enter", lambda: abriu(_abrir_tabela_clique_e_enter(escopo, pagina_ui))),
+            ("disparar_clique_real_escopo", lambda: abriu(_disparar_clique_real_tabela(escopo))),
+        ]
+        if pagina_resultado is not None:
+            tentativas.append(("disparar_clique_real_pagina", lambda: abriu(_disparar_clique_real_tabela(pagina_resultado))))
+        if isinstance(getattr(config, "LOCATOR_TABELA_DROPDOWN", None), str):
+            tentativas.append(("locator_custom", lambda: abriu(_clicar_locator_tabela_custom(escopo, pagina_ui))))
+        tentativas.append(("teclado", lambda: abriu(_abrir_tabela_por_teclado(pagina_ui, escopo))))
+        tentativas.append(("clicar_js_escopo", lambda: abriu(_clicar_tabela_via_js(escopo))))
+        if pagina_resultado is not None:
+            tentativas.append(("clicar_js_pagina", lambda: abriu(_clicar_tabela_via_js_pagina(pagina_resultado))))
+        metodo = estrategias.tentar_em_ordem("tabela:" + ("celcoin" if "celcoin" in (banco_atual or "").lower() else "qitech"), tentativas)
+        if metodo is not None:
+            trigger_aberto = True
+            if on_abrir_tabela:
+                on_abrir_tabela(True, metodo)
+            if getattr(config, "DEBUG_TABELA", False):
+                print("[DEBUG_TABELA] aberta=True metodo=" + metodo)
+        if not trigger_aberto:
+            if on_abrir_tabela:
+                on_abrir_tabela(False, "nenhum_metodo_abriu")
+            if getattr(config, "DEBUG_TABELA", False):
+                print("[DEBUG_TABELA] aberta=False metodo=nenhum_metodo_abriu")
+            return False
+        esperas.pausa_transicao(pagina_ui, pausa_dropdown)
+        opcoes_visiveis = False
         try:
-            wait_fn = getattr(pagina_ui, "wait_for_timeout", None)
-            if _selecionar_tabela_select_nativo(escopo, _meses, label_tabela, timeout_opcao, banco_atual):
-                opcao_clicada = True
-            if not opcao_clicada:
-                if _abrir_tabela_clique_e_enter(escopo, pagina_ui):
-                    if wait_fn:
-                        wait_fn(250)
-                    if _opcoes_dropdown_visiveis(pagina_ui, label_tabela, timeout_validacao_ms):
-                        trigger_aberto = True
-                        if on_abrir_tabela:
-                            on_abrir_tabela(True, "clique_e_enter")
-                        if getattr(config, "DEBUG_TABELA", False):
-                            print("[DEBUG_TABELA] aberta=True metodo=clique_e_enter")
-                if not trigger_aberto and _disparar_clique_real_tabela(escopo):
-                    if wait_fn:
-                        wait_fn(250)
-                    if _opcoes_dropdown_visiveis(pagina_ui, label_tabela, timeout_validacao_ms):
-                        trigger_aberto = True
-                        if on_abrir_tabela:
-                            on_abrir_tabela(True, "disparar_clique_real_escopo")
-                        if getattr(config, "DEBUG_TABELA", False):
-                            print("[DEBUG_TABELA] aberta=True metodo=disparar_clique_real_escopo")
-                if not trigger_aberto and pagina_resultado is not None and _disparar_clique_real_tabela(pagina_resultado):
-                    if wait_fn:
-                        wait_fn(250)
-                    if _opcoes_dropdown_visiveis(pagina_ui, label_tabela, timeout_validacao_ms):
-                        trigger_aberto = True
-                        if on_abrir_tabela:
-                            on_abrir_tabela(True, "disparar_clique_real_pagina")
-                        if getattr(config, "DEBUG_TABELA", False):
-                            print("[DEBUG_TABELA] aberta=True metodo=disparar_clique_real_pagina")
-                locator_tabela_custom = getattr(config, "LOCATOR_TABELA_DROPDOWN", None)
-                if not trigger_aberto and locator_tabela_custom and isinstance(locator_tabela_custom, str):
-                    try:
-                        el = escopo.locator(locator_tabela_custom).first
-                        if el.count() > 0:
-                            el.scroll_into_view_if_needed(timeout=2000)
-                            el.click(force=True, timeout=2000)
-                            if wait_fn:
-                                wait_fn(250)
-                            if _opcoes_dropdown_visiveis(pagina_ui, label_tabela, timeout_validacao_ms):
-                                trigger_aberto = True
-                                if on_abrir_tabela:
-                                    on_abrir_tabela(True, "locator_custom")
-                                if getattr(config, "DEBUG_TABELA", False):
-                                    print("[DEBUG_TABELA] aberta=True metodo=locator_custom")
-                    except Exception:
-                        try:
-                            pagina_ui.locator(locator_tabela_custom).first.click(force=True, timeout=2000)
-                            if wait_fn:
-                                wait_fn(250)
-                            if _opcoes_dropdown_visiveis(pagina_ui, label_tabela, timeout_validacao_ms):
-                                trigger_aberto = True
-                                if on_abrir_tabela:
-                                    on_abrir_tabela(True, "locator_custom_pagina")
-                                if getattr(config, "DEBUG_TABELA", False):
-                                    print("[DEBUG_TABELA] aberta=True metodo=locator_custom_pagina")
-                        except Exception:
-                            pass
-                if not trigger_aberto and _abrir_tabela_por_teclado(pagina_ui, escopo):
-                    if wait_fn:
-                        wait_fn(250)
-                    if _opcoes_dropdown_visiveis(pagina_ui, label_tabela, timeout_validacao_ms):
-                        trigger_aberto = True
-                        if on_abrir_tabela:
-                            on_abrir_tabela(True, "teclado")
-                        if getattr(config, "DEBUG_TABELA", False):
-                            print("[DEBUG_TABELA] aberta=True metodo=teclado")
-                if not trigger_aberto and _clicar_tabela_via_js(escopo):
-                    if wait_fn:
-                        wait_fn(250)
-                    if _opcoes_dropdown_visiveis(pagina_ui, label_tabela, timeout_validacao_ms):
-                        trigger_aberto = True
-                        if on_abrir_tabela:
-                            on_abrir_tabela(True, "clicar_js_escopo")
-                        if getattr(config, "DEBUG_TABELA", False):
-                            print("[DEBUG_TABELA] aberta=True metodo=clicar_js_escopo")
-                if not trigger_aberto and pagina_resultado is not None and _clicar_tabela_via_js_pagina(pagina_resultado):
-                    if wait_fn:
-                        wait_fn(250)
-                    if _opcoes_dropdown_visiveis(pagina_ui, label_tabela, timeout_validacao_ms):
-                        trigger_aberto = True
-                        if on_abrir_tabela:
-                            on_abrir_tabela(True, "clicar_js_pagina")
-                        if getattr(config, "DEBUG_TABELA", False):
-                            print("[DEBUG_TABELA] aberta=True metodo=clicar_js_pagina")
-                if not trigger_aberto:
-                    if on_abrir_tabela:
-                        on_abrir_tabela(False, "nenhum_metodo_abriu")
-                    if getattr(config, "DEBUG_TABELA", False):
-                        print("[DEBUG_TABELA] aberta=False metodo=nenhum_metodo_abriu")
-                    continue
-                if wait_fn:
-                    wait_fn(pausa_dropdown)
-                opcoes_visiveis = False
-                try:
-                    pagina_ui.locator(".vue-portal-target").get_by_text(label_tabela, exact=False).first.wait_for(state="visible", timeout=timeout_opcoes_visiveis)
-                    opcoes_visiveis = True
-                except Exception:
-                    try:
-                        pagina_ui.get_by_role("option").first.wait_for(state="visible", timeout=timeout_opcoes_visiveis)
-                        opcoes_visiveis = True
-                    except Exception:
-                        pass
-                if not opcoes_visiveis:
-                    if on_abrir_tabela:
-                        on_abrir_tabela(False, "opcoes_nao_apareceram")
-                    if getattr(config, "DEBUG_TABELA", False):
-                        print("[DEBUG_TABELA] opcoes_nao_apareceram timeout=" + str(timeout_opcoes_visiveis))
-                    continue
-                opcao_clicada = False
-                labels_tentar = variantes_por_mes.get(_meses, [label_tabela])
-                if label_tabela not in labels_tentar:
-                    labels_tentar = [label_tabela] + list(labels_tentar)
-                for lbl_opcao in labels_tentar:
-                    if opcao_clicada:
-                        break
-                    try:
-                        opt_portal = pagina_ui.locator(".vue-portal-target").get_by_text(lbl_opcao, exact=False).first
-                        if opt_portal.count() > 0 and opt_portal.is_visible():
-                            opt_portal.click(timeout=timeout_opcao)
-                            opcao_clicada = True
-                    except Exception:
-                        pass
-                    if not opcao_clicada:
-                        try:
-                            opt = pagina_ui.get_by_role("option").filter(has_text=re.compile(re.escape(lbl_opcao), re.I)).first
-                            if opt.count() > 0:
-                                opt.wait_for(state="visible", timeout=min(1500, timeout_opcao))
-                                opt.click(timeout=timeout_opcao)
-                                opcao_clicada = True
-                        except Exception:
-                            pass
-                    if not opcao_clicada:
-                        try:
-                            sel = escopo.get_by_label(config.UI_LABEL_TABELA)
-                            if sel.count() > 0:
-                                sel.select_option(label=lbl_opcao, timeout=timeout_opcao)
-                                opcao_clicada = True
-                        except Exception:
-                            pass
-                    if not opcao_clicada:
-                        try:
-                            loc_portal = pagina_ui.locator(".vue-portal-target").get_by_text(lbl_opcao, exact=True).first
-                            if loc_portal.count() > 0 and loc_portal.is_visible():
-                                loc_portal.click(timeout=timeout_opcao)
-                                opcao_clicada = True
-                        except Exception:
-                            pass
-            if not opcao_clicada:
-                continue
-            alguma_vez_opcao_clicada = True
-            try:
-                escopo.get_by_role("button", name=config.UI_BOTAO_SIMULAR).first.wait_for(state="visible", timeout=1500)
-            except Exception:
-                pass
-            try:
-                escopo.get_by_role("button", name=config.UI_BOTAO_SIMULAR).first.click(timeout=2000)
-            except Exception:
-                _clicar_por_texto(pagina_ui, config.UI_BOTAO_SIMULAR)
-            try:
-                escopo.get_by_text(config.UI_TEXTO_VALOR_LIBERADO, exact=False).first.wait_for(state="visible", timeout=4000)
-            except Exception:
-                try:
-                    escopo.get_by_text(config.UI_TEXTO_ENTENDA_ENCARGOS, exact=False).first.wait_for(state="visible", timeout=3000)
-                except Exception:
-                    try:
-                        escopo.get_by_text(config.UI_TEXTO_VALOR_MAIOR_DISPONIVEL, exact=False).first.wait_for(state="visible", timeout=3000)
-                    except Exception:
-                        try:
-                            escopo.get_by_text(getattr(config, "UI_TEXTO_ERRO_MARGEM_SIMULACAO", ""), exact=False).first.wait_for(state="visible", timeout=2000)
-                        except Exception:
-                            pass
-            msg_erro_margem = escopo.get_by_text(getattr(config, "UI_TEXTO_ERRO_MARGEM_SIMULACAO", ""), exact=False).first
-            try:
-                if msg_erro_margem.is_visible():
-                    linha_status = "erro_margem_simulacao"
-                    erro_linha = getattr(config, "UI_TEXTO_ERRO_MARGEM_SIMULACAO", "Não foi possível encontrar a margem total para simulação, por favor, refaça a obtenção de saldo")
-            except Exception:
-                pass
-            msg_maior = escopo.get_by_text(config.UI_TEXTO_VALOR_MAIOR_DISPONIVEL, exact=False).first
-            tentou_valor_total = False
+            pagina_ui.locator(".vue-portal-target").get_by_text(label_tabela, exact=False).first.wait_for(state="visible", timeout=timeout_opcoes_visiveis)
+            opcoes_visiveis = True
+        except Exception:
             try:
-                if msg_maior.is_visible():
-                    linha_status = "valor_maior_que_disponivel"
-                    tentou_valor_total = True
-                    try:
-                        escopo.get_by_label(config.UI_LABEL_TIPO).click(timeout=2000)
-                        if wait_fn:
-                            wait_fn(250)
-                    except Exception:
-                        pass
-                    tipo_sel = escopo.get_by_label(config.UI_LABEL_TIPO)
-                    for lbl in [config.UI_OPCAO_VALOR_TOTAL, getattr(config, "UI_OPCAO_VALOR_TOTAL_ALT", "Valor Total")]:
-                        try:
-                            tipo_sel.select_option(label=lbl, timeout=2000)
-                            break
-                        except Exception:
-                            try:
-                                _clicar_por_texto(pagina_ui, lbl)
-                                break
-                            except Exception:
-                                pass
-                    if wait_fn:
-                        wait_fn(150)
-                    try:
-                        escopo.get_by_role("button", name=config.UI_BOTAO_SIMULAR).first.click(timeout=2000)
-                    except Exception:
-                        _clicar_por_texto(pagina_ui, config.UI_BOTAO_SIMULAR)
-                    if wait_fn:
-                        wait_fn(900)
-                    try:
-                        escopo.get_by_text(config.UI_TEXTO_VALOR_LIBERADO, exact=False).first.wait_for(state="visible", timeout=6000)
-                    except Exception:
-                        try:
-                            escopo.get_by_text(getattr(config, "UI_TEXTO_VALOR_LIBERADO_ALT", "Liberado"), exact=False).first.wait_for(state="visible", timeout=3000)
-                        except Exception:
-                            pass
+                pagina_ui.get_by_role("option").first.wait_for(state="visible", timeout=timeout_opcoes_visiveis)
+                opcoes_visiveis = True
             except Exception:
                 pass
-            sucesso = False
+        if not opcoes_visiveis:
+            if on_abrir_tabela:
+                on_abrir_tabela(False, "opcoes_nao_apareceram")
+            if getattr(config, "DEBUG_TABELA", False):
+                print("[DEBUG_TABELA] opcoes_nao_apareceram timeout=" + str(timeout_opcoes_visiveis))
+            return False
+        opcao_clicada = False
+        labels_tentar = variantes_por_mes.get(_meses, [label_tabela])
+        if label_tabela not in labels_tentar:
+            labels_tentar = [label_tabela] + list(labels_tentar)
+        for lbl_opcao in labels_tentar:
+            if opcao_clicada:
+                break
             try:
-                lib = escopo.get_by_text(config.UI_TEXTO_VALOR_LIBERADO, exact=False).first.is_visible()
-                enc = escopo.get_by_text(config.UI_TEXTO_ENTENDA_ENCARGOS, exact=False).first.is_visible()
-                sucesso = lib and enc
+                opt_portal = pagina_ui.locator(".vue-portal-target").get_by_text(lbl_opcao, exact=False).first
+                if opt_portal.count() > 0 and opt_portal.is_visible():
+                    opt_portal.click(timeout=timeout_opcao)
+                    opcao_clicada = True
             except Exception:
                 pass
-            if tentou_valor_total and not sucesso:
-                linha_status = "valor_maior_que_disponivel"
-            if sucesso or tentou_valor_total:
+            if not opcao_clicada:
                 try:
-                    bloco_liberado = escopo.get_by_text(config.UI_TEXTO_VALOR_LIBERADO, exact=False).first
-                    txt_liberado = bloco_liberado.evaluate("el => el.closest('div')?.innerText || el.parentElement?.innerText || ''")
-                    if not (txt_liberado and re.search(r"[\d.,]+", txt_liberado)):
-                        bloco_liberado = escopo.get_by_text(getattr(config, "UI_TEXTO_VALOR_LIBERADO_ALT", "Liberado"), exact=False).first
-                        txt_liberado = bloco_liberado.evaluate("el => el.closest('div')?.innerText || el.parentElement?.innerText || ''")
-                    m_li = re.search(r"R?\$?\s*([\d.,]+)", (txt_liberado or "").replace(" ", ""))
-                    if m_li:
-                        valor_liberado = m_li.group(1).replace(".", "").replace(",", ".")
+                    opt = pagina_ui.get_by_role("option").filter(has_text=re.compile(re.escape(lbl_opcao), re.I)).first
+                    if opt.count() > 0:
+                        opt.wait_for(state="visible", timeout=min(1500, timeout_opcao))
+                        opt.click(timeout=timeout_opcao)
+                        opcao_clicada = True
                 except Exception:
                     pass
+            if not opcao_clicada:
                 try:
-                    parcelas_el = escopo.get_by_text(config.UI_TEXTO_PARCELAS_X_RS, exact=False).first
-                    txt_parc = parcelas_el.evaluate("el => el.closest('div')?.innerText || el.parentElement?.innerText || ''")
-                    m_parc = re.search(r"(\d+)\s*x\s*R?\$?\s*([\d.,]+)", (txt_parc or ""), re.IGNORECASE)
-                    if m_parc:
-                        valor_parcela = f"{m_parc.group(1)}x {m_parc.group(2).replace(',', '.')}"
-                        if not tentou_valor_total:
-                            qtd_parcelas = str(m_parc.group(1))
+                    sel = escopo.get_by_label(config.UI_LABEL_TABELA)
+                    if sel.count() > 0:
+                        sel.select_option(label=lbl_opcao, timeout=timeout_opcao)
+                        opcao_clicada = True
                 except Exception:
                     pass
+            if not opcao_clicada:
                 try:
-                    total_el = escopo.get_by_text(config.UI_TEXTO_TOTAL, exact=False).first
-                    txt_tot = total_el.evaluate("el => el.closest('div')?.innerText || el.parentElement?.innerText || ''")
-                    m_tot = re.search(r"R?\$?\s*([\d.,]+)", (txt_tot or "").replace(" ", ""))
-                    if m_tot:
-                        valor_total = m_tot.group(1).replace(".", "").replace(",", ".")
+                    loc_portal = pagina_ui.locator(".vue-portal-target").get_by_text(lbl_opcao, exact=True).first
+                    if loc_portal.count() > 0 and loc_portal.is_visible():
+                        loc_portal.click(timeout=timeout_opcao)
+                        opcao_clicada = True
                 except Exception:
                     pass
-                if not valor_liberado or not valor_parcela or not valor_total:
-                    for fonte in [escopo, pagina_ui if pagina_ui is not escopo else None]:
-                        if fonte is None:
-                            continue
-                        try:
-                            txt_bloco = fonte.evaluate("el => el.innerText || ''")
-                            if not valor_liberado and txt_bloco:
-                                m = re.search(r"[Ll]iberado\s*[:\s]*R?\$?\s*([\d.,]+)", txt_bloco)
-                                if m:
-                                    valor_liberado = m.group(1).replace(".", "").replace(",", ".")
-                            if not valor_parcela and txt_bloco:
-                                m = re.search(r"(\d+)\s*x\s*R?\$?\s*([\d.,]+)", txt_bloco, re.IGNORECASE)
-                                if m:
-                                    valor_parcela = f"{m.group(1)}x {m.group(2).replace(',', '.')}"
-                                    if not tentou_valor_total:
-                                        qtd_parcelas = str(m.group(1))
-                            if not valor_total and txt_bloco:
-                                m = re.search(r"[Tt]otal\s*[:\s]*R?\$?\s*([\d.,]+)", txt_bloco)
-                                if m:
-                                    valor_total = m.group(1).replace(".", "").replace(",", ".")
-                            if valor_liberado and valor_parcela and valor_total:
-                                break
-                        except Exception:
-                            pass
+    return opcao_clicada
+
+
+def _clicar_simular(escopo: "Page | Locator", pagina_ui: "Page | Locator") -> None:
+    try:
+        escopo.get_by_role("button", name=config.UI_BOTAO_SIMULAR).first.wait_for(state="visible", timeout=1500)
+    except Exception:
+        pass
+    try:
+        escopo.get_by_role("button", name=config.UI_BOTAO_SIMULAR).first.click(timeout=2000)
+    except Exception:
+        _clicar_por_texto(pagina_ui, config.UI_BOTAO_SIMULAR)
+
+
+# Leitura do resultado da simulação em uma ida e volta: para cada rótulo, o menor elemento visível que o contém
+# (como get_by_text) e o innerText do div mais próximo; mais o texto do escopo e da página para o fallback por regex.
+_JS_EXTRAIR_SIMULACAO = """
+(raiz, t) => {
+    raiz = raiz || document.body;
+    const norm = (x) => (x || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+    const rotulos = Array.from(new Set(Object.values(t).map(norm).filter(Boolean)));
+    const achados = new Map();
+    const walker = document.createTreeWalker(raiz, NodeFilter.SHOW_TEXT);
+    for (let no = walker.nextNode(); no && achados.size < rotulos.length; no = walker.nextNode()) {
+        const texto = norm(no.nodeValue);
+        if (!texto) continue;
+        const el = no.parentElement;
+        for (const r of rotulos) {
+            if (achados.has(r) || !texto.includes(r)) continue;
+            if (el && el.getClientRects().length > 0) achados.set(r, el);
+        }
+    }
+    const achar = (rotulo) => achados.get(norm(rotulo)) || null;
+    const bloco = (el) => el ? ((el.closest('div') || {}).innerText || (el.parentElement || {}).innerText || '') : '';
+    const liberado = achar(t.liberado);
+    let txtLiberado = bloco(liberado);
+    if (!/[\\d.,]+/.test(txtLiberado)) txtLiberado = bloco(achar(t.liberado_alt));
+    const textoRaiz = raiz.innerText || '';
+    return {
+        liberado: !!liberado,
+        encargos: !!achar(t.encargos),
+        maior_que_disponivel: !!achar(t.maior),
+        erro_margem: !!achar(t.erro_margem),
+        txt_liberado: txtLiberado,
+        txt_parcelas: bloco(achar(t.parcelas)),
+        txt_total: bloco(achar(t.total)),
+        txt_escopo: textoRaiz,
+        txt_pagina: raiz === document.body ? '' : (document.body.innerText || ''),
+    };
+}
+"""
+_JS_ALGUM_TEXTO_VISIVEL = """([raiz, textos]) => { const t = ((raiz || document.body).innerText || '').replace(/\\s+/g, ' ').toLowerCase(); return textos.some(x => x && t.includes(x.toLowerCase())); }"""
+
+_RE_VALOR = re.compile(r"R?\$?\s*([\d.,]+)")
+_RE_PARCELAS = re.compile(r"(\d+)\s*x\s*R?\$?\s*([\d.,]+)", re.IGNORECASE)
+_RE_LIBERADO_BLOCO = re.compile(r"[Ll]iberado\s*[:\s]*R?\$?\s*([\d.,]+)")
+_RE_TOTAL_BLOCO = re.compile(r"[Tt]otal\s*[:\s]*R?\$?\s*([\d.,]+)")
+
+
+def _textos_simulacao() -> dict:
+    return {
+        "liberado": config.UI_TEXTO_VALOR_LIBERADO,
+        "liberado_alt": getattr(config, "UI_TEXTO_VALOR_LIBERADO_ALT", "Liberado"),
+        "encargos": config.UI_TEXTO_ENTENDA_ENCARGOS,
+        "maior": config.UI_TEXTO_VALOR_MAIOR_DISPONIVEL,
+        "erro_margem": getattr(config, "UI_TEXTO_ERRO_MARGEM_SIMULACAO", ""),
+        "parcelas": config.UI_TEXTO_PARCELAS_X_RS,
+        "total": config.UI_TEXTO_TOTAL,
+    }
+
+
+def _extrair_simulacao(escopo: "Page | Locator") -> dict:
+    """Rótulos visíveis e textos do resultado da simulação num único evaluate (escopo Page usa o body)."""
+    if hasattr(escopo, "keyboard"):
+        return escopo.evaluate("(t) => (" + _JS_EXTRAIR_SIMULACAO + ")(null, t)", _textos_simulacao())
+    return escopo.evaluate(_JS_EXTRAIR_SIMULACAO, _textos_simulacao())
+
+
+def _valores_simulacao(dados: dict) -> Tuple[str, str, str]:
+    return (dados.get("txt_liberado") or "", dados.get("txt_parcelas") or "", dados.get("txt_total") or "")
+
+
+def _aguardar_valores_mudarem(escopo: "Page | Locator", antes: Tuple[str, str, str], timeout_ms: int) -> None:
+    """Espera o servidor devolver a nova simulação: os blocos de liberado, parcelas e total diferentes de `antes`.
+    Limitada a `timeout_ms` (a pausa fixa que existia); se os valores não mudarem, segue como antes da espera."""
+    pagina = _get_page(escopo)
+    if pagina is None:
+        return
+    restante = timeout_ms
+    while restante > 0:
+        pagina.wait_for_timeout(min(100, restante))
+        restante -= 100
+        try:
+            if _valores_simulacao(_extrair_simulacao(escopo)) != antes:
+                return
+        except Exception:
+            return
+
+
+def _aguardar_algum_texto(escopo: "Page | Locator", textos: List[str], timeout_ms: int) -> bool:
+    """Espera, dentro da página, até um dos textos aparecer no escopo (retorna assim que aparece)."""
+    pagina = _get_page(escopo)
+    if pagina is None:
+        return False
+    handle = None
+    try:
+        if not hasattr(escopo, "keyboard"):
+            handle = cast("Locator", escopo).element_handle(timeout=min(2000, timeout_ms))
+        pagina.wait_for_function(_JS_ALGUM_TEXTO_VISIVEL, arg=[handle, [t for t in textos if t]], timeout=max(1, timeout_ms))
+        return True
+    except Exception:
+        return False
+    finally:
+        if handle is not None:
+            try:
+                handle.dispose()
+            except Exception:
+                pass
+
+
+def _interpretar_simulacao(dados: dict, tentou_valor_total: bool, qtd_parcelas: str) -> Tuple[str, str, str, str]:
+    """Aplica os padrões pré-compilados aos textos de `_extrair_simulacao`: blocos dos rótulos primeiro, depois o
+    texto do escopo e o da página. Devolve (valor_liberado, valor_parcela, valor_total, qtd_parcelas)."""
+    valor_liberado = ""
+    valor_parcela = ""
+    valor_total = ""
+    m = _RE_VALOR.search((dados.get("txt_liberado") or "").replace(" ", ""))
+    if m:
+        valor_liberado = m.group(1).replace(".", "").replace(",", ".")
+    m = _RE_PARCELAS.search(dados.get("txt_parcelas") or "")
+    if m:
+        valor_parcela = f"{m.group(1)}x {m.group(2).replace(',', '.')}"
+        if not tentou_valor_total:
+            qtd_parcelas = str(m.group(1))
+    m = _RE_VALOR.search((dados.get("txt_total") or "").replace(" ", ""))
+    if m:
+        valor_total = m.group(1).replace(".", "").replace(",", ".")
+    for txt_bloco in (dados.get("txt_escopo") or "", dados.get("txt_pagina") or ""):
+        if (valor_liberado and valor_parcela and valor_total) or not txt_bloco:
+            continue
+        if not valor_liberado:
+            m = _RE_LIBERADO_BLOCO.search(txt_bloco)
+            if m:
+                valor_liberado = m.group(1).replace(".", "").replace(",", ".")
+        if not valor_parcela:
+            m = _RE_PARCELAS.search(txt_bloco)
+            if m:
+                valor_parcela = f"{m.group(1)}x {m.group(2).replace(',', '.')}"
                 if not tentou_valor_total:
-                    linha_status = "sucesso"
-        except Exception as e:
-            erro_linha = str(e).replace("\n", " ").replace("\r", "")[:500]
-        skip_parcela = linha_status == "falha_simulacao" and not valor_liberado and not valor_parcela and not valor_total and not erro_linha
-        if not skip_parcela:
-            valor_esperado_str = str(valor_maximo_parcela if valor_maximo_parcela is not None else "")
-            lista_saida.append({
-                "nome": cliente.nome, "cpf": cliente.cpf, "contato": cliente.contato, "email": cliente.email,
-                "banco": banco_atual, "valor_maximo_parcela": valor_maximo_parcela, "valor_esperado": valor_esperado_str,
-                "qtd_parcelas": qtd_parcelas, "valor_liberado": valor_liberado, "valor_parcela": valor_parcela, "valor_total": valor_total,
-                "status": linha_status, "erro": erro_linha, "tipo": "parcela",
-            })
-            gravou_alguma = True
+                    qtd_parcelas = str(m.group(1))
+        if not valor_total:
+            m = _RE_TOTAL_BLOCO.search(txt_bloco)
+            if m:
+                valor_total = m.group(1).replace(".", "").replace(",", ".")
+    return (valor_liberado, valor_parcela, valor_total, qtd_parcelas)
+
+
+def _ler_resultado_simulacao(escopo: "Page | Locator", pagina_ui: "Page | Locator", _meses: int) -> Tuple[str, str, str, str, str, str]:
+    """Depois de "Simular": espera o resultado (ou a mensagem de valor maior que o disponível, quando refaz por Valor Total)
+    e devolve (status, valor_liberado, valor_parcela, valor_total, qtd_parcelas, erro). A espera roda dentro da página
+    e os valores vêm de `_extrair_simulacao` (uma ida e volta), interpretados por `_interpretar_simulacao`."""
+    linha_status = "falha_simulacao"
+    valor_liberado = ""
+    valor_parcela = ""
+    valor_total = ""
+    qtd_parcelas = str(_meses)
+    erro_linha = ""
+    try:
+        textos = _textos_simulacao()
+        perfil_timeouts.esperar(
+            "TIMEOUT_RESULTADO_SIMULACAO_MS",
+            lambda t: _aguardar_algum_texto(escopo, [textos["liberado"], textos["encargos"], textos["maior"], textos["erro_margem"]], t),
+            getattr(config, "TIMEOUT_RESULTADO_SIMULACAO_MS", 12000),
+            acertou=bool,
+        )
+        dados = _extrair_simulacao(escopo)
+        if dados.get("erro_margem"):
+            linha_status = "erro_margem_simulacao"
+            erro_linha = getattr(config, "UI_TEXTO_ERRO_MARGEM_SIMULACAO", "Não foi possível encontrar a margem total para simulação, por favor, refaça a obtenção de saldo")
+        tentou_valor_total = False
+        if dados.get("maior_que_disponivel"):
+            linha_status = "valor_maior_que_disponivel"
+            tentou_valor_total = True
+            try:
+                escopo.get_by_label(config.UI_LABEL_TIPO).click(timeout=2000)
+                esperas.pausa_transicao(pagina_ui, 250)
+            except Exception:
+                pass
+            tipo_sel = escopo.get_by_label(config.UI_LABEL_TIPO)
+            for lbl in [config.UI_OPCAO_VALOR_TOTAL, getattr(config, "UI_OPCAO_VALOR_TOTAL_ALT", "Valor Total")]:
+                try:
+                    tipo_sel.select_option(label=lbl, timeout=2000)
+                    break
+                except Exception:
+                    try:
+                        _clicar_por_texto(pagina_ui, lbl)
+                        break
+                    except Exception:
+                        pass
+            esperas.pausa_transicao(pagina_ui, 150)
+            valores_antes = _valores_simulacao(dados)
+            try:
+                escopo.get_by_role("button", name=config.UI_BOTAO_SIMULAR).first.click(timeout=2000)
+            except Exception:
+                _clicar_por_texto(pagina_ui, config.UI_BOTAO_SIMULAR)
+            _aguardar_valores_mudarem(escopo, valores_antes, 900)
+            _aguardar_algum_texto(escopo, [textos["liberado"], textos["liberado_alt"]], 9000)
+            dados = _extrair_simulacao(escopo)
+        sucesso = bool(dados.get("liberado") and dados.get("encargos"))
+        if sucesso or tentou_valor_total:
+            valor_liberado, valor_parcela, valor_total, qtd_parcelas = _interpretar_simulacao(dados, tentou_valor_total, qtd_parcelas)
+            if not tentou_valor_total:
+                linha_status = "sucesso"
+    except Exception as e:
+        erro_linha = str(e).replace("\n", " ").replace("\r", "")[:500]
+    return (linha_status, valor_liberado, valor_parcela, valor_total, qtd_parcelas, erro_linha)
+
+
+def montar_linha_parcela(cliente: Cliente, banco_atual: str, valor_maximo_parcela: str, _meses: int, resultado: Tuple[str, str, str, str, str, str] | None, erro: str = "") -> dict | None:
+    """Monta a linha "parcela" do prazo; None quando a simulação não produziu nada (não grava linha)."""
+    linha_status, valor_liberado, valor_parcela, valor_total, qtd_parcelas, erro_linha = resultado or ("falha_simulacao", "", "", "", str(_meses), "")
+    if erro:
+        erro_linha = erro
+    if linha_status == "falha_simulacao" and not valor_liberado and not valor_parcela and not valor_total and not erro_linha:
+        return None
+    valor_esperado_str = str(valor_maximo_parcela if valor_maximo_parcela is not None else "")
+    return {
+        "nome": cliente.nome, "cpf": cliente.cpf, "contato": cliente.contato, "email": cliente.email,
+        "banco": banco_atual, "valor_maximo_parcela": valor_maximo_parcela, "valor_esperado": valor_esperado_str,
+        "qtd_parcelas": qtd_parcelas, "valor_liberado": valor_liberado, "valor_parcela": valor_parcela, "valor_total": valor_total,
+        "status": linha_status, "erro": erro_linha, "tipo": "parcela",
+    }
+
+
+def montar_linha_limite_meses(cliente: Cliente, banco_atual: str) -> dict:
+    """Linha "limite_meses" gravada depois dos prazos de um banco."""
     limite_msg = getattr(config, "UI_TEXTO_LIMITE_OPCOES_MESES", "Limite de opções de meses alcançado")
-    lista_saida.append({
+    return {
         "nome": cliente.nome, "cpf": cliente.cpf, "contato": cliente.contato, "email": cliente.email,
         "banco": banco_atual, "valor_esperado": "", "valor_liberado": "", "valor_parcela": "", "qtd_parcelas": "", "valor_maximo_parcela": "", "valor_total": "",
         "status": limite_msg, "erro": "", "tipo": "limite_meses",
-    })
+    }
+
+
+def _abrir_copia_resultado(pagina_resultado: "Page", url: str) -> "Tuple[Page, Page | Locator] | None":
+    """Abre a URL do resultado numa nova aba do mesmo contexto e devolve (aba, escopo da simulação) com Tipo = valor da parcela."""
+    aba = pagina_resultado.context.new_page()
+    try:
+        aba.goto(url, wait_until="domcontentloaded")
+        aba.locator(".simulation, .simulation-table, tr.expanded-row").first.wait_for(state="visible", timeout=getattr(config, "TIMEOUT_ESPERA_BLOCO_SIMULACAO_MS", 10000))
+        escopo = _obter_escopo_simulacao(aba)
+        try:
+            escopo.get_by_label(config.UI_LABEL_TIPO).select_option(label=config.UI_OPCAO_VALOR_PARCELA, timeout=2000)
+        except Exception:
+            pass
+        return (aba, escopo)
+    except Exception:
+        try:
+            aba.close()
+        except Exception:
+            pass
+        return None
+
+
+def _simular_prazos_em_abas(
+    pagina_resultado: "Page",
+    escopo: "Page | Locator",
+    valor_maximo_parcela: str,
+    cliente: Cliente,
+    banco_atual: str,
+    opcoes_com_meses: List[Tuple[int, str]],
+    on_abrir_tabela: Optional[Callable[[bool, str], None]] = None,
+) -> "List[Tuple[bool, dict | None]] | None":
+    """Um prazo por aba: o primeiro usa a aba de resultado já aberta, os demais abrem cópias da mesma URL.
+    Primeiro escolhe o prazo e clica Simular em todas as abas, depois lê os resultados na ordem dos prazos,
+    para que o portal calcule as simulações ao mesmo tempo. Devolve None (simulação sequencial) quando
+    o resultado é inline na consulta ou alguma cópia não carrega o bloco de simulação."""
+    try:
+        url = pagina_resultado.url
+    except Exception:
+        return None
+    if not url or "clt/consultar" in url or url.startswith("about:"):
+        return None
+    abas: List[Tuple["Page", "Page | Locator"]] = [(pagina_resultado, escopo)]
+    extras: List["Page"] = []
+    try:
+        for _ in opcoes_com_meses[1:]:
+            copia = _abrir_copia_resultado(pagina_resultado, url)
+            if copia is None:
+                return None
+            extras.append(copia[0])
+            abas.append(copia)
+        erros: List[str] = ["" for _ in opcoes_com_meses]
+        clicou: List[bool] = [False for _ in opcoes_com_meses]
+        for i, ((_meses, label_tabela), (aba, escopo_aba)) in enumerate(zip(opcoes_com_meses, abas)):
+            try:
+                if _escolher_prazo(escopo_aba, aba, aba, _meses, label_tabela, banco_atual, on_abrir_tabela):
+                    clicou[i] = True
+                    _clicar_simular(escopo_aba, aba)
+            except Exception as e:
+                erros[i] = str(e).replace("\n", " ").replace("\r", "")[:500]
+        linhas: List[Tuple[bool, dict | None]] = []
+        for i, ((_meses, _label), (aba, escopo_aba)) in enumerate(zip(opcoes_com_meses, abas)):
+            if erros[i]:
+                linhas.append((clicou[i], montar_linha_parcela(cliente, banco_atual, valor_maximo_parcela, _meses, None, erros[i])))
+            elif clicou[i]:
+                linhas.append((True, montar_linha_parcela(cliente, banco_atual, valor_maximo_parcela, _meses, _ler_resultado_simulacao(escopo_aba, aba, _meses))))
+            else:
+                linhas.append((False, None))
+        return linhas
+    finally:
+        for aba in extras:
+            try:
+                if not aba.is_closed():
+                    aba.close()
+            except Exception:
+                pass
+
+
+def aguardar_bloco_simulacao(escopo: "Page | Locator") -> bool:
+    """Espera o bloco de simulação (.simulation / tr.expanded-row) e, se não vier, o texto do valor máximo da parcela.
+    Os dois pontos usam o perfil de timeouts (TIMEOUT_ESPERA_BLOCO_SIMULACAO_MS e ...:valor_max)."""
+    try:
+        perfil_timeouts.esperar("TIMEOUT_ESPERA_BLOCO_SIMULACAO_MS", lambda t: escopo.locator(".simulation, .simulation-table, tr.expanded-row").first.wait_for(state="visible", timeout=t))
+        return True
+    except Exception:
+        pass
+    try:
+        perfil_timeouts.esperar("TIMEOUT_ESPERA_BLOCO_SIMULACAO_MS:valor_max", lambda t: escopo.get_by_text(config.UI_TEXTO_VALOR_MAXIMO_PARCELA, exact=False).first.wait_for(state="visible", timeout=t))
+        return True
+    except Exception:
+        return False
+
+
+def simular_tabelas(
+    escopo: "Page | Locator",
+    valor_maximo_parcela: str,
+    cliente: Cliente,
+    banco_atual: str,
+    lista_saida: "SaidaResultados",
+    pagina_resultado: "Page | None" = None,
+    on_abrir_tabela: Optional[Callable[[bool, str], None]] = None,
+) -> tuple[bool, bool]:
+    """
+    Para cada mês (6, 12, 18, 24) de baixo para cima: abre o dropdown Tabela, escolhe o mês, clica Simular e grava; ao final grava "Limite de opções de meses alcançado".
+    Ordem: _abrir_tabela_clique_e_enter, _disparar_clique_real_tabela, LOCATOR_TABELA_DROPDOWN, _abrir_tabela_por_teclado,
+    _clicar_tabela_via_js, _clicar_tabela_via_js_pagina. Só considera aberto se opções ficarem visíveis (timeout 800 ms).
+    Com SIMULAR_PRAZOS_EM_ABAS, cada prazo é simulado numa cópia da aba de resultado (_simular_prazos_em_abas);
+    as linhas continuam gravadas na ordem 6/12/18/24 e o limite por último.
+    """
+    pagina_ui: "Page | Locator" = pagina_resultado if pagina_resultado is not None else escopo
+    aguardar_bloco_simulacao(escopo)
+    escopo = _obter_escopo_simulacao(escopo)
+    meses_array = [6, 12, 18, 24]
+    labels_celcoin = ["6 meses (C)", "12 meses (C)", "18 meses (C)", "24 meses (C)"]
+    labels_qitech = ["6 meses", "12 meses", "18 meses", "24 meses"]
+    is_celcoin = "celcoin" in (banco_atual or "").lower()
+    opcoes_com_meses = [
+        (meses_array[i], labels_celcoin[i] if is_celcoin else labels_qitech[i])
+        for i in range(len(meses_array))
+    ]
+    gravou_alguma = False
+    alguma_vez_opcao_clicada = False
+    pagina_base = pagina_resultado if pagina_resultado is not None else _get_page(escopo)
+    linhas = None
+    if getattr(config, "SIMULAR_PRAZOS_EM_ABAS", False) and pagina_base is not None:
+        linhas = _simular_prazos_em_abas(pagina_base, escopo, valor_maximo_parcela, cliente, banco_atual, opcoes_com_meses, on_abrir_tabela)
+    if linhas is not None:
+        alguma_vez_opcao_clicada = any(clicou for clicou, _ in linhas)
+        for _clicou, linha in linhas:
+            if linha is not None:
+                lista_saida.append(linha)
+                gravou_alguma = True
+    else:
+        for _meses, label_tabela in opcoes_com_meses:
+            try:
+                if not _escolher_prazo(escopo, pagina_ui, pagina_resultado, _meses, label_tabela, banco_atual, on_abrir_tabela):
+                    continue
+                alguma_vez_opcao_clicada = True
+                _clicar_simular(escopo, pagina_ui)
+                linha = montar_linha_parcela(cliente, banco_atual, valor_maximo_parcela, _meses, _ler_resultado_simulacao(escopo, pagina_ui, _meses))
+            except Exception as e:
+                linha = montar_linha_parcela(cliente, banco_atual, valor_maximo_parcela, _meses, None, str(e).replace("\n", " ").replace("\r", "")[:500])
+            if linha is not None:
+                lista_saida.append(linha)
+                gravou_alguma = True
+    lista_saida.append(montar_linha_limite_meses(cliente, banco_atual))
     return (gravou_alguma, alguma_vez_opcao_clicada)
 
 
-def processar_resultado_existente_no_historico(page: "Page", cpf_site: str, banco_atual: str, cliente: Cliente, lista_saida: list, timeout_ms: int) -> bool:
+def processar_resultado_existente_no_historico(page: "Page", cpf_site: str, banco_atual: str, cliente: Cliente, lista_saida: "SaidaResultados", timeout_ms: int) -> bool:
     from robo.comms import fluxo_consulta
     from robo.comms import navegacao
     try:
@@ -922,76 +1249,31 @@ def processar_resultado_existente_no_historico(page: "Page", cpf_site: str, banc
             log_critico(lista_saida, cliente, banco_atual, "registro_nao_encontrado", msg_reg)
             navegacao.voltar_para_consulta_limpa(page)
             return True
+        indice = indice_historico.obter_indice(pagina_consulta_antes)
+        if indice is not None and indice.ler_primeira_pagina():
+            entrada = indice.obter(cliente.cpf, banco_atual)
+            if entrada is None:
+                # A linha pode ainda não ter renderizado: uma releitura depois de uma pausa curta antes de desistir
+                pagina_consulta_antes.wait_for_timeout(getattr(config, "PAUSA_RELEITURA_INDICE_MS", 800))
+                indice.ler_primeira_pagina()
+                entrada = indice.obter(cliente.cpf, banco_atual)
+            if entrada is None or entrada.pagina != 0:
+                return False
         timeout_por_tentativa_antes = min(3000, timeout_ms // 5)
         linha_cpf_antes, locadores_linha_antes = buscar_linha_historico(pagina_consulta_antes, cpf_site, banco_atual, cliente, timeout_por_tentativa_antes, max_tentativas=1, usar_recarregar=False)
         if linha_cpf_antes is None:
             return False
-        status_historico_antes = None
-        texto_processando_antes = getattr(config, "UI_TEXTO_PROCESSANDO", "Processando")
-        max_recarregar_antes = getattr(config, "MAX_RECARREGAR_PROCESSANDO", 15)
-        for _tentativa_hist in range(max_recarregar_antes + 1):
-            st = None
-            try:
-                if linha_cpf_antes.get_by_text(config.UI_TEXTO_ERRO_NA_CONSULTA, exact=False).first.is_visible():
-                    st = "erro"
-            except Exception:
-                pass
-            if st is None:
-                try:
-                    if linha_cpf_antes.get_by_text(texto_processando_antes, exact=False).first.is_visible():
-                        st = "processando"
-                except Exception:
-                    pass
-            if st is None:
-                try:
-                    _tp = getattr(config, "UI_TEXTO_PROCESSANDO_ALT", "")
-                    if _tp and linha_cpf_antes.get_by_text(_tp, exact=False).first.is_visible():
-                        st = "processando"
-                except Exception:
-                    pass
-            if st is None:
-                try:
-                    if linha_cpf_antes.get_by_text(config.UI_TEXTO_SUCESSO, exact=False).first.is_visible():
-                        st = "sucesso"
-                except Exception:
-                    pass
-            if st is None:
-                st = "processando"
-            if st == "erro":
-                log_critico(lista_saida, cliente, banco_atual, "erro_na_consulta", config.UI_TEXTO_ERRO_NA_CONSULTA)
-                navegacao.voltar_para_consulta_limpa(page)
-                status_historico_antes = "erro"
-                break
-            if st == "processando":
-                if _tentativa_hist >= max_recarregar_antes:
-                    log_critico(lista_saida, cliente, banco_atual, "processando_timeout", "Status permaneceu Processando após recarregar")
-                    navegacao.voltar_para_consulta_limpa(page)
-                    status_historico_antes = "processando_timeout"
-                    break
-                try:
-                    pagina_consulta_antes.get_by_role("button", name=config.UI_BOTAO_RECARREGAR).first.click(timeout=5000)
-                    pagina_consulta_antes.wait_for_load_state("domcontentloaded", timeout=10000)
-                except Exception as e:
-                    log_critico(lista_saida, cliente, banco_atual, "falha_historico", str(e)[:300])
-                    status_historico_antes = "processando_timeout"
-                    break
-                pagina_consulta_antes.wait_for_timeout(config.PAUSA_APOS_RECARREGAR_MS)
-                linha_cpf_antes = None
-                for loc in locadores_linha_antes:
-                    try:
-                        loc.wait_for(state="visible", timeout=timeout_por_tentativa_antes)
-                        linha_cpf_antes = loc
-                        break
-                    except Exception:
-                        pass
-                if linha_cpf_antes is None:
-                    log_critico(lista_saida, cliente, banco_atual, "processando_timeout", "Linha não encontrada após recarregar")
-                    navegacao.voltar_para_consulta_limpa(page)
-                    status_historico_antes = "processando_timeout"
-                    break
-            if st == "sucesso":
-                status_historico_antes = "sucesso"
-                break
+        status_historico_antes, linha_cpf_antes = aguardar_status_historico(pagina_consulta_antes, linha_cpf_antes, locadores_linha_antes, cpf_site, cliente, banco_atual, timeout_por_tentativa_antes)
+        if status_historico_antes == "erro":
+            log_critico(lista_saida, cliente, banco_atual, "erro_na_consulta", config.UI_TEXTO_ERRO_NA_CONSULTA)
+            navegacao.voltar_para_consulta_limpa(page)
+        elif status_historico_antes == "processando_timeout":
+            log_critico(lista_saida, cliente, banco_atual, "processando_timeout", "Status permaneceu Processando após recarregar")
+            navegacao.voltar_para_consulta_limpa(page)
+        elif status_historico_antes == "linha_nao_encontrada":
+            log_critico(lista_saida, cliente, banco_atual, "processando_timeout", "Linha não encontrada após recarregar")
+            navegacao.voltar_para_consulta_limpa(page)
+            status_historico_antes = "processando_timeout"
         if status_historico_antes == "erro" or status_historico_antes == "processando_timeout":
             return True
         if status_historico_antes == "sucesso" and linha_cpf_antes is not None:
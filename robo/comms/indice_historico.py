@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import config
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Locator, Page
+
+_INDICES: Dict[int, "IndiceHistorico"] = {}
+
+# Uma passada por todas as linhas visíveis do histórico: CPF, banco, status e data de cada uma (marcadas com data-robo-indice)
+_JS_LER_HISTORICO = """
+({bancos, textos, geracao, pagina}) => {
+    const norm = (t) => (t || '').toLowerCase().replace(/[^a-z0-9]/g, '');
+    const tem = (texto, t) => t && texto.toLowerCase().includes(t.toLowerCase());
+    const linhas = Array.from(document.querySelectorAll("tr, [role='row']"))
+        .filter(el => el.getClientRects().length > 0 && !el.querySelector("tr, [role='row']"));
+    const saida = [];
+    linhas.forEach((el, i) => {
+        const texto = el.innerText || '';
+        const m = texto.match(/\\d{3}\\.?\\d{3}\\.?\\d{3}-?\\d{2}/);
+        if (!m) return;
+        const textoN = norm(texto);
+        const banco = bancos.find(b => textoN.includes(b));
+        if (!banco) return;
+        const status = tem(texto, textos.erro) ? 'erro' : textos.processando.some(t => tem(texto, t)) ? 'processando' : tem(texto, textos.sucesso) ? 'sucesso' : '';
+        const data = texto.match(/\\d{2}\\/\\d{2}\\/\\d{4}(?:\\s+\\d{2}:\\d{2}(?::\\d{2})?)?/);
+        const marca = geracao + '-' + pagina + '-' + i;
+        el.setAttribute('data-robo-indice', marca);
+        saida.push({cpf: m[0].replace(/\\D/g, ''), banco, status, data_hora: data ? data[0] : '', marca});
+    });
+    return saida;
+}
+"""
+
+_JS_PRIMEIRA_LINHA = """() => { const el = document.querySelector("tr[data-robo-indice], [role='row'][data-robo-indice]"); return el ? el.getAttribute('data-robo-indice') : ''; }"""
+_JS_PAGINA_TROCOU = """(marca) => !document.querySelector('[data-robo-indice="' + marca + '"]')"""
+
+
+def _normalizar_chave(chave: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", (chave or "").lower())
+
+
+@dataclass
+class EntradaHistorico:
+    cpf: str
+    banco: str
+    status: str
+    data_hora: str
+    pagina: int
+    marca: str
+
+
+class IndiceHistorico:
+    """Retrato do histórico da aba de consulta: uma leitura (com paginação) de todas as linhas, indexada por (CPF, banco).
+    Vale a linha mais recente de cada par (a tabela vem do mais novo para o mais antigo). Quem espera vários CPFs
+    consulta o índice em vez de procurar linha a linha, e um único Recarregar atualiza todos."""
+
+    def __init__(self, page: "Page", intervalo_ms: int | None = None) -> None:
+        self.page = page
+        self.intervalo_ms = intervalo_ms if intervalo_ms is not None else getattr(config, "INTERVALO_INDICE_HISTORICO_MS", 2000)
+        self.entradas: Dict[Tuple[str, str], EntradaHistorico] = {}
+        self.lido_em: float | None = None
+        self.geracao = 0
+
+    def _ler_pagina(self, pagina: int, bancos: List[str], textos: dict) -> List[dict]:
+        try:
+            return self.page.evaluate(_JS_LER_HISTORICO, {"bancos": bancos, "textos": textos, "geracao": self.geracao, "pagina": pagina}) or []
+        except Exception:
+            return []
+
+    def _parametros(self) -> Tuple[List[str], dict]:
+        bancos = [_normalizar_chave(b) for b in getattr(config, "INDICE_HISTORICO_BANCOS", ["QiTech", "Celcoin"])]
+        textos = {
+            "erro": config.UI_TEXTO_ERRO_NA_CONSULTA,
+            "processando": [t for t in (getattr(config, "UI_TEXTO_PROCESSANDO", "Processando"), getattr(config, "UI_TEXTO_PROCESSANDO_ALT", "")) if t],
+            "sucesso": config.UI_TEXTO_SUCESSO,
+        }
+        return bancos, textos
+
+    def _trocar_pagina(self, seletor: str) -> bool | None:
+        """Clica no controle de paginação e espera a primeira linha marcada sumir (a tabela foi trocada).
+        False sem controle (ou desabilitado); None se o clique saiu mas a troca não se confirmou a tempo."""
+        try:
+            botao = self.page.locator(seletor).first
+            if botao.count() == 0 or not botao.is_visible() or not botao.is_enabled():
+                return False
+            if "disabled" in (botao.get_attribute("class") or ""):
+                return False
+            marca = self.page.evaluate(_JS_PRIMEIRA_LINHA)
+            botao.click(timeout=2000)
+        except Exception:
+            return False
+        if marca:
+            try:
+                self.page.wait_for_function(_JS_PAGINA_TROCOU, arg=marca, timeout=3000)
+            except Exception:
+                return None
+        return True
+
+    def _voltar_primeira_pagina(self, max_cliques: int) -> None:
+        """Clica "anterior" até o controle sumir ou desabilitar (primeira página). Uma troca não confirmada não
+        encerra a volta: a tabela pode ter trocado depois do timeout."""
+        seletor = getattr(config, "SELETOR_PAGINA_ANTERIOR_HISTORICO", ".pagination-previous")
+        for _ in range(max_cliques):
+            if self._trocar_pagina(seletor) is False:
+                break
+
+    def ler(self, max_paginas: int | None = None) -> int:
+        """Lê o histórico inteiro visível (até `max_paginas`, padrão INDICE_HISTORICO_MAX_PAGINAS) e volta para a
+        primeira página. Devolve a quantidade de pares indexados."""
+        self.geracao += 1
+        bancos, textos = self._parametros()
+        entradas: Dict[Tuple[str, str], EntradaHistorico] = {}
+        limite_paginas = max(1, max_paginas or getattr(config, "INDICE_HISTORICO_MAX_PAGINAS", 3))
+        pagina = 0
+        avancou = False
+        while True:
+            for item in self._ler_pagina(pagina, bancos, textos):
+                chave = (item["cpf"], item["banco"])
+                if chave not in entradas:
+                    entradas[chave] = EntradaHistorico(item["cpf"], item["banco"], item["status"], item["data_hora"], pagina, item["marca"])
+            if pagina + 1 >= limite_paginas:
+                break
+            trocou = self._trocar_pagina(getattr(config, "SELETOR_PROXIMA_PAGINA_HISTORICO", ".pagination-next"))
+            avancou = avancou or trocou is not False
+            if not trocou:
+                break
+            pagina += 1
+        if avancou:
+            self._voltar_primeira_pagina(pagina + 1)
+        self.entradas = entradas
+        self.lido_em = time.monotonic()
+        return len(entradas)
+
+    def ler_primeira_pagina(self) -> int:
+        """Lê só a página aberta (sem paginar): troca no retrato os pares da primeira página e mantém os das outras.
+        Não conta como leitura completa (`atualizar` segue relendo no intervalo). Devolve os pares lidos."""
+        self.geracao += 1
+        bancos, textos = self._parametros()
+        entradas = {chave: e for chave, e in self.entradas.items() if e.pagina != 0}
+        vistos = set()
+        for item in self._ler_pagina(0, bancos, textos):
+            chave = (item["cpf"], item["banco"])
+            if chave not in vistos:
+                vistos.add(chave)
+                entradas[chave] = EntradaHistorico(item["cpf"], item["banco"], item["status"], item["data_hora"], 0, item["marca"])
+        self.entradas = entradas
+        return len(vistos)
+
+    def atualizar(self, recarregar: bool = False) -> bool:
+        """Relê o histórico se o retrato tem mais de `intervalo_ms` (com `recarregar`, clica Recarregar uma vez antes).
+        Devolve True quando houve leitura."""
+        if self.lido_em is not None and (time.monotonic() - self.lido_em) * 1000 < self.intervalo_ms:
+            return False
+        if recarregar:
+            try:
+                self.page.get_by_role("button", name=config.UI_BOTAO_RECARREGAR).first.click(timeout=5000)
+                self.page.wait_for_load_state("domcontentloaded", timeout=10000)
+            except Exception:
+                pass
+        self.ler()
+        return True
+
+    def invalidar(self) -> None:
+        """Força a próxima `atualizar` a reler (ex.: depois de enviar uma consulta nova)."""
+        self.lido_em = None
+
+    def obter(self, cpf: str, banco: str) -> EntradaHistorico | None:
+        banco_l = _normalizar_chave(banco)
+        for (cpf_reg, banco_reg), entrada in self.entradas.items():
+            if cpf_reg == cpf and (banco_l in banco_reg or banco_reg in banco_l):
+                return entrada
+        return None
+
+    def linha(self, entrada: EntradaHistorico) -> "Locator | None":
+        """Locator da linha marcada na leitura; só vale para a primeira página e até a tabela ser re-renderizada."""
+        if entrada.pagina != 0:
+            return None
+        return self.page.locator(f"[data-robo-indice='{entrada.marca}']").first
+
+
+def obter_indice(page: "Page | None") -> IndiceHistorico | None:
+    """Índice da aba (criado na primeira chamada). None com INDICE_HISTORICO_ATIVO=False."""
+    if page is None or not getattr(config, "INDICE_HISTORICO_ATIVO", True):
+        return None
+    indice = _INDICES.get(id(page))
+    if indice is None or indice.page is not page:
+        indice = IndiceHistorico(page)
+        _INDICES[id(page)] = indice
+
+        def _descartar(_p) -> None:
+            _INDICES.pop(id(page), None)
+
+        try:
+            page.on("close", _descartar)
+        except Exception:
+            pass
+    return indice
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import os
+from urllib.parse import urlparse
+
 from playwright.sync_api import Page  # type: ignore[import-untyped]
 
 import config
@@ -27,7 +30,60 @@ def login_e_ir_para_consulta(page: Page) -> None:
     page.wait_for_url(config.URL_CLT_CONSULTAR_PATTERN, timeout=config.TIMEOUT_LOGIN_MS)
 
 
+def sessao_valida(page: Page) -> bool:
+    """Checagem barata da sessão carregada do storage_state: abre a rota de consulta e verifica
+    se o campo CPF aparece (sessão ativa) ou se o admin redirecionou para o login."""
+    try:
+        page.goto(config.URL_ADMIN_BASE + "clt/consultar", wait_until="domcontentloaded")
+    except Exception:
+        return False
+    campo_cpf = page.get_by_label(config.UI_LABEL_CPF)\
+        .or_(page.get_by_placeholder(config.UI_PLACEHOLDER_CPF))\
+        .or_(page.locator('input[name="cpf"], input[id*="cpf"]').first)
+    campo_email = page.get_by_label(config.UI_LABEL_EMAIL).or_(page.locator("input[type='email']").first)
+    try:
+        campo_cpf.or_(campo_email).first.wait_for(state="visible", timeout=config.TIMEOUT_VALIDACAO_SESSAO_MS)
+    except Exception:
+        return False
+    try:
+        return "clt/consultar" in page.url and campo_cpf.first.is_visible()
+    except Exception:
+        return False
+
+
+def salvar_sessao(page: Page, caminho_sessao: str) -> None:
+    try:
+        dir_sessao = os.path.dirname(caminho_sessao)
+        if dir_sessao:
+            os.makedirs(dir_sessao, exist_ok=True)
+        caminho_tmp = f"{caminho_sessao}.{os.getpid()}.tmp"
+        page.context.storage_state(path=caminho_tmp)
+        try:
+            os.chmod(caminho_tmp, 0o600)
+        except OSError:
+            pass
+        os.replace(caminho_tmp, caminho_sessao)
+    except Exception as e:
+        print(f"Não foi possível salvar a sessão em {caminho_sessao}: {e}")
+
+
+def garantir_sessao(page: Page, caminho_sessao: str | None) -> None:
+    """Reaproveita a sessão salva quando ainda é válida; senão faz o login completo e salva a nova sessão."""
+    if caminho_sessao and os.path.exists(caminho_sessao) and sessao_valida(page):
+        print("Sessão salva reutilizada (login dispensado).")
+        return
+    login_e_ir_para_consulta(page)
+    if caminho_sessao:
+        salvar_sessao(page, caminho_sessao)
+
+
 def obter_pagina_consulta_principal(page: Page) -> Page | None:
+    """Prefere a própria `page` quando ela está na consulta (com bancos paralelos há mais de uma aba em clt/consultar)."""
+    try:
+        if not page.is_closed() and "clt/consultar" in page.url:
+            return page
+    except Exception:
+        pass
     for p in page.context.pages:
         try:
             if "clt/consultar" in p.url:
@@ -45,11 +101,113 @@ def fechar_pagina_se_aberta(pg: Page | None, pagina_base: Page | None = None) ->
         pass
 
 
-def voltar_para_consulta_limpa(page: Page) -> None:
-    page.goto(config.URL_ADMIN_BASE + "clt/consultar", wait_until="domcontentloaded")
-    campo = page.get_by_label(config.UI_LABEL_CPF)\
+def _campo_cpf(page: Page):
+    return page.get_by_label(config.UI_LABEL_CPF)\
         .or_(page.get_by_placeholder(config.UI_PLACEHOLDER_CPF))\
         .or_(page.locator('input[name="cpf"], input[id*="cpf"]').first)
+
+
+def _textos_impedem_reset_leve() -> list[str]:
+    """Mensagens que, se ainda visíveis fora do histórico, indicam estado velho do SPA (a próxima consulta poderia ler a mensagem do cliente anterior)."""
+    nomes = (
+        "UI_TEXTO_CPF_INVALIDO", "UI_TEXTO_CPF_INVALIDO_ALT", "UI_TEXTO_CPF_INVALIDO_ALT2",
+        "UI_TEXTO_CPF_NAO_ENCONTRADO_ALT", "UI_TEXTO_RESTRICAO_EMISSAO", "UI_TEXTO_SEM_VINCULO",
+        "UI_TEXTO_MODAL_AUTORIZACAO", "UI_TEXTO_REQUISICAO_MAL_FORMATADA_ALT", "UI_TEXTO_REGISTRO_NAO_ENCONTRADO",
+        "UI_TEXTO_NOVA_VERSAO_RECARREGANDO",
+    )
+    return [t for t in (getattr(config, n, "") for n in nomes) if t]
+
+
+# Diálogo visível (modal de autorização, confirmação etc.)
+_JS_MODAL_VISIVEL = """() => Array.from(document.querySelectorAll("[role='dialog'], [aria-modal='true'], .modal.show, .modal.open, [class*='modal'][class*='open']"))
+    .some(el => el.getClientRects().length > 0)"""
+
+# Algum dos textos visível fora das linhas do histórico
+_JS_TEXTO_VELHO_VISIVEL = """
+(textos) => {
+    const alvos = textos.map(t => t.toLowerCase());
+    const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT);
+    for (let no = walker.nextNode(); no; no = walker.nextNode()) {
+        const texto = (no.nodeValue || '').toLowerCase();
+        if (!texto.trim() || !alvos.some(t => texto.includes(t))) continue;
+        const el = no.parentElement;
+        if (el && el.getClientRects().length > 0 && !el.closest("tr, [role='row']")) return true;
+    }
+    return false;
+}
+"""
+
+# Linha de resultado ainda expandida (bloco de simulação do cliente anterior aberto)
+_JS_LINHA_EXPANDIDA_VISIVEL = """() => Array.from(document.querySelectorAll("tr.expanded-row, section.expanded_row, .simulation, .simulation-table"))
+    .some(el => el.getClientRects().length > 0)"""
+
+# Troca de rota pelo próprio router do SPA (History API + popstate), sem recarregar o bundle
+_JS_IR_PARA_ROTA = """(rota) => { window.history.pushState({}, '', rota); window.dispatchEvent(new PopStateEvent('popstate', {state: {}})); }"""
+
+_RESETS_LEVES_SEGUIDOS: dict[int, int] = {}
+
+
+def _fechar_modais(page: Page) -> bool:
+    for _ in range(2):
+        if not page.evaluate(_JS_MODAL_VISIVEL):
+            return True
+        page.keyboard.press("Escape")
+        try:
+            page.wait_for_function(f"() => !({_JS_MODAL_VISIVEL})()", timeout=800)
+            return True
+        except Exception:
+            pass
+        try:
+            page.locator(getattr(config, "SELETOR_FECHAR_MODAL", "[role='dialog'] button[aria-label*='fechar' i]")).first.click(timeout=800)
+        except Exception:
+            pass
+    return not page.evaluate(_JS_MODAL_VISIVEL)
+
+
+def _reset_na_pagina(page: Page) -> bool:
+    """Reset dentro do app: fecha modais, volta à rota de consulta pelo menu (ou pelo router do SPA) e limpa o CPF.
+    Devolve False quando não dá para garantir uma tela limpa (aí vale a navegação completa)."""
+    try:
+        if page.is_closed() or not page.url.startswith(config.URL_ADMIN_BASE):
+            return False
+        if not _fechar_modais(page):
+            return False
+        if "clt/consultar" not in page.url:
+            link = page.locator('a[href*="clt/consultar"]').first
+            if link.count() > 0 and link.is_visible():
+                link.click(timeout=2000)
+            else:
+                page.evaluate(_JS_IR_PARA_ROTA, urlparse(config.URL_ADMIN_BASE).path.rstrip("/") + "/clt/consultar")
+            page.wait_for_url(config.URL_CLT_CONSULTAR_PATTERN, timeout=3000)
+        campo = _campo_cpf(page).first
+        campo.wait_for(state="visible", timeout=getattr(config, "TIMEOUT_RESET_LEVE_MS", 3000))
+        campo.fill("")
+        if campo.input_value() != "":
+            return False
+        if page.evaluate(_JS_LINHA_EXPANDIDA_VISIVEL):
+            return False
+        return not page.evaluate(_JS_TEXTO_VELHO_VISIVEL, _textos_impedem_reset_leve())
+    except Exception:
+        return False
+
+
+def voltar_para_consulta_limpa(page: Page) -> None:
+    """Volta à consulta com o campo CPF vazio. Tenta primeiro o reset dentro do app (`_reset_na_pagina`), que não
+    recarrega o bundle do SPA; a navegação completa fica para quando ele falha e, por segurança, a cada
+    RESET_LEVE_MAX_SEGUIDOS resets leves seguidos na mesma aba."""
+    chave = id(page)
+    if chave not in _RESETS_LEVES_SEGUIDOS:
+        def _descartar(_pg) -> None:
+            _RESETS_LEVES_SEGUIDOS.pop(chave, None)
+
+        page.on("close", _descartar)
+    seguidos = _RESETS_LEVES_SEGUIDOS.get(chave, 0)
+    if getattr(config, "RESET_LEVE_ATIVO", True) and seguidos < getattr(config, "RESET_LEVE_MAX_SEGUIDOS", 50) and _reset_na_pagina(page):
+        _RESETS_LEVES_SEGUIDOS[chave] = seguidos + 1
+        return
+    _RESETS_LEVES_SEGUIDOS[chave] = 0
+    page.goto(config.URL_ADMIN_BASE + "clt/consultar", wait_until="domcontentloaded")
+    campo = _campo_cpf(page)
     campo.wait_for(state="visible", timeout=10000)
     try:
         campo.fill("")
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, List
+from urllib.parse import urlparse
+
+import config
+
+if TYPE_CHECKING:
+    from playwright.sync_api import BrowserContext, Request, Route
+
+_PERFIS: Dict[int, "PerfilRedeEnxuta"] = {}
+
+# Extensões de arquivo pesadas (imagem, fonte, mídia), interceptadas mesmo nos domínios permitidos.
+_EXTENSOES_PESADAS = r"png|jpe?g|gif|webp|avif|svg|ico|bmp|woff2?|ttf|otf|eot|mp4|webm|ogg|mp3|wav"
+
+
+def _dominios_permitidos() -> List[str]:
+    """Host do admin e da API, URL_TERMO_DOMAINS e REDE_ENXUTA_DOMINIOS_EXTRAS (subdomínios incluídos)."""
+    dominios = [urlparse(config.URL_ADMIN_BASE).hostname or ""]
+    dominios.append(urlparse(getattr(config, "API_URL_BASE", "")).hostname or "")
+    dominios += list(getattr(config, "URL_TERMO_DOMAINS", []))
+    dominios += list(getattr(config, "REDE_ENXUTA_DOMINIOS_EXTRAS", []))
+    vistos: List[str] = []
+    for d in dominios:
+        d = (d or "").strip().lower().lstrip(".")
+        if d and d not in vistos:
+            vistos.append(d)
+    return vistos
+
+
+def _formatar_bytes(n: float) -> str:
+    for unidade in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unidade}" if unidade == "B" else f"{n:.1f} {unidade}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+class PerfilRedeEnxuta:
+    """Regras de rota do contexto que cortam o que a automação não usa: tipos de recurso em REDE_ENXUTA_TIPOS_BLOQUEADOS
+    (imagem, fonte, mídia) em qualquer domínio e, só com REDE_ENXUTA_BLOQUEAR_TERCEIROS (desligado por padrão), tudo
+    que não seja documento fora dos domínios permitidos (analytics, scripts e CSS de terceiros). Só passam pelo Python as requisições que o padrão
+    da rota já apontou como candidatas (terceiros ou extensão pesada); o resto segue direto no navegador.
+    Conta requisições abortadas por tipo e host; os bytes poupados são estimados por REDE_ENXUTA_BYTES_MEDIOS,
+    já que a resposta abortada nunca chega."""
+
+    def __init__(self) -> None:
+        self.dominios = _dominios_permitidos()
+        self.tipos_bloqueados = set(getattr(config, "REDE_ENXUTA_TIPOS_BLOQUEADOS", ["image", "font", "media"]))
+        self.bloquear_terceiros = getattr(config, "REDE_ENXUTA_BLOQUEAR_TERCEIROS", False)
+        self.bloqueadas = 0
+        self.bytes_estimados = 0
+        self.por_tipo: Counter = Counter()
+        self.por_host: Counter = Counter()
+
+    def padrao(self) -> "re.Pattern[str]":
+        """URLs candidatas: host fora da lista de permitidos ou caminho com extensão pesada. O regex vai para o
+        navegador junto com a rota, então as demais requisições não fazem ida e volta ao Python."""
+        hosts = "|".join(re.escape(d) for d in self.dominios)
+        partes = [rf"\.(?:{_EXTENSOES_PESADAS})(?:[?#]|$)"]
+        if self.bloquear_terceiros and hosts:
+            partes.insert(0, rf"^https?://(?!(?:[^/?#]*\.)?(?:{hosts})(?::\d+)?(?:[/?#]|$))")
+        return re.compile("|".join(partes), re.IGNORECASE)
+
+    def permitido(self, host: str) -> bool:
+        host = (host or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.dominios)
+
+    def deve_bloquear(self, url: str, tipo: str) -> bool:
+        """Documentos (abas e navegações) nunca são cortados, mesmo de terceiros."""
+        if tipo == "document":
+            return False
+        if tipo in self.tipos_bloqueados:
+            return True
+        return bool(self.bloquear_terceiros and url.startswith("http") and not self.permitido(urlparse(url).hostname or ""))
+
+    def anotar(self, url: str, tipo: str) -> None:
+        self.bloqueadas += 1
+        self.por_tipo[tipo] += 1
+        self.por_host[urlparse(url).hostname or "?"] += 1
+        medios = getattr(config, "REDE_ENXUTA_BYTES_MEDIOS", {})
+        self.bytes_estimados += int(medios.get(tipo, medios.get("other", 0)))
+
+    def interceptar(self, route: "Route", request: "Request") -> None:
+        if self.deve_bloquear(request.url, request.resource_type):
+            self.anotar(request.url, request.resource_type)
+            route.abort("blockedbyclient")
+        else:
+            route.fallback()
+
+    def resumo(self) -> str:
+        if not self.bloqueadas:
+            return "Rede enxuta: nenhuma requisição bloqueada."
+        tipos = ", ".join(f"{t} {n}" for t, n in self.por_tipo.most_common())
+        hosts = ", ".join(f"{h} {n}" for h, n in self.por_host.most_common(5))
+        return f"Rede enxuta: {self.bloqueadas} requisições bloqueadas (~{_formatar_bytes(self.bytes_estimados)} poupados, estimado). Por tipo: {tipos}. Hosts: {hosts}."
+
+
+def _ativo() -> bool:
+    return bool(getattr(config, "REDE_ENXUTA_ATIVA", False))
+
+
+def instalar_perfil_rede(context: "BrowserContext") -> PerfilRedeEnxuta | None:
+    """Instala o perfil de rede enxuta no contexto (uma vez por contexto). Desligado por REDE_ENXUTA_ATIVA=False."""
+    if not _ativo():
+        return None
+    perfil = _PERFIS.get(id(context))
+    if perfil is None:
+        perfil = PerfilRedeEnxuta()
+        _PERFIS[id(context)] = perfil
+        context.route(perfil.padrao(), perfil.interceptar)
+
+        def _descartar(_ctx) -> None:
+            _PERFIS.pop(id(context), None)
+
+        context.on("close", _descartar)
+    return perfil
+
+
+def obter_perfil_rede(context: "BrowserContext | None") -> PerfilRedeEnxuta | None:
+    if context is None:
+        return None
+    return _PERFIS.get(id(context))
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+import config
+
+if TYPE_CHECKING:
+    from playwright.sync_api import BrowserContext, Page, Response
+
+_COLETORES: Dict[int, "ColetorRespostas"] = {}
+
+
+def _normalizar_chave(chave: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", chave.lower())
+
+
+def _primeiro_valor(registro: dict, chaves: List[str]) -> Any:
+    """Valor do primeiro campo de `registro` cujo nome (sem caixa/pontuação) está em `chaves`."""
+    alvo = {_normalizar_chave(c) for c in chaves}
+    for k, v in registro.items():
+        if _normalizar_chave(str(k)) in alvo and v not in (None, ""):
+            return v
+    return None
+
+
+def _iterar_dicts(dado: Any):
+    if isinstance(dado, dict):
+        yield dado
+        for v in dado.values():
+            yield from _iterar_dicts(v)
+    elif isinstance(dado, list):
+        for item in dado:
+            yield from _iterar_dicts(item)
+
+
+def _digitos(valor: Any) -> str:
+    return re.sub(r"\D", "", str(valor or ""))
+
+
+def _normalizar_status(valor: Any) -> str | None:
+    txt = str(valor or "").strip().lower()
+    if not txt:
+        return None
+    if any(s in txt for s in getattr(config, "REDE_STATUS_ERRO", ["erro", "error"])):
+        return "erro"
+    if any(s in txt for s in getattr(config, "REDE_STATUS_PROCESSANDO", ["processando", "processing"])):
+        return "processando"
+    if any(s in txt for s in getattr(config, "REDE_STATUS_SUCESSO", ["sucesso", "success"])):
+        return "sucesso"
+    return None
+
+
+class ColetorRespostas:
+    """Guarda o status por (CPF, banco) dos payloads JSON do histórico recebidos pelo front-end (XHR/fetch) de um
+    contexto; quem lê cai para o DOM quando não há dado. A simulação não passa por aqui: os avisos de margem e de valor
+    maior que o disponível (e o refazer por Valor Total) só existem no DOM, então o resultado é sempre lido de lá."""
+
+    def __init__(self) -> None:
+        self.status_por_par: Dict[Tuple[str, str], str] = {}
+        self.viu_historico = False
+
+    def registrar(self, resposta: "Response") -> None:
+        try:
+            url = resposta.url.lower()
+            if resposta.request.resource_type not in ("xhr", "fetch"):
+                return
+            if "json" not in (resposta.headers.get("content-type") or ""):
+                return
+            if not any(p in url for p in getattr(config, "REDE_PADROES_URL_HISTORICO", [])):
+                return
+            dado = resposta.json()
+        except Exception:
+            return
+        self._registrar_historico(dado)
+
+    def _registrar_historico(self, dado: Any) -> None:
+        """O histórico vem do mais recente para o mais antigo: como na tabela, vale o primeiro registro de cada par."""
+        vistos: set[Tuple[str, str]] = set()
+        for registro in _iterar_dicts(dado):
+            cpf = _digitos(_primeiro_valor(registro, getattr(config, "REDE_CHAVES_CPF", ["cpf"])))
+            banco = _normalizar_chave(str(_primeiro_valor(registro, getattr(config, "REDE_CHAVES_BANCO", ["banco"])) or ""))
+            status = _normalizar_status(_primeiro_valor(registro, getattr(config, "REDE_CHAVES_STATUS", ["status"])))
+            if len(cpf) != 11 or not banco or status is None:
+                continue
+            par = (cpf, banco)
+            if par in vistos:
+                continue
+            vistos.add(par)
+            self.viu_historico = True
+            self.status_por_par[par] = status
+
+    def status(self, cpf: str, banco: str) -> str | None:
+        """Último status do par recebido pela rede desde `esquecer_consulta` ("erro", "processando", "sucesso") ou None."""
+        banco_l = _normalizar_chave(banco)
+        for (cpf_reg, banco_reg), st in self.status_por_par.items():
+            if cpf_reg == cpf and (banco_l in banco_reg or banco_reg in banco_l):
+                return st
+        return None
+
+    def esquecer_consulta(self, cpf: str, banco: str) -> None:
+        """Chamado antes de "Consultar saldo": o status antigo do par não vale para a nova consulta."""
+        banco_l = _normalizar_chave(banco)
+        for par in [p for p in self.status_por_par if p[0] == cpf and (banco_l in p[1] or p[1] in banco_l)]:
+            del self.status_por_par[par]
+
+
+def instalar_coletor(context: "BrowserContext") -> ColetorRespostas | None:
+    """Passa a ouvir as respostas do contexto (uma vez por contexto). Só com REDE_COLETAR_RESPOSTAS (desligado por padrão)."""
+    if not getattr(config, "REDE_COLETAR_RESPOSTAS", False):
+        return None
+    coletor = _COLETORES.get(id(context))
+    if coletor is None:
+        coletor = ColetorRespostas()
+        _COLETORES[id(context)] = coletor
+        context.on("response", coletor.registrar)
+
+        def _descartar(_ctx) -> None:
+            _COLETORES.pop(id(context), None)
+
+        context.on("close", _descartar)
+    return coletor
+
+
+def obter_coletor(page: "Page | None") -> ColetorRespostas | None:
+    if page is None:
+        return None
+    try:
+        return _COLETORES.get(id(page.context))
+    except Exception:
+        return None
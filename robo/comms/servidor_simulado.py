@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+from robo.comms import api
+
+# Resultado determinístico pelo último dígito do CPF, para reproduzir todos os caminhos do motor:
+# 0 erro na consulta | 1 sem vínculo | 2 autorização pendente | 3 recusa do banco | 4 fica em Processando | demais: sucesso
+_CONSULTAS: dict[str, dict] = {}
+_TRAVA = threading.Lock()
+_CONSULTAS_ATE_CONCLUIR = 2
+
+
+def _rota_regex(rota: str) -> re.Pattern:
+    return re.compile("^/" + re.escape(rota.strip("/")).replace(re.escape("{id}"), r"(?P<id>[\w-]+)") + "/?$")
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _responder(self, codigo: int, corpo: dict) -> None:
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _corpo(self) -> dict:
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(tamanho) or b"{}")
+        except ValueError:
+            return {}
+
+    def do_POST(self) -> None:
+        caminho = self.path.split("?", 1)[0]
+        if _rota_regex(api.ROTA_CONSULTAR).match(caminho):
+            corpo = self._corpo()
+            cpf = re.sub(r"\D", "", str(corpo.get("cpf", "")))
+            if len(cpf) != 11:
+                self._responder(200, {"status": "cpf_invalido", "mensagem": config.UI_TEXTO_CPF_INVALIDO})
+                return
+            if cpf.endswith("1"):
+                self._responder(200, {"status": "sem_vinculo", "mensagem": config.UI_TEXTO_SEM_VINCULO})
+                return
+            if cpf.endswith("2"):
+                self._responder(200, {"status": "autorizacao_pendente", "mensagem": config.UI_TEXTO_MODAL_AUTORIZACAO})
+                return
+            id_consulta = uuid.uuid4().hex
+            with _TRAVA:
+                _CONSULTAS[id_consulta] = {"cpf": cpf, "banco": corpo.get("banco", ""), "leituras": 0}
+            self._responder(202, {"id": id_consulta, "status": "processando"})
+            return
+        m = _rota_regex(api.ROTA_SIMULAR).match(caminho)
+        if m:
+            consulta = _CONSULTAS.get(m.group("id"))
+            if consulta is None:
+                self._responder(404, {"status": "registro_nao_encontrado", "mensagem": config.UI_TEXTO_REGISTRO_NAO_ENCONTRADO_MSG})
+                return
+            corpo = self._corpo()
+            prazo = int(corpo.get("prazo") or 0)
+            valor = round(float(corpo.get("valor") or 0), 2)
+            if corpo.get("tipo") == "valor_total":
+                total = valor
+            elif prazo == 24 and consulta["cpf"].endswith("9"):
+                self._responder(422, {"status": "valor_maior_que_disponivel", "mensagem": config.UI_TEXTO_VALOR_MAIOR_DISPONIVEL})
+                return
+            else:
+                total = round(valor * prazo, 2)
+            parcela = round(total / prazo, 2) if prazo else 0.0
+            self._responder(200, {"qtd_parcelas": prazo, "valor_liberado": round(total * 0.82, 2), "valor_parcela": parcela, "valor_total": total})
+            return
+        self._responder(404, {"mensagem": "rota desconhecida"})
+
+    def do_GET(self) -> None:
+        m = _rota_regex(api.ROTA_CONSULTA).match(self.path.split("?", 1)[0])
+        if not m or m.group("id") not in _CONSULTAS:
+            self._responder(404, {"status": "registro_nao_encontrado", "mensagem": config.UI_TEXTO_REGISTRO_NAO_ENCONTRADO_MSG})
+            return
+        with _TRAVA:
+            consulta = _CONSULTAS[m.group("id")]
+            consulta["leituras"] += 1
+            leituras = consulta["leituras"]
+        cpf = consulta["cpf"]
+        if leituras < _CONSULTAS_ATE_CONCLUIR or cpf.endswith("4"):
+            self._responder(200, {"status": "processando"})
+        elif cpf.endswith("0"):
+            self._responder(200, {"status": "erro", "mensagem": config.UI_TEXTO_ERRO_NA_CONSULTA})
+        elif cpf.endswith("3"):
+            self._responder(200, {"status": "recusa_politica_banco", "mensagem": getattr(config, "UI_TEXTO_RECUSA_POLITICA_BANCO_MSG", "")})
+        else:
+            valor = 150 + int(cpf[-3:]) % 400 + (25 if "celcoin" in str(consulta["banco"]).lower() else 0)
+            self._responder(200, {"status": "sucesso", "valor_maximo_parcela": f"{valor:.2f}"})
+
+
+def criar_servidor(porta: int = 8765, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Servidor HTTP local com o mesmo contrato de `api.ClienteApi` (porta 0 escolhe uma livre)."""
+    return ThreadingHTTPServer((host, porta), _Manipulador)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor simulado das rotas de consulta/simulação (motor api offline)")
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+    servidor = criar_servidor(args.porta)
+    print(f"Servidor simulado em http://127.0.0.1:{servidor.server_address[1]}/ (use --motor api --api-url ...)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -25,13 +25,30 @@ PAUSA_ENTRE_CLIENTES_MS = 50
 PAUSA_APOS_CONSULTAR_MS = 50
 PAUSA_ESPERA_MODAL_CELCOIN_MS = 800
 PAUSA_APOS_RECARREGAR_MS = 800
+PAUSA_MAX_ESPERA_HISTORICO_MS = 4000
 TIMEOUT_NAVEGACAO_VER_RESULTADO_MS = 8000
 TIMEOUT_ESPERA_BLOCO_INLINE_MS = 5000
 PAUSA_APOS_SIMULAR_MS = 100
 PAUSA_APOS_ABRIR_DROPDOWN_TABELA_MS = 450
 TIMEOUT_OPCAO_TABELA_MS = 2500
+# Sem animações (comms/esperas.py): init script zera transições/animações CSS e o contexto emula movimento reduzido;
+# as pausas fixas de transição (dropdowns, Simular, banco, termo) viram esperas por condição
+SEM_ANIMACOES = os.environ.get("ROBO_SEM_ANIMACOES", "1").strip().lower() in ("1", "true", "yes")
 VALOR_MINIMO_PARCELA_SIMULAR = 180
 SLOW_MO_HEADED_MS = 40
+PAUSA_ENTRE_WORKERS_MS = 2000
+TAMANHO_JANELA_PIPELINE = 10
+
+# Índice do histórico (comms/indice_historico.py): uma leitura da tabela, com paginação, para todos os CPFs pendentes
+INDICE_HISTORICO_ATIVO = True
+INTERVALO_INDICE_HISTORICO_MS = 2000
+INDICE_HISTORICO_MAX_PAGINAS = 3
+PAUSA_RELEITURA_INDICE_MS = 800  # par ausente na primeira página: relê uma vez após esta pausa antes de desistir
+INDICE_HISTORICO_BANCOS = ["QiTech", "Celcoin"]
+SELETOR_PROXIMA_PAGINA_HISTORICO = ".pagination-next, button[aria-label*='próxima' i], button[aria-label*='next' i]"
+SELETOR_PAGINA_ANTERIOR_HISTORICO = ".pagination-previous, button[aria-label*='anterior' i], button[aria-label*='previous' i]"
+VARREDURA_MAX_PAGINAS = 10
+VARREDURA_IDADE_MAX_SUCESSO_H = 24
 
 # Paths 
 DIR_ENTRADA_PADRAO = os.path.join(_ROBO_DIR, "entrada")
@@ -40,6 +57,62 @@ DIR_SAIDA_PADRAO = os.path.join(_ROBO_DIR, "saida")
 PREFIXO_CSV_SAIDA = "resultado_"
 FORMATO_DATA_CSV = "%Y%m%d_%H%M%S"
 
+# Leitura da entrada em fluxo (csv_io.LeituraClientes)
+LOTE_LEITURA_CLIENTES = 500
+CSV_AMOSTRA_SNIFFER_BYTES = 65536
+REJEITADAS_DETALHE_MAX = 20
+
+# Diário de resultados (passivos/diario.py): <csv>.diario.jsonl ao lado do CSV final, base do --retomar
+DIARIO_ATIVO = True
+DIARIO_LOTE_REGISTROS = 20
+DIARIO_INTERVALO_FLUSH_S = 30
+SAIDA_FILA_MAX = 64  # registros (par ou cliente) aguardando a thread escritora de passivos/saida.py
+
+# Cache de resultados (passivos/cache_resultados.py, --delta): resultado final por CPF/banco, sem nome/contato/e-mail
+# (mas com o CPF: não versionar); registros vencidos (CACHE_TTL_H) são apagados ao abrir
+CACHE_RESULTADOS_ATIVO = True
+ARQUIVO_CACHE_RESULTADOS = os.path.join(_ROBO_DIR, "sessao", "cache_resultados.sqlite")
+CACHE_TTL_H = float(os.environ.get("ROBO_CACHE_TTL_H", "12"))
+CACHE_STATUS_DEFINITIVOS = ["cpf_invalido", "cpf_nao_encontrado", "recusa_politica_banco", "sem_vinculo"]
+
+# Sessão (storage_state do Playwright; contém cookies de autenticação — não versionar)
+USAR_SESSAO_SALVA = True
+ARQUIVO_SESSAO = os.path.join(_ROBO_DIR, "sessao", "storage_state.json")
+TIMEOUT_VALIDACAO_SESSAO_MS = 8000
+
+# Reset leve da tela de consulta (navegacao.voltar_para_consulta_limpa): sem recarregar o SPA; goto completo só como fallback
+RESET_LEVE_ATIVO = os.environ.get("ROBO_RESET_LEVE", "1").strip().lower() in ("1", "true", "yes")
+RESET_LEVE_MAX_SEGUIDOS = 50
+TIMEOUT_RESET_LEVE_MS = 3000
+SELETOR_FECHAR_MODAL = "[role='dialog'] button[aria-label*='fechar' i], [role='dialog'] button[aria-label*='close' i], .modal button.close, .modal [data-dismiss='modal']"
+
+# Formulário de consulta (comms/formulario.py): campo CPF, banco e botão resolvidos uma vez por carregamento da aba
+TIMEOUT_ACAO_FORMULARIO_MS = 3000
+
+# Registro de estratégias (ordem aprendida dos fallbacks de seleção do banco e do dropdown Tabela)
+APRENDER_ESTRATEGIAS = os.environ.get("ROBO_APRENDER_ESTRATEGIAS", "1").strip().lower() in ("1", "true", "yes")
+ARQUIVO_ESTRATEGIAS = os.path.join(_ROBO_DIR, "sessao", "estrategias.json")
+
+# Timeouts adaptativos (passivos/perfil_timeouts.py): cada ponto de espera mede a latência dos acertos e passa a usar
+# percentil × margem, entre o piso e o valor fixo deste arquivo (que vira teto). TIMEOUTS_MANUAIS fixa um ponto à mão
+TIMEOUTS_ADAPTATIVOS = os.environ.get("ROBO_TIMEOUTS_ADAPTATIVOS", "1").strip().lower() in ("1", "true", "yes")
+ARQUIVO_PERFIL_TIMEOUTS = os.path.join(_ROBO_DIR, "sessao", "perfil_timeouts.json")
+PERFIL_TIMEOUTS_PERCENTIL = 99
+PERFIL_TIMEOUTS_MARGEM = 1.5
+PERFIL_TIMEOUTS_MIN_AMOSTRAS = 30
+PERFIL_TIMEOUTS_JANELA = 500
+PERFIL_TIMEOUTS_PISO_MS = 500
+PERFIL_TIMEOUTS_EXPLORAR_A_CADA = 20
+TIMEOUTS_MANUAIS: dict = {}  # ex.: {"TIMEOUT_VALOR_MAX_MS": 8000, "TIMEOUT_PROCESSAR_MS:linha": 4000}
+
+# Motor API (experimental, --motor api): sem URL padrão, o banco não publica essa API. O motor só sobe com --api-url ou
+# ROBO_API_URL apontando para um servidor com o contrato de comms/api.py (hoje, o servidor_simulado.py)
+API_URL_BASE = os.environ.get("ROBO_API_URL", "")
+API_CHAVES_TOKEN = ["token", "access_token", "accessToken"]
+API_TIMEOUT_S = 20
+API_INTERVALO_STATUS_MS = 1000
+API_CONCORRENCIA = 8
+
 # CSV
 CSV_DELIMITER = ";"
 CSV_ENCODING = "utf-8"
@@ -106,6 +179,7 @@ UI_TABELA_VARIANTES_MESES = {6: ["6 meses (C)", "6 meses"], 12: ["12 meses (C)",
 UI_TEXTO_ERRO_MARGEM_SIMULACAO = "Não foi possível encontrar a margem total para simulação, por favor, refaça a obtenção de saldo"
 UI_TEXTO_LIMITE_OPCOES_MESES = "Limite de opções de meses alcançado"
 TIMEOUT_ESPERA_BLOCO_SIMULACAO_MS = 10000
+TIMEOUT_RESULTADO_SIMULACAO_MS = 12000
 UI_LABEL_TIPO = "Tipo"
 UI_OPCAO_VALOR_PARCELA = "Valor da parcela"
 UI_OPCAO_VALOR_TOTAL = "Valor total"
@@ -134,3 +208,25 @@ STATUS_CONSULTA_SEM_SIMULACAO = "consulta_ok_sem_simulacao"
 ERRO_SIMULACAO_NAO_REALIZADA = "Simulação não realizada (Tabela não preenchida ou sem opções)."
 DEBUG_TABELA = os.environ.get("ROBO_DEBUG_TABELA", "").strip().lower() in ("1", "true", "yes")
 TIMEOUT_VALIDACAO_OPCOES_TABELA_MS = 800
+# Coletor de respostas JSON do histórico (comms/rede.py): opcional, o DOM continua sendo a fonte do status
+REDE_COLETAR_RESPOSTAS = os.environ.get("ROBO_COLETAR_RESPOSTAS", "").strip().lower() in ("1", "true", "yes")
+
+# Perfil de rede enxuta (comms/perfil_rede.py): aborta imagens, fontes e mídia em todo contexto; recursos de terceiros
+# (scripts, CSS, XHR fora dos domínios permitidos) só com ROBO_REDE_ENXUTA_TERCEIROS=1
+REDE_ENXUTA_ATIVA = os.environ.get("ROBO_REDE_ENXUTA", "1").strip().lower() in ("1", "true", "yes")
+REDE_ENXUTA_BLOQUEAR_TERCEIROS = os.environ.get("ROBO_REDE_ENXUTA_TERCEIROS", "").strip().lower() in ("1", "true", "yes")
+REDE_ENXUTA_TIPOS_BLOQUEADOS = ["image", "font", "media"]
+# Além do host do admin, da API e de URL_TERMO_DOMAINS (subdomínios incluídos); ex.: ROBO_REDE_ENXUTA_DOMINIOS="bancoprata.com.br,www.google.com"
+REDE_ENXUTA_DOMINIOS_EXTRAS = [d.strip() for d in os.environ.get("ROBO_REDE_ENXUTA_DOMINIOS", "bancoprata.com.br").split(",") if d.strip()]
+# Tamanho médio (bytes) por tipo de recurso, só para estimar o que foi poupado no resumo
+REDE_ENXUTA_BYTES_MEDIOS = {"image": 25000, "font": 35000, "media": 400000, "script": 60000, "stylesheet": 20000, "xhr": 2000, "fetch": 2000, "other": 5000}
+# Só status do histórico (a simulação fica no DOM). Padrões e nomes de campo abaixo são genéricos, não conferidos contra
+# o tráfego do admin: ajuste com ROBO_REDE_URLS_HISTORICO / ROBO_REDE_CHAVES_{CPF,BANCO,STATUS} (listas separadas por vírgula)
+REDE_PADROES_URL_HISTORICO = [p.strip().lower() for p in os.environ.get("ROBO_REDE_URLS_HISTORICO", "consult,historic,history,balance,saldo").split(",") if p.strip()]
+REDE_CHAVES_CPF = [c.strip() for c in os.environ.get("ROBO_REDE_CHAVES_CPF", "cpf,document,documentNumber,documento").split(",") if c.strip()]
+REDE_CHAVES_BANCO = [c.strip() for c in os.environ.get("ROBO_REDE_CHAVES_BANCO", "bank,banco,bankName,provider").split(",") if c.strip()]
+REDE_CHAVES_STATUS = [c.strip() for c in os.environ.get("ROBO_REDE_CHAVES_STATUS", "status,situacao,state").split(",") if c.strip()]
+REDE_STATUS_SUCESSO = ["sucesso", "success", "completed", "done", "finished"]
+REDE_STATUS_ERRO = ["erro", "error", "fail"]
+REDE_STATUS_PROCESSANDO = ["processando", "processing", "pending", "queued"]
+SIMULAR_PRAZOS_EM_ABAS = os.environ.get("ROBO_SIMULAR_PRAZOS_EM_ABAS", "").strip().lower() in ("1", "true", "yes")
@@ -3,6 +3,8 @@ import os
 
 import config
 from robo.ativos.executor import executar_robo
+from robo.ativos.motor_api import executar_robo_api
+from robo.ativos.shards import executar_em_shards
 
 
 def main() -> None:
@@ -11,9 +13,55 @@ def main() -> None:
     default_entrada = os.path.join(config.DIR_ENTRADA_PADRAO, config.ARQUIVO_ENTRADA_PADRAO)
     parser.add_argument("--entrada", default=default_entrada, help="Caminho do CSV de entrada")
     parser.add_argument("--saida", default=config.DIR_SAIDA_PADRAO, help="Pasta de saída do CSV")
+    parser.add_argument("--workers", type=int, default=1, help="Quantidade de navegadores em paralelo consumindo a fila de clientes")
+    parser.add_argument("--motor", choices=["sync", "api"], default="sync", help="Motor de execução; 'api' (experimental) chama as rotas HTTP sem navegador")
+    parser.add_argument("--shards", type=int, default=1, help="Divide a entrada por hash do CPF em K subprocessos e mescla os resultados")
+    parser.add_argument("--arquivo-saida", default=None, help="Caminho exato do CSV de saída (com --shards, o CSV mesclado; as partes ficam ao lado)")
+    parser.add_argument("--pipeline", action="store_true", help="Envia as consultas de uma janela de clientes e só depois colhe o histórico (motor sync)")
+    parser.add_argument("--bancos-paralelos", action="store_true", help="Consulta QiTech e Celcoin ao mesmo tempo, em duas abas do mesmo contexto (motor sync)")
+    parser.add_argument("--varredura-historico", action="store_true", help="Antes do loop, lê o histórico uma vez: colhe quem já tem Sucesso e só consulta os pares restantes (motor sync)")
+    parser.add_argument("--retomar", default=None, metavar="DIARIO", help="Retoma uma execução interrompida a partir do diário (resultado_*.diario.jsonl): pula os pares já registrados (motor sync)")
+    parser.add_argument("--delta", action="store_true", help="Só consulta CPFs ausentes ou vencidos (CACHE_TTL_H) no cache de resultados; os demais vêm do cache, sem navegador (motor sync)")
+    parser.add_argument("--api-url", default=None, help="URL base das rotas do motor api (ex.: servidor simulado em http://127.0.0.1:8765/)")
+    parser.add_argument("--nova-sessao", action="store_true", help="Descarta a sessão salva e faz login completo")
     args = parser.parse_args()
     headless = args.headless or os.environ.get("ROBO_HEADLESS", "").strip().lower() in ("1", "true", "yes")
-    executar_robo(caminho_entrada=args.entrada, dir_saida=args.saida, headless=headless)
+    if args.retomar and (args.shards > 1 or args.motor != "sync"):
+        parser.error("--retomar só funciona com o motor sync e sem --shards")
+    if args.pipeline and args.bancos_paralelos:
+        parser.error("--bancos-paralelos não se combina com --pipeline (o pipeline já sobrepõe as consultas de uma janela)")
+    if args.delta and args.motor != "sync":
+        parser.error("--delta só funciona com o motor sync")
+    if args.motor == "api":
+        if not (args.api_url or config.API_URL_BASE):
+            parser.error("--motor api exige --api-url (ou ROBO_API_URL): o robô não conhece a URL da API do banco")
+        if args.api_url:
+            os.environ["ROBO_API_URL"] = args.api_url  # os shards herdam a URL pelo ambiente
+    if args.shards > 1:
+        executar_em_shards(caminho_entrada=args.entrada, dir_saida=args.saida, shards=args.shards, headless=headless, workers=args.workers, motor=args.motor, pipeline=args.pipeline, bancos_paralelos=args.bancos_paralelos, varredura_historico=args.varredura_historico, delta=args.delta, nova_sessao=args.nova_sessao, caminho_saida=args.arquivo_saida)
+        return
+    if args.motor == "api":
+        executar_robo_api(
+            caminho_entrada=args.entrada,
+            dir_saida=args.saida,
+            concorrencia=args.workers if args.workers > 1 else None,
+            caminho_saida=args.arquivo_saida,
+            url_base=args.api_url,
+        )
+        return
+    executar_robo(
+        caminho_entrada=args.entrada,
+        dir_saida=args.saida,
+        headless=headless,
+        workers=args.workers,
+        nova_sessao=args.nova_sessao,
+        caminho_saida=args.arquivo_saida,
+        pipeline=args.pipeline,
+        bancos_paralelos=args.bancos_paralelos,
+        varredura_historico=args.varredura_historico,
+        retomar=args.retomar,
+        delta=args.delta,
+    )
 
 
 if __name__ == "__main__":
@@ -1,9 +1,14 @@
-from robo.passivos.modelos import Cliente, TermoRequisicaoMalFormatada
+from robo.passivos.modelos import Cliente, ErroApi, TermoRequisicaoMalFormatada
 from robo.passivos.cpf_utils import cpf_com_mascara, cpf_valido_11, normalizar_cpf
-from robo.passivos.csv_io import criar_caminho_csv_saida, ler_clientes, log_critico, salvar_dataframe_final
+from robo.passivos.cache_resultados import CacheResultados
+from robo.passivos.csv_io import criar_caminho_csv_saida, ler_clientes, log_critico, mesclar_csvs_saida, salvar_dataframe_final
+from robo.passivos.diario import DiarioResultados, caminho_diario_para, caminho_saida_do_diario
+from robo.passivos.perfil_timeouts import PerfilTimeouts, obter_perfil
+from robo.passivos.saida import SaidaResultados
 
 __all__ = [
     "Cliente",
+    "ErroApi",
     "TermoRequisicaoMalFormatada",
     "cpf_com_mascara",
     "cpf_valido_11",
@@ -11,5 +16,13 @@ __all__ = [
     "criar_caminho_csv_saida",
     "ler_clientes",
     "log_critico",
+    "mesclar_csvs_saida",
     "salvar_dataframe_final",
+    "DiarioResultados",
+    "caminho_diario_para",
+    "caminho_saida_do_diario",
+    "SaidaResultados",
+    "CacheResultados",
+    "PerfilTimeouts",
+    "obter_perfil",
 ]
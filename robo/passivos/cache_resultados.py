@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List
+
+import config
+
+_STATUS_ENCERRAM_CLIENTE = ("cpf_invalido", "cpf_nao_encontrado")  # mesmos casos em que processar_cliente_banco encerra o cliente
+_CAMPOS_PESSOAIS = ("nome", "contato", "email")  # não vão para o cache; quem reaproveita repõe os da entrada atual
+
+
+class CacheResultados:
+    """Cache local (SQLite) do resultado final de cada par CPF/banco: valor máximo, linhas de simulação e status.
+    Só entram pares concluídos com resultado (sem linha de erro) ou com erro definitivo (CACHE_STATUS_DEFINITIVOS);
+    falhas de tela e timeouts ficam de fora para serem tentados de novo. As linhas são gravadas sem nome, contato e
+    e-mail. `obter` devolve as linhas se o registro tiver menos de `ttl_h` horas; os vencidos são apagados ao abrir.
+    Uma conexão compartilhada com trava (workers e thread escritora)."""
+
+    def __init__(self, caminho: str, ttl_h: float | None = None) -> None:
+        self.caminho = caminho
+        self.ttl_h = ttl_h if ttl_h is not None else getattr(config, "CACHE_TTL_H", 12)
+        dir_cache = os.path.dirname(caminho)
+        if dir_cache:
+            os.makedirs(dir_cache, exist_ok=True)
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False)  # timeout: shards gravam no mesmo arquivo
+        with self._trava, self._conexao:
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS resultados ("
+                " cpf TEXT NOT NULL, banco TEXT NOT NULL, gravado_em REAL NOT NULL,"
+                " status TEXT, valor_maximo_parcela TEXT, linhas TEXT NOT NULL,"
+                " PRIMARY KEY (cpf, banco))"
+            )
+        self.expurgar()
+
+    @staticmethod
+    def cacheavel(linhas: List[dict]) -> bool:
+        if not linhas:
+            return False
+        definitivos = set(getattr(config, "CACHE_STATUS_DEFINITIVOS", ()))
+        return all(l.get("tipo") != "erro" or l.get("status") in definitivos for l in linhas)
+
+    def gravar(self, cpf: str, banco: str, linhas: List[dict]) -> bool:
+        """Grava (ou substitui) o par se `cacheavel`; devolve se gravou."""
+        if not cpf or not banco or not self.cacheavel(linhas):
+            return False
+        erro = next((l for l in linhas if l.get("tipo") == "erro"), None)
+        status = (erro or linhas[0]).get("status", "")
+        valor_maximo = next((str(l.get("valor_maximo_parcela") or "") for l in linhas if l.get("valor_maximo_parcela")), "")
+        sem_pessoais = [{k: v for k, v in l.items() if k not in _CAMPOS_PESSOAIS} for l in linhas]
+        with self._trava, self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO resultados (cpf, banco, gravado_em, status, valor_maximo_parcela, linhas) VALUES (?, ?, ?, ?, ?, ?)",
+                (cpf, banco, time.time(), status, valor_maximo, json.dumps(sem_pessoais, ensure_ascii=False)),
+            )
+        return True
+
+    def expurgar(self) -> int:
+        """Apaga os registros com mais de `ttl_h` horas (já não servem ao `--delta`); devolve quantos saíram."""
+        limite = time.time() - self.ttl_h * 3600
+        with self._trava, self._conexao:
+            return self._conexao.execute("DELETE FROM resultados WHERE gravado_em < ?", (limite,)).rowcount
+
+    def obter(self, cpf: str, banco: str) -> List[dict] | None:
+        """Linhas do par se o registro ainda está dentro do TTL; None se ausente ou vencido."""
+        limite = time.time() - self.ttl_h * 3600
+        with self._trava:
+            linha = self._conexao.execute(
+                "SELECT linhas FROM resultados WHERE cpf = ? AND banco = ? AND gravado_em >= ?", (cpf, banco, limite)
+            ).fetchone()
+        if linha is None:
+            return None
+        try:
+            return json.loads(linha[0])
+        except ValueError:
+            return None
+
+    @staticmethod
+    def encerra_cliente(linhas: List[dict]) -> bool:
+        """Par cujo resultado encerra o cliente sem tentar o próximo banco (CPF inválido / não encontrado)."""
+        return any(l.get("tipo") == "erro" and l.get("status") in _STATUS_ENCERRAM_CLIENTE for l in linhas)
+
+    def fechar(self) -> None:
+        with self._trava:
+            self._conexao.close()
+
+
+def abrir_cache() -> CacheResultados | None:
+    """Cache em config.ARQUIVO_CACHE_RESULTADOS; None com CACHE_RESULTADOS_ATIVO=False."""
+    if not getattr(config, "CACHE_RESULTADOS_ATIVO", True):
+        return None
+    try:
+        return CacheResultados(getattr(config, "ARQUIVO_CACHE_RESULTADOS", os.path.join(config.DIR_SAIDA_PADRAO, "cache_resultados.sqlite")))
+    except sqlite3.Error as e:
+        print(f"Cache de resultados indisponível: {e}")
+        return None
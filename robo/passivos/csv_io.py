@@ -3,14 +3,15 @@ from __future__ import annotations
 import csv
 import os
 from datetime import datetime
-from typing import List
-
-import pandas as pd
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List
 
 import config
 from robo.passivos.cpf_utils import normalizar_cpf
 from robo.passivos.modelos import Cliente
 
+if TYPE_CHECKING:
+    from robo.passivos.saida import SaidaResultados
+
 
 def garantir_pasta_saida(caminho_saida: str) -> str:
     os.makedirs(caminho_saida, exist_ok=True)
@@ -38,7 +39,7 @@ def escrever_linha_saida(caminho_saida: str, valores: List[str]) -> None:
         csv.writer(f, delimiter=config.CSV_DELIMITER).writerow(valores)
 
 
-def log_critico(lista_saida: list, cliente: Cliente, banco: str, status: str, erro: str) -> None:
+def log_critico(lista_saida: "list | SaidaResultados", cliente: Cliente, banco: str, status: str, erro: str) -> None:
     print(f"[{status}] CPF={cliente.cpf} BANCO={banco} ERRO={erro}")
     lista_saida.append({
         "nome": cliente.nome, "cpf": cliente.cpf, "contato": cliente.contato, "email": cliente.email,
@@ -47,46 +48,177 @@ def log_critico(lista_saida: list, cliente: Cliente, banco: str, status: str, er
     })
 
 
-def salvar_dataframe_final(caminho_saida: str, lista_saida: list) -> None:
+def salvar_dataframe_final(caminho_saida: str, lista_saida: Iterable[dict]) -> None:
+    """Grava o CSV final linha a linha (aceita lista, `SaidaResultados` ou o gerador do diário), sem montar
+    cópias intermediárias; o arquivo só é criado se houver ao menos uma linha."""
     dir_saida = os.path.dirname(caminho_saida)
     if dir_saida:
         garantir_pasta_saida(dir_saida)
     colunas = config.CSV_COLUNAS_SAIDA
-    linhas_csv: list[dict] = []
-    for r in lista_saida:
-        if r.get("tipo") not in ("parcela", "limite_meses", "erro"):
+    gravadas = 0
+    contagem = 0
+    arquivo = None
+    writer = None
+    try:
+        for r in lista_saida:
+            if r.get("tipo") not in ("parcela", "limite_meses", "erro"):
+                continue
+            if writer is None:
+                arquivo = open(caminho_saida, "w", newline="", encoding=config.CSV_ENCODING)
+                writer = csv.writer(arquivo, delimiter=config.CSV_DELIMITER, lineterminator="\n")
+                writer.writerow(colunas)
+            writer.writerow(["" if r.get(c) is None else str(r.get(c, "")).strip() for c in colunas])
+            gravadas += 1
+            if r.get("tipo") == "parcela":
+                contagem += 1
+    finally:
+        if arquivo is not None:
+            arquivo.close()
+    print(f"Linhas gravadas: {gravadas} (parcelas: {contagem})")
+
+
+def mesclar_csvs_saida(caminhos_partes: List[str], caminho_saida: str, ordem_cpfs: List[str]) -> None:
+    """Junta CSVs de saída parciais (ex.: um por shard) num único arquivo, ordenando as linhas
+    pela posição do CPF na entrada original. Partes ausentes (shard que falhou) são ignoradas."""
+    ordem: dict[str, int] = {}
+    for cpf in ordem_cpfs:
+        ordem.setdefault(cpf, len(ordem))
+    cabecalho: List[str] | None = None
+    linhas: List[List[str]] = []
+    for caminho in caminhos_partes:
+        if not os.path.exists(caminho):
+            print(f"Parte ausente, ignorada: {caminho}")
             continue
-        row = {}
-        for c in colunas:
-            v = r.get(c, "")
-            row[c] = "" if v is None else str(v).strip()
-        linhas_csv.append(row)
-    if linhas_csv:
-        df_final = pd.DataFrame(linhas_csv, columns=colunas)
-        df_final.to_csv(caminho_saida, sep=config.CSV_DELIMITER, index=False, encoding=config.CSV_ENCODING)
-    contagem = sum(1 for r in lista_saida if r.get("tipo") == "parcela")
-    print(f"Linhas gravadas: {len(linhas_csv)} (parcelas: {contagem})")
+        with open(caminho, newline="", encoding=config.CSV_ENCODING) as f:
+            reader = csv.reader(f, delimiter=config.CSV_DELIMITER)
+            cab = next(reader, None)
+            if cab is None:
+                continue
+            if cabecalho is None:
+                cabecalho = cab
+            linhas.extend(reader)
+    if cabecalho is None:
+        print("Nenhuma parte com resultados para mesclar.")
+        return
+    i_cpf = cabecalho.index("cpf")
+    linhas.sort(key=lambda l: ordem.get(l[i_cpf] if len(l) > i_cpf else "", len(ordem)))
+    dir_saida = os.path.dirname(caminho_saida)
+    if dir_saida:
+        garantir_pasta_saida(dir_saida)
+    with open(caminho_saida, "w", newline="", encoding=config.CSV_ENCODING) as f:
+        writer = csv.writer(f, delimiter=config.CSV_DELIMITER)
+        writer.writerow(cabecalho)
+        writer.writerows(linhas)
+    print(f"Linhas mescladas: {len(linhas)} de {len(caminhos_partes)} partes")
+
+
+def particionar_clientes(clientes: Iterable[Cliente], caminhos: List[str], escolher: Callable[[Cliente], int]) -> List[int]:
+    """Grava cada cliente, em fluxo, no CSV de entrada `caminhos[escolher(cliente)]` (partes dos shards).
+    Só cria os arquivos que recebem clientes; devolve quantos foram para cada um."""
+    tamanhos = [0] * len(caminhos)
+    arquivos: dict[int, tuple] = {}
+    try:
+        for cliente in clientes:
+            k = escolher(cliente)
+            if k not in arquivos:
+                f = open(caminhos[k], "w", newline="", encoding=config.CSV_ENCODING)
+                writer = csv.writer(f, delimiter=",")
+                writer.writerow(["nome", "cpf", "contato", "email"])
+                arquivos[k] = (f, writer)
+            arquivos[k][1].writerow([cliente.nome, cliente.cpf, cliente.contato, cliente.email])
+            tamanhos[k] += 1
+    finally:
+        for f, _writer in arquivos.values():
+            f.close()
+    return tamanhos
+
+
+def escrever_clientes(caminho_csv: str, clientes: List[Cliente]) -> None:
+    with open(caminho_csv, "w", newline="", encoding=config.CSV_ENCODING) as f:
+        writer = csv.writer(f, delimiter=",")
+        writer.writerow(["nome", "cpf", "contato", "email"])
+        for c in clientes:
+            writer.writerow([c.nome, c.cpf, c.contato, c.email])
+
+
+def _detectar_dialeto(f) -> type[csv.Dialect] | csv.Dialect:
+    """Sniffer sobre as primeiras CSV_AMOSTRA_SNIFFER_BYTES (só linhas completas); cai para vírgula."""
+    amostra = f.read(getattr(config, "CSV_AMOSTRA_SNIFFER_BYTES", 65536))
+    f.seek(0)
+    if "\n" in amostra:
+        amostra = amostra[: amostra.rindex("\n") + 1]
+    try:
+        return csv.Sniffer().sniff(amostra, delimiters=",;")
+    except csv.Error:
+        dialect = csv.excel
+        dialect.delimiter = ","
+        return dialect
+
+
+class LeituraClientes:
+    """Leitura em fluxo do CSV de entrada: `lotes()` entrega listas de até `tamanho_lote` clientes
+    (LOTE_LEITURA_CLIENTES) e iterar a leitura entrega um cliente por vez. Valida e remove CPFs repetidos
+    enquanto lê; só a posição de cada CPF fica em memória (`ordem`, usada para ordenar o CSV final).
+    Linhas sem nome ou CPF contam em `rejeitadas` (as primeiras REJEITADAS_DETALHE_MAX ficam em `exemplos_rejeitadas`)."""
+
+    def __init__(self, caminho_csv: str, tamanho_lote: int | None = None, deduplicar: bool = True) -> None:
+        self.caminho_csv = caminho_csv
+        self.tamanho_lote = max(1, tamanho_lote or getattr(config, "LOTE_LEITURA_CLIENTES", 500))
+        self.deduplicar = deduplicar
+        self.ordem: dict[str, int] = {}
+        self.lidas = 0
+        self.rejeitadas = 0
+        self.duplicadas = 0
+        self.exemplos_rejeitadas: List[tuple[int, str]] = []
+        self.concluida = False
+
+    def _rejeitar(self, numero_linha: int, motivo: str) -> None:
+        self.rejeitadas += 1
+        if len(self.exemplos_rejeitadas) < getattr(config, "REJEITADAS_DETALHE_MAX", 20):
+            self.exemplos_rejeitadas.append((numero_linha, motivo))
+
+    def __iter__(self) -> Iterator[Cliente]:
+        for lote in self.lotes():
+            yield from lote
+
+    def lotes(self) -> Iterator[List[Cliente]]:
+        with open(self.caminho_csv, newline="", encoding=config.CSV_ENCODING) as f:
+            reader = csv.DictReader(f, dialect=_detectar_dialeto(f))
+            if not reader.fieldnames or "nome" not in reader.fieldnames or "cpf" not in reader.fieldnames:
+                raise ValueError("CSV deve conter colunas 'nome' e 'cpf'")
+            lote: List[Cliente] = []
+            for row in reader:
+                self.lidas += 1
+                nome = (row.get("nome") or "").strip()
+                cpf = normalizar_cpf(row.get("cpf") or "")
+                if not cpf or not nome:
+                    self._rejeitar(reader.line_num, "sem CPF" if not cpf else "sem nome")
+                    continue
+                if cpf in self.ordem:
+                    if self.deduplicar:
+                        self.duplicadas += 1
+                        continue
+                else:
+                    self.ordem[cpf] = len(self.ordem)
+                lote.append(Cliente(nome=nome, cpf=cpf, contato=(row.get("contato") or "").strip(), email=(row.get("email") or "").strip()))
+                if len(lote) >= self.tamanho_lote:
+                    yield lote
+                    lote = []
+            if lote:
+                yield lote
+        self.concluida = True
+        print(self.resumo())
+
+    def resumo(self) -> str:
+        texto = f"Entrada: {self.lidas} linhas lidas, {len(self.ordem)} CPFs, {self.duplicadas} repetidos, {self.rejeitadas} rejeitadas."
+        for numero_linha, motivo in self.exemplos_rejeitadas:
+            texto += f"\n  linha {numero_linha}: {motivo}"
+        return texto
 
 
 def ler_clientes(caminho_csv: str) -> List[Cliente]:
+    """Lista completa (sem deduplicar), para quem precisa de todos os clientes de uma vez."""
     clientes: List[Cliente] = []
-    with open(caminho_csv, newline="", encoding=config.CSV_ENCODING) as f:
-        amostra = f.read(2048)
-        f.seek(0)
-        try:
-            dialect = csv.Sniffer().sniff(amostra, delimiters=",;")
-        except csv.Error:
-            dialect = csv.excel
-            dialect.delimiter = ","
-        reader = csv.DictReader(f, dialect=dialect)
-        if not reader.fieldnames or "nome" not in reader.fieldnames or "cpf" not in reader.fieldnames:
-            raise ValueError("CSV deve conter colunas 'nome' e 'cpf'")
-        for row in reader:
-            nome = row.get("nome", "").strip()
-            cpf = normalizar_cpf(row.get("cpf", ""))
-            contato = row.get("contato", "").strip()
-            email = row.get("email", "").strip()
-            if not cpf or not nome:
-                continue
-            clientes.append(Cliente(nome=nome, cpf=cpf, contato=contato, email=email))
+    for lote in LeituraClientes(caminho_csv, deduplicar=False).lotes():
+        clientes.extend(lote)
     return clientes
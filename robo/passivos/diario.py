@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Iterable, Iterator, List, Mapping, Set, Tuple
+
+import config
+
+_ORDEM_BANCOS = ("qitech", "celcoin")
+
+
+def posicao_banco(banco: str) -> int:
+    """Posição do banco na ordem de consulta (QiTech, Celcoin) para o CSV final; linhas sem banco vêm antes."""
+    chave = (banco or "").replace(" ", "").lower()
+    return _ORDEM_BANCOS.index(chave) if chave in _ORDEM_BANCOS else -1
+
+
+def caminho_diario_para(caminho_saida: str) -> str:
+    """`resultado_X.csv` -> `resultado_X.diario.jsonl` (mesma pasta do CSV final)."""
+    return os.path.splitext(caminho_saida)[0] + ".diario.jsonl"
+
+
+def caminho_saida_do_diario(caminho_diario: str) -> str:
+    """Inverso de `caminho_diario_para`: CSV final de uma execução retomada."""
+    base = caminho_diario[: -len(".diario.jsonl")] if caminho_diario.endswith(".diario.jsonl") else os.path.splitext(caminho_diario)[0]
+    return base + ".csv"
+
+
+class DiarioResultados:
+    """Diário append-only (JSONL) das linhas de saída. Cada registro é um par CPF/banco concluído
+    ({"cpf", "banco", "linhas"}), o fim de um cliente ({"cpf", "cliente_concluido": true, "linhas"}) ou linhas
+    de um cliente ainda não concluído ({"cpf", "linhas"}).
+    As escritas ficam em buffer e vão para o disco em lotes (DIARIO_LOTE_REGISTROS registros ou
+    DIARIO_INTERVALO_FLUSH_S segundos, com fsync). Um diário existente é carregado: `pares_concluidos` e
+    `clientes_concluidos` dizem o que pular ao retomar. Seguro para os workers (uma trava)."""
+
+    def __init__(self, caminho: str, tamanho_lote: int | None = None, intervalo_s: float | None = None) -> None:
+        self.caminho = caminho
+        self.tamanho_lote = max(1, tamanho_lote or getattr(config, "DIARIO_LOTE_REGISTROS", 20))
+        self.intervalo_s = intervalo_s if intervalo_s is not None else getattr(config, "DIARIO_INTERVALO_FLUSH_S", 30)
+        self.pares_concluidos: Set[Tuple[str, str]] = set()
+        self.clientes_concluidos: Set[str] = set()
+        self._buffer: List[str] = []
+        self._trava = threading.Lock()
+        self._ultimo_flush = time.monotonic()
+        self._quebra_pendente = False
+        if os.path.exists(caminho):
+            for registro in self._registros():
+                self._anotar(registro)
+            with open(caminho, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    self._quebra_pendente = f.read(1) != b"\n"
+
+    def _registros(self) -> Iterable[dict]:
+        with open(self.caminho, encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except ValueError:
+                    continue  # última linha cortada por uma queda no meio da escrita
+                if isinstance(registro, dict) and registro.get("cpf"):
+                    yield registro
+
+    def _anotar(self, registro: dict) -> None:
+        if registro.get("banco"):
+            self.pares_concluidos.add((registro["cpf"], registro["banco"]))
+        if registro.get("cliente_concluido"):
+            self.clientes_concluidos.add(registro["cpf"])
+
+    def _anexar(self, registro: dict) -> None:
+        with self._trava:
+            self._anotar(registro)
+            self._buffer.append(json.dumps(registro, ensure_ascii=False))
+            if len(self._buffer) >= self.tamanho_lote or time.monotonic() - self._ultimo_flush >= self.intervalo_s:
+                self._descarregar()
+
+    def _descarregar(self) -> None:
+        if self._buffer:
+            dir_diario = os.path.dirname(self.caminho)
+            if dir_diario:
+                os.makedirs(dir_diario, exist_ok=True)
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                if self._quebra_pendente:
+                    f.write("\n")  # isola a linha cortada da execução anterior
+                    self._quebra_pendente = False
+                f.write("\n".join(self._buffer) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._buffer.clear()
+        self._ultimo_flush = time.monotonic()
+
+    def registrar_par(self, cpf: str, banco: str, linhas: List[dict]) -> None:
+        """Par CPF/banco concluído com as linhas que ele gerou (parcelas, limite_meses ou erro)."""
+        self._anexar({"cpf": cpf, "banco": banco, "linhas": list(linhas)})
+
+    def registrar_linhas(self, cpf: str, linhas: List[dict]) -> None:
+        """Linhas de um cliente ainda não concluído (o par fica para uma colheita posterior); não marca nada para a retomada."""
+        self._anexar({"cpf": cpf, "linhas": list(linhas)})
+
+    def concluir_cliente(self, cpf: str, linhas: List[dict] | None = None) -> None:
+        """Fim do cliente (inclui linhas sem par, como CPF inválido ou erro geral). Ao retomar, ele é pulado."""
+        self._anexar({"cpf": cpf, "cliente_concluido": True, "linhas": list(linhas or [])})
+
+    def descarregar(self) -> None:
+        with self._trava:
+            self._descarregar()
+
+    def iterar_linhas(self, ordem: Mapping[str, int] | None = None) -> Iterator[dict]:
+        """Linhas de saída gravadas no diário, em fluxo (base do CSV final). Com `ordem` (CPF -> posição na entrada),
+        os registros saem na ordem da entrada e, dentro do CPF, na ordem dos bancos (um par colhido depois, como os
+        Processando da varredura, não troca QiTech e Celcoin de lugar). Registros sem banco (fim de cliente, janela do
+        pipeline) entram uma vez por banco das suas linhas, então também seguem essa ordem. Uma primeira passada
+        guarda só (posição, banco, offset) de cada registro e a segunda relê um registro por vez, então a memória não
+        cresce com o número de linhas."""
+        self.descarregar()
+        if not os.path.exists(self.caminho):
+            return
+        ordem = ordem or {}
+        posicoes: List[Tuple[int, int, int, str | None]] = []
+        with open(self.caminho, "rb") as f:
+            offset = 0
+            for bruta in f:
+                try:
+                    registro = json.loads(bruta)
+                    cpf, banco = registro.get("cpf", ""), registro.get("banco", "")
+                    linhas = registro.get("linhas") or []
+                except (ValueError, AttributeError):
+                    cpf, banco, linhas = "", "", []
+                if cpf:
+                    pos = ordem.get(cpf, len(ordem))
+                    if banco:
+                        posicoes.append((pos, posicao_banco(banco), offset, None))
+                    else:
+                        for banco_linha in dict.fromkeys(str(l.get("banco") or "") for l in linhas):
+                            posicoes.append((pos, posicao_banco(banco_linha), offset, banco_linha))
+                offset += len(bruta)
+            posicoes.sort()
+            for _pos, _banco, offset, filtro in posicoes:
+                f.seek(offset)
+                linhas = json.loads(f.readline()).get("linhas") or []
+                if filtro is None:
+                    yield from linhas
+                else:
+                    yield from (l for l in linhas if str(l.get("banco") or "") == filtro)
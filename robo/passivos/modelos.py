@@ -7,6 +7,12 @@ class TermoRequisicaoMalFormatada(Exception):
     pass
 
 
+class ErroApi(Exception):
+    def __init__(self, mensagem: str, status_http: int = 0) -> None:
+        super().__init__(mensagem)
+        self.status_http = status_http
+
+
 @dataclass
 class Cliente:
     nome: str
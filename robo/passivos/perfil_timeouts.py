@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, TypeVar
+
+import config
+
+_PERFIL: "PerfilTimeouts | None" = None
+_TRAVA_PERFIL = threading.Lock()
+
+T = TypeVar("T")
+
+
+def _base_config(nome: str) -> int:
+    """Valor fixo do ponto de espera: "TIMEOUT_X_MS" ou "TIMEOUT_X_MS:local" lêem config.TIMEOUT_X_MS."""
+    return int(getattr(config, nome.split(":", 1)[0], 10000))
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    """Percentil pelo posto mais próximo (valores já ordenados)."""
+    posto = max(1, math.ceil(p / 100 * len(valores)))
+    return valores[min(posto, len(valores)) - 1]
+
+
+class PerfilTimeouts:
+    """Latências observadas por ponto de espera (nome = chave do config, com sufixo ":local" quando o mesmo valor serve
+    a esperas diferentes). Guarda as últimas PERFIL_TIMEOUTS_JANELA latências de acerto de cada ponto; `timeout` devolve
+    percentil (PERFIL_TIMEOUTS_PERCENTIL) × PERFIL_TIMEOUTS_MARGEM, entre PERFIL_TIMEOUTS_PISO_MS e o valor fixo do config,
+    que continua sendo o teto. Com menos de PERFIL_TIMEOUTS_MIN_AMOSTRAS, e a cada PERFIL_TIMEOUTS_EXPLORAR_A_CADA usos,
+    vale o valor fixo: assim um acerto mais lento que o timeout aprendido ainda é observado e o perfil se corrige.
+    Persistido em JSON entre execuções."""
+
+    def __init__(self, caminho: str | None = None) -> None:
+        self.caminho = caminho
+        self.amostras: Dict[str, List[float]] = {}
+        self.estouros: Dict[str, int] = {}
+        self._usos: Dict[str, int] = {}
+        self._trava = threading.Lock()
+        self._alterado = False
+        if caminho and os.path.exists(caminho):
+            try:
+                with open(caminho, encoding="utf-8") as f:
+                    dado = json.load(f)
+                if isinstance(dado, dict):
+                    self.amostras = {k: [float(v) for v in vs] for k, vs in (dado.get("amostras") or {}).items()}
+                    self.estouros = {k: int(v) for k, v in (dado.get("estouros") or {}).items()}
+            except (OSError, ValueError, TypeError, AttributeError):
+                self.amostras, self.estouros = {}, {}
+
+    def aprendido(self, nome: str) -> int | None:
+        """Timeout calculado das amostras (sem teto nem exploração); None enquanto não houver amostras suficientes."""
+        with self._trava:
+            valores = sorted(self.amostras.get(nome, []))
+        if len(valores) < getattr(config, "PERFIL_TIMEOUTS_MIN_AMOSTRAS", 30):
+            return None
+        calculado = _percentil(valores, getattr(config, "PERFIL_TIMEOUTS_PERCENTIL", 99)) * getattr(config, "PERFIL_TIMEOUTS_MARGEM", 1.5)
+        return int(max(calculado, getattr(config, "PERFIL_TIMEOUTS_PISO_MS", 500)))
+
+    def timeout(self, nome: str, base_ms: int | None = None) -> int:
+        teto = int(base_ms if base_ms is not None else _base_config(nome))
+        with self._trava:
+            uso = self._usos[nome] = self._usos.get(nome, 0) + 1
+        explorar = max(1, getattr(config, "PERFIL_TIMEOUTS_EXPLORAR_A_CADA", 20))
+        aprendido = self.aprendido(nome)
+        if aprendido is None or uso % explorar == 0:
+            return teto
+        return min(teto, aprendido)
+
+    def registrar(self, nome: str, duracao_ms: float, acertou: bool) -> None:
+        """Acerto entra como amostra de latência; estouro só é contado (não se sabe quanto teria demorado)."""
+        with self._trava:
+            if acertou:
+                valores = self.amostras.setdefault(nome, [])
+                valores.append(round(duracao_ms, 1))
+                janela = max(1, getattr(config, "PERFIL_TIMEOUTS_JANELA", 500))
+                if len(valores) > janela:
+                    del valores[: len(valores) - janela]
+            else:
+                self.estouros[nome] = self.estouros.get(nome, 0) + 1
+            self._alterado = True
+
+    def salvar(self) -> None:
+        """Grava o perfil (arquivo temporário + os.replace, como o registro de estratégias)."""
+        if not self.caminho or not self._alterado:
+            return
+        with self._trava:
+            conteudo = json.dumps({"amostras": self.amostras, "estouros": self.estouros}, ensure_ascii=False)
+            self._alterado = False
+        try:
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            temporario = f"{self.caminho}.{os.getpid()}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                f.write(conteudo)
+            os.replace(temporario, self.caminho)
+        except OSError:
+            pass
+
+
+def obter_perfil() -> PerfilTimeouts | None:
+    """Perfil do processo (carregado de config.ARQUIVO_PERFIL_TIMEOUTS e salvo na saída).
+    None com TIMEOUTS_ADAPTATIVOS=False: valem os valores fixos do config."""
+    global _PERFIL
+    if not getattr(config, "TIMEOUTS_ADAPTATIVOS", True):
+        return None
+    with _TRAVA_PERFIL:
+        if _PERFIL is None:
+            _PERFIL = PerfilTimeouts(getattr(config, "ARQUIVO_PERFIL_TIMEOUTS", None))
+            atexit.register(_PERFIL.salvar)
+        return _PERFIL
+
+
+def timeout(nome: str, base_ms: int | None = None) -> int:
+    """Timeout do ponto de espera. TIMEOUTS_MANUAIS[nome] vence sempre; sem perfil, o valor fixo (`base_ms` ou config)."""
+    manuais = getattr(config, "TIMEOUTS_MANUAIS", {}) or {}
+    if nome in manuais:
+        return int(manuais[nome])
+    perfil = obter_perfil()
+    if perfil is None:
+        return int(base_ms if base_ms is not None else _base_config(nome))
+    return perfil.timeout(nome, base_ms)
+
+
+def esperar(nome: str, acao: Callable[[int], T], base_ms: int | None = None, acertou: Callable[[T], bool] | None = None) -> T:
+    """Roda `acao(timeout_ms)` com o timeout do perfil e registra a latência. A exceção (relançada) conta como estouro
+    e o retorno sem exceção como acerto (`Locator.wait_for` devolve None). As esperas que não levantam no timeout
+    (`localizar_linha_historico`, `_aguardar_algum_texto`) passam `acertou` para dizer o que é acerto."""
+    limite = timeout(nome, base_ms)
+    perfil = obter_perfil()
+    inicio = time.monotonic()
+    try:
+        resultado = acao(limite)
+    except BaseException:
+        if perfil is not None:
+            perfil.registrar(nome, (time.monotonic() - inicio) * 1000, False)
+        raise
+    if perfil is not None:
+        perfil.registrar(nome, (time.monotonic() - inicio) * 1000, acertou(resultado) if acertou is not None else True)
+    return resultado
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Iterable, Iterator, List, Tuple
+
+import config
+from robo.passivos.cache_resultados import CacheResultados
+from robo.passivos.diario import DiarioResultados
+
+
+class SaidaResultados:
+    """Destino das linhas de saída, no lugar da lista crua passada a `log_critico`, `simular_tabelas` etc.
+    Quem produz só chama `append` / `extend`. As linhas ficam retidas apenas até o fim do par ou do cliente
+    (`fechar_par`, `fechar_cliente`, `fechar_clientes`, `fechar_por_par`); aí vão por uma fila limitada
+    (SAIDA_FILA_MAX registros) para uma thread escritora que as grava no diário e saem da memória. Fila cheia
+    segura o produtor até o disco alcançar. Sem diário, tudo fica retido (comportamento de lista).
+    Com `cache`, a mesma thread grava cada par fechado no cache de resultados (`--delta`); registros "cache" só
+    alimentam o cache (pares concluídos de uma janela do pipeline, já registrados no diário pelo cliente)."""
+
+    def __init__(self, diario: DiarioResultados | None = None, max_fila: int | None = None, cache: CacheResultados | None = None) -> None:
+        self.diario = diario
+        self.cache = cache
+        self.total = 0
+        self.parcelas = 0
+        self._retidas: List[dict] = []
+        self._aberto_desde = 0  # sem diário: início das linhas ainda não fechadas em _retidas
+        self._fila: "queue.Queue[Tuple[str, str, str, List[dict], bool] | None]" = queue.Queue(
+            maxsize=max(1, max_fila or getattr(config, "SAIDA_FILA_MAX", 64))
+        )
+        self._adiados: dict[str, None] = {}  # CPFs cujo fim só vale depois de uma colheita posterior (Processando da varredura)
+        self._escritor: threading.Thread | None = None
+        self._erro: BaseException | None = None
+
+    def append(self, linha: dict) -> None:
+        self._retidas.append(linha)
+        self.total += 1
+        if linha.get("tipo") == "parcela":
+            self.parcelas += 1
+
+    def extend(self, linhas: Iterable[dict]) -> None:
+        for linha in linhas:
+            self.append(linha)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __iter__(self) -> Iterator[dict]:
+        """Só as linhas ainda retidas (com diário, as já entregues estão nele)."""
+        return iter(list(self._retidas))
+
+    def _escrever(self) -> None:
+        while True:
+            item = self._fila.get()
+            try:
+                if item is None:
+                    return
+                tipo, cpf, banco, linhas, gravar_cache = item
+                if self.diario is not None and self._erro is None:
+                    try:
+                        if tipo == "par":
+                            self.diario.registrar_par(cpf, banco, linhas)
+                        elif tipo == "parcial":
+                            self.diario.registrar_linhas(cpf, linhas)
+                        elif tipo != "cache":
+                            self.diario.concluir_cliente(cpf, linhas)
+                    except Exception as e:
+                        self._erro = e
+                        print(f"[saida] falha ao gravar no diário: {type(e).__name__}: {str(e)[:300]}")
+                if self.cache is not None and gravar_cache:
+                    try:
+                        self.cache.gravar(cpf, banco, linhas)
+                    except Exception as e:
+                        print(f"[saida] falha ao gravar no cache: {type(e).__name__}: {str(e)[:300]}")
+            finally:
+                self._fila.task_done()
+
+    def _entregar(self, tipo: str, cpf: str, banco: str, linhas: List[dict], gravar_cache: bool = False) -> None:
+        if self.diario is None and not (self.cache is not None and gravar_cache):
+            return
+        if self._escritor is None:
+            self._escritor = threading.Thread(target=self._escrever, name="robo-saida", daemon=True)
+            self._escritor.start()
+        self._fila.put((tipo, cpf, banco, linhas, gravar_cache))
+
+    def _tirar_retidas(self) -> List[dict]:
+        """Linhas desde o último fechamento; com diário elas saem da memória, sem diário continuam retidas."""
+        if self.diario is None:
+            linhas = self._retidas[self._aberto_desde:]
+            self._aberto_desde = len(self._retidas)
+            return linhas
+        linhas, self._retidas = self._retidas, []
+        return linhas
+
+    def fechar_par(self, cpf: str, banco: str, gravar_cache: bool = True) -> None:
+        """Par CPF/banco concluído: as linhas retidas desde o último fechamento vão para o diário (e para o cache,
+        salvo `gravar_cache=False`, usado ao reaproveitar linhas que vieram do próprio cache)."""
+        self._entregar("par", cpf, banco, self._tirar_retidas(), gravar_cache)
+
+    def fechar_cliente(self, cpf: str) -> None:
+        """Fim do cliente (linhas sem par, como CPF inválido ou erro geral, vão junto). Não alimenta o cache:
+        um par interrompido por erro no meio pode ter deixado linhas incompletas. CPF adiado (`adiar_conclusao`) só
+        grava as linhas; a conclusão vem em `concluir_adiados`."""
+        self._entregar("parcial" if cpf in self._adiados else "cliente", cpf, "", self._tirar_retidas())
+
+    def fechar_clientes(self, cpfs: Iterable[str], pares_concluidos: Iterable[Tuple[str, str]] = ()) -> None:
+        """Fim de vários clientes de uma vez (janela do pipeline): separa as linhas retidas por CPF. Só os pares em
+        `pares_concluidos` (colhidos ou feitos pelo fluxo completo sem exceção) vão para o cache; um cliente
+        interrompido no meio deixa linhas parciais que não podem valer como resultado."""
+        por_cpf: dict[str, List[dict]] = {cpf: [] for cpf in cpfs}
+        for linha in self._tirar_retidas():
+            por_cpf.setdefault(str(linha.get("cpf", "")), []).append(linha)
+        for cpf, grupo in por_cpf.items():
+            self._entregar("parcial" if cpf in self._adiados else "clientes", cpf, "", grupo)
+        if self.cache is None:
+            return
+        for cpf, banco in pares_concluidos:
+            linhas_par = [l for l in por_cpf.get(cpf, []) if l.get("banco") == banco]
+            if linhas_par:
+                self._entregar("cache", cpf, banco, linhas_par, True)
+
+    def fechar_por_par(self) -> None:
+        """Linhas soltas (colheitas da varredura): um registro por (cpf, banco); sem banco, fecha o cliente."""
+        grupos: dict[Tuple[str, str], List[dict]] = {}
+        for linha in self._tirar_retidas():
+            grupos.setdefault((str(linha.get("cpf", "")), str(linha.get("banco", ""))), []).append(linha)
+        for (cpf, banco), grupo in grupos.items():
+            self._entregar("par" if banco else "cliente", cpf, banco, grupo, bool(banco))
+
+    def adiar_conclusao(self, cpfs: Iterable[str]) -> None:
+        """Clientes com pares ainda a colher depois do loop: `fechar_cliente`/`fechar_clientes` não os marcam como
+        concluídos no diário (uma queda antes da colheita não pode fazer a retomada pulá-los)."""
+        self._adiados.update(dict.fromkeys(cpfs))
+
+    def concluir_adiados(self) -> None:
+        """Marca como concluídos os clientes adiados, depois de fechadas as linhas da colheita."""
+        for cpf in self._adiados:
+            self._entregar("cliente", cpf, "", [])
+        self._adiados.clear()
+
+    def fechar(self) -> None:
+        """Espera a thread escritora esvaziar a fila e descarrega o diário. Pode ser chamado mais de uma vez."""
+        if self._escritor is not None:
+            self._fila.put(None)
+            self._escritor.join()
+            self._escritor = None
+        if self.diario is not None:
+            self.diario.descarregar()
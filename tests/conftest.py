@@ -0,0 +1,8 @@
+"""Testes rodam da raiz do projeto (`python -m pytest -q`), onde `import config` resolve para o config.py da raiz,
+que reexporta robo.config. Como a execução normal, precisam do credenciais.py (copiado de credenciais.py.example)."""
+import os
+import sys
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _RAIZ not in sys.path:
+    sys.path.insert(0, _RAIZ)
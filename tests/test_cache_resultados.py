@@ -0,0 +1,85 @@
+import sqlite3
+import time
+
+import pytest
+
+from robo.passivos.cache_resultados import CacheResultados
+
+
+def _parcela(cpf: str, banco: str, meses: int) -> dict:
+    return {
+        "nome": "Fulano", "cpf": cpf, "contato": "11999990000", "email": "f@x.com", "banco": banco,
+        "valor_maximo_parcela": "250.00", "qtd_parcelas": str(meses), "status": "sucesso", "tipo": "parcela",
+    }
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = CacheResultados(str(tmp_path / "cache.sqlite"), ttl_h=1)
+    yield c
+    c.fechar()
+
+
+def _envelhecer(cache: CacheResultados, horas: float) -> None:
+    with cache._conexao:
+        cache._conexao.execute("UPDATE resultados SET gravado_em = ?", (time.time() - horas * 3600,))
+
+
+def test_gravar_e_obter_sem_campos_pessoais(cache):
+    assert cache.gravar("111", "QiTech", [_parcela("111", "QiTech", 6), _parcela("111", "QiTech", 12)])
+    linhas = cache.obter("111", "QiTech")
+    assert [l["qtd_parcelas"] for l in linhas] == ["6", "12"]
+    assert all(not ({"nome", "contato", "email"} & l.keys()) for l in linhas)
+    assert linhas[0]["cpf"] == "111" and linhas[0]["valor_maximo_parcela"] == "250.00"
+    assert cache.obter("111", "Celcoin") is None
+
+
+def test_gravar_substitui_o_par(cache):
+    cache.gravar("111", "QiTech", [_parcela("111", "QiTech", 6)])
+    cache.gravar("111", "QiTech", [_parcela("111", "QiTech", 24)])
+    assert [l["qtd_parcelas"] for l in cache.obter("111", "QiTech")] == ["24"]
+
+
+def test_so_grava_resultado_ou_erro_definitivo(cache):
+    erro_tela = {"cpf": "111", "banco": "QiTech", "tipo": "erro", "status": "processando_timeout"}
+    erro_definitivo = {"cpf": "222", "banco": "QiTech", "tipo": "erro", "status": "sem_vinculo"}
+    assert not cache.gravar("111", "QiTech", [erro_tela])
+    assert not cache.gravar("111", "QiTech", [])
+    assert cache.gravar("222", "QiTech", [erro_definitivo])
+    assert cache.obter("111", "QiTech") is None
+    assert cache.obter("222", "QiTech") == [erro_definitivo]
+
+
+def test_obter_respeita_o_ttl(cache):
+    cache.gravar("111", "QiTech", [_parcela("111", "QiTech", 6)])
+    _envelhecer(cache, 0.5)
+    assert cache.obter("111", "QiTech") is not None
+    _envelhecer(cache, 2)
+    assert cache.obter("111", "QiTech") is None
+
+
+def test_expurgar_apaga_os_vencidos(cache):
+    cache.gravar("111", "QiTech", [_parcela("111", "QiTech", 6)])
+    cache.gravar("222", "QiTech", [_parcela("222", "QiTech", 6)])
+    with cache._conexao:
+        cache._conexao.execute("UPDATE resultados SET gravado_em = ? WHERE cpf = '111'", (time.time() - 2 * 3600,))
+    assert cache.expurgar() == 1
+    assert cache.obter("222", "QiTech") is not None
+    with sqlite3.connect(cache.caminho) as conexao:
+        assert conexao.execute("SELECT cpf FROM resultados").fetchall() == [("222",)]
+
+
+def test_vencidos_saem_ao_abrir(tmp_path):
+    caminho = str(tmp_path / "cache.sqlite")
+    antigo = CacheResultados(caminho, ttl_h=1)
+    antigo.gravar("111", "QiTech", [_parcela("111", "QiTech", 6)])
+    _envelhecer(antigo, 2)
+    antigo.fechar()
+    CacheResultados(caminho, ttl_h=1).fechar()
+    with sqlite3.connect(caminho) as conexao:
+        assert conexao.execute("SELECT COUNT(*) FROM resultados").fetchone() == (0,)
+
+
+def test_encerra_cliente():
+    assert CacheResultados.encerra_cliente([{"tipo": "erro", "status": "cpf_nao_encontrado"}])
+    assert not CacheResultados.encerra_cliente([{"tipo": "erro", "status": "sem_vinculo"}])
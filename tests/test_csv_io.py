@@ -0,0 +1,74 @@
+import csv
+
+import config
+from robo.passivos import csv_io
+from robo.passivos.modelos import Cliente
+
+
+def _escrever_entrada(caminho, linhas, delimitador=","):
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=delimitador)
+        writer.writerow(["nome", "cpf", "contato", "email"])
+        writer.writerows(linhas)
+
+
+def _ler_saida(caminho):
+    with open(caminho, newline="", encoding=config.CSV_ENCODING) as f:
+        return list(csv.DictReader(f, delimiter=config.CSV_DELIMITER))
+
+
+def test_leitura_em_lotes_deduplica_e_rejeita(tmp_path):
+    caminho = tmp_path / "entrada.csv"
+    _escrever_entrada(caminho, [
+        ["Ana", "111.111.111-11", "", ""],
+        ["Bia", "222.222.222-22", "", ""],
+        ["Ana de novo", "11111111111", "", ""],
+        ["", "33333333333", "", ""],
+        ["Caio", "44444444444", "", ""],
+    ], delimitador=";")
+    leitura = csv_io.LeituraClientes(str(caminho), tamanho_lote=2)
+    lotes = [[c.cpf for c in lote] for lote in leitura.lotes()]
+    assert lotes == [["11111111111", "22222222222"], ["44444444444"]]
+    assert leitura.ordem == {"11111111111": 0, "22222222222": 1, "44444444444": 2}
+    assert (leitura.lidas, leitura.duplicadas, leitura.rejeitadas) == (5, 1, 1)
+    assert leitura.concluida
+
+
+def test_salvar_dataframe_final_consome_um_gerador(tmp_path):
+    consumidas = []
+
+    def linhas():
+        for i, tipo in enumerate(["parcela", "interno", "limite_meses", "erro"]):
+            consumidas.append(i)
+            yield {"cpf": str(i), "banco": "QiTech", "tipo": tipo, "status": f" s{i} "}
+
+    caminho = tmp_path / "saida" / "resultado.csv"
+    csv_io.salvar_dataframe_final(str(caminho), linhas())
+    registros = _ler_saida(caminho)
+    assert consumidas == [0, 1, 2, 3]
+    assert [r["cpf"] for r in registros] == ["0", "2", "3"]
+    assert registros[0]["status"] == "s0"
+    assert list(registros[0].keys()) == config.CSV_COLUNAS_SAIDA
+
+
+def test_salvar_dataframe_final_sem_linhas_nao_cria_arquivo(tmp_path):
+    caminho = tmp_path / "resultado.csv"
+    csv_io.salvar_dataframe_final(str(caminho), iter([{"tipo": "interno"}]))
+    assert not caminho.exists()
+
+
+def test_particionar_e_mesclar_seguem_a_ordem_da_entrada(tmp_path):
+    clientes = [Cliente(nome=f"N{i}", cpf=f"{i:011d}", contato="", email="") for i in range(6)]
+    entradas = [str(tmp_path / f"entrada_{k}.csv") for k in range(3)]
+    tamanhos = csv_io.particionar_clientes(iter(clientes), entradas, lambda c: int(c.cpf) % 2)
+    assert tamanhos == [3, 3, 0]
+    assert not (tmp_path / "entrada_2.csv").exists()
+    partes = []
+    for k in range(2):
+        parte = str(tmp_path / f"parte_{k}.csv")
+        leitura = csv_io.LeituraClientes(entradas[k])
+        csv_io.salvar_dataframe_final(parte, ({"cpf": c.cpf, "banco": "QiTech", "tipo": "parcela"} for c in leitura))
+        partes.append(parte)
+    final = str(tmp_path / "resultado.csv")
+    csv_io.mesclar_csvs_saida(partes + [str(tmp_path / "parte_ausente.csv")], final, [c.cpf for c in clientes])
+    assert [r["cpf"] for r in _ler_saida(final)] == [c.cpf for c in clientes]
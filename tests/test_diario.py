@@ -0,0 +1,89 @@
+import json
+
+from robo.passivos.diario import DiarioResultados, caminho_diario_para, caminho_saida_do_diario, posicao_banco
+
+
+def _linha(cpf: str, banco: str, n: int) -> dict:
+    return {"cpf": cpf, "banco": banco, "tipo": "parcela", "qtd_parcelas": str(n)}
+
+
+def _chaves(linhas) -> list:
+    return [(l["cpf"], l["banco"], l["qtd_parcelas"]) for l in linhas]
+
+
+def test_caminhos_do_diario_sao_inversos():
+    caminho = caminho_diario_para("saida/resultado_X.csv")
+    assert caminho == "saida/resultado_X.diario.jsonl"
+    assert caminho_saida_do_diario(caminho) == "saida/resultado_X.csv"
+
+
+def test_posicao_banco_ordem_de_consulta():
+    assert posicao_banco("") < posicao_banco("QiTech") < posicao_banco("Celcoin")
+    assert posicao_banco("Qi Tech") == posicao_banco("qitech")
+
+
+def test_retomada_le_pares_e_clientes_concluidos(tmp_path):
+    caminho = str(tmp_path / "r.diario.jsonl")
+    diario = DiarioResultados(caminho, tamanho_lote=1)
+    diario.registrar_par("111", "QiTech", [_linha("111", "QiTech", 6)])
+    diario.concluir_cliente("111")
+    diario.registrar_par("222", "QiTech", [_linha("222", "QiTech", 6)])
+    diario.registrar_linhas("333", [_linha("333", "", 0)])
+
+    retomado = DiarioResultados(caminho)
+    assert retomado.pares_concluidos == {("111", "QiTech"), ("222", "QiTech")}
+    assert retomado.clientes_concluidos == {"111"}
+
+
+def test_linha_cortada_no_fim_e_ignorada_e_isolada(tmp_path):
+    caminho = tmp_path / "r.diario.jsonl"
+    caminho.write_text(json.dumps({"cpf": "111", "banco": "QiTech", "linhas": []}) + '\n{"cpf": "222", "ban', encoding="utf-8")
+    diario = DiarioResultados(str(caminho))
+    assert diario.pares_concluidos == {("111", "QiTech")}
+    diario.registrar_par("333", "Celcoin", [_linha("333", "Celcoin", 6)])
+    diario.descarregar()
+    assert DiarioResultados(str(caminho)).pares_concluidos == {("111", "QiTech"), ("333", "Celcoin")}
+
+
+def test_buffer_so_vai_ao_disco_no_lote(tmp_path):
+    caminho = tmp_path / "r.diario.jsonl"
+    diario = DiarioResultados(str(caminho), tamanho_lote=3, intervalo_s=3600)
+    diario.registrar_par("111", "QiTech", [])
+    diario.registrar_par("111", "Celcoin", [])
+    assert not caminho.exists()
+    diario.registrar_par("222", "QiTech", [])
+    assert len(caminho.read_text(encoding="utf-8").splitlines()) == 3
+
+
+def test_iterar_linhas_segue_a_entrada_e_os_bancos(tmp_path):
+    diario = DiarioResultados(str(tmp_path / "r.diario.jsonl"))
+    # Celcoin do 222 colhido antes do QiTech (Processando da varredura) e 111 concluído depois do 222
+    diario.registrar_par("222", "Celcoin", [_linha("222", "Celcoin", 6)])
+    diario.registrar_par("111", "QiTech", [_linha("111", "QiTech", 6), _linha("111", "QiTech", 12)])
+    diario.registrar_par("222", "QiTech", [_linha("222", "QiTech", 6)])
+    diario.concluir_cliente("111", [{"cpf": "111", "banco": "", "tipo": "erro", "qtd_parcelas": ""}])
+    linhas = list(diario.iterar_linhas({"111": 0, "222": 1}))
+    assert _chaves(linhas) == [
+        ("111", "", ""),
+        ("111", "QiTech", "6"), ("111", "QiTech", "12"),
+        ("222", "QiTech", "6"),
+        ("222", "Celcoin", "6"),
+    ]
+
+
+def test_iterar_linhas_ordena_bancos_dentro_do_registro_do_pipeline(tmp_path):
+    diario = DiarioResultados(str(tmp_path / "r.diario.jsonl"))
+    # janela do pipeline: um registro por cliente, linhas na ordem da colheita
+    diario.concluir_cliente("111", [_linha("111", "Celcoin", 6), _linha("111", "QiTech", 6), _linha("111", "Celcoin", 12)])
+    assert _chaves(diario.iterar_linhas({"111": 0})) == [("111", "QiTech", "6"), ("111", "Celcoin", "6"), ("111", "Celcoin", "12")]
+
+
+def test_cpf_fora_da_ordem_vai_para_o_fim(tmp_path):
+    diario = DiarioResultados(str(tmp_path / "r.diario.jsonl"))
+    diario.registrar_par("999", "QiTech", [_linha("999", "QiTech", 6)])
+    diario.registrar_par("111", "QiTech", [_linha("111", "QiTech", 6)])
+    assert [l["cpf"] for l in diario.iterar_linhas({"111": 0})] == ["111", "999"]
+
+
+def test_iterar_linhas_sem_arquivo(tmp_path):
+    assert list(DiarioResultados(str(tmp_path / "nada.jsonl")).iterar_linhas()) == []
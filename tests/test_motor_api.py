@@ -0,0 +1,107 @@
+import csv
+import threading
+
+import pytest
+
+import config
+from robo.ativos import motor_api
+from robo.comms import servidor_simulado
+from robo.comms.api import ClienteApi
+from robo.passivos.modelos import Cliente
+
+
+@pytest.fixture(autouse=True)
+def _config_rapido(monkeypatch):
+    monkeypatch.setattr(config, "API_INTERVALO_STATUS_MS", 1, raising=False)
+    monkeypatch.setattr(config, "MAX_RECARREGAR_PROCESSANDO", 3, raising=False)
+    monkeypatch.setattr(config, "USAR_SESSAO_SALVA", False, raising=False)
+
+
+@pytest.fixture(scope="module")
+def url_base():
+    servidor = servidor_simulado.criar_servidor(porta=0)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}/"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _cliente(final: str) -> Cliente:
+    return Cliente(nome="Fulano", cpf="1234567890" + final, contato="", email="")
+
+
+def _status(linhas, banco: str) -> list:
+    return [(l["tipo"], l["status"]) for l in linhas if l["banco"] == banco]
+
+
+def test_sucesso_simula_os_quatro_prazos(url_base):
+    linhas, erro = motor_api._processar_cliente(ClienteApi(url_base), _cliente("5"))
+    assert erro is None
+    for banco in ("QiTech", "Celcoin"):
+        parcelas = [l for l in linhas if l["banco"] == banco and l["tipo"] == "parcela"]
+        assert [l["qtd_parcelas"] for l in parcelas] == ["6", "12", "18", "24"]
+        assert {l["status"] for l in parcelas} == {"sucesso"}
+        assert _status(linhas, banco)[-1][0] == "limite_meses"
+    qitech = next(l for l in linhas if l["banco"] == "QiTech")
+    assert qitech["valor_maximo_parcela"] == "255.00"
+    assert qitech["valor_parcela"] == "6x 255.00" and qitech["valor_total"] == "1530.00"
+
+
+def test_valor_maior_que_o_disponivel_refaz_por_valor_total(url_base):
+    linhas, _ = motor_api._processar_cliente(ClienteApi(url_base), _cliente("9"))
+    prazo_24 = next(l for l in linhas if l["banco"] == "QiTech" and l["tipo"] == "parcela" and l["qtd_parcelas"] == "24")
+    assert prazo_24["status"] == "valor_maior_que_disponivel"
+    assert prazo_24["valor_total"] == prazo_24["valor_maximo_parcela"]
+    assert prazo_24["valor_liberado"] and prazo_24["valor_parcela"].startswith("24x ")
+    assert not prazo_24["erro"]
+
+
+@pytest.mark.parametrize("final,tipo_status", [
+    ("0", ("erro", "erro_na_consulta")),
+    ("1", ("erro", "sem_vinculo")),
+    ("2", ("erro", "aguardar_formulario_autorizacao")),
+    ("3", ("erro", "recusa_politica_banco")),
+    ("4", ("erro", "processando_timeout")),
+])
+def test_caminhos_de_erro_por_banco(url_base, final, tipo_status):
+    linhas, erro = motor_api._processar_cliente(ClienteApi(url_base), _cliente(final))
+    assert erro is None
+    assert _status(linhas, "QiTech") == [tipo_status]
+    assert _status(linhas, "Celcoin") == [tipo_status]
+
+
+def test_cpf_invalido_nao_chama_a_api(url_base):
+    linhas, _ = motor_api._processar_cliente(ClienteApi(url_base), Cliente(nome="X", cpf="123", contato="", email=""))
+    assert [(l["banco"], l["status"]) for l in linhas] == [("", "cpf_invalido")]
+
+
+def test_aguardar_status_nao_dorme_depois_da_ultima_tentativa(monkeypatch):
+    class _ApiProcessando:
+        chamadas = 0
+
+        def status_consulta(self, _id):
+            self.chamadas += 1
+            return {"status": "processando"}
+
+    pausas = []
+    monkeypatch.setattr(motor_api.time, "sleep", pausas.append)
+    api = _ApiProcessando()
+    assert motor_api._aguardar_status(api, "x") == {"status": "processando"}  # type: ignore[arg-type]
+    assert api.chamadas == 4
+    assert len(pausas) == 3
+
+
+def test_executar_robo_api_grava_o_csv_na_ordem_da_entrada(tmp_path, url_base):
+    entrada = tmp_path / "clientes.csv"
+    with open(entrada, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["nome", "cpf", "contato", "email"])
+        writer.writerows([["B", "12345678905", "", ""], ["A", "12345678901", "", ""], ["B de novo", "12345678905", "", ""]])
+    saida = tmp_path / "resultado.csv"
+    motor_api.executar_robo_api(caminho_entrada=str(entrada), caminho_saida=str(saida), concorrencia=2, url_base=url_base)
+    with open(saida, newline="", encoding=config.CSV_ENCODING) as f:
+        registros = list(csv.DictReader(f, delimiter=config.CSV_DELIMITER))
+    cpfs = [r["cpf"] for r in registros]
+    assert cpfs == ["12345678905"] * 10 + ["12345678901"] * 2
+    assert [r["status"] for r in registros[-2:]] == ["sem_vinculo", "sem_vinculo"]
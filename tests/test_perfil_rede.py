@@ -0,0 +1,61 @@
+import pytest
+
+import config
+from robo.comms.perfil_rede import PerfilRedeEnxuta
+
+
+@pytest.fixture
+def dominios(monkeypatch):
+    monkeypatch.setattr(config, "URL_ADMIN_BASE", "https://admin.prata.example/")
+    monkeypatch.setattr(config, "API_URL_BASE", "http://127.0.0.1:8765/", raising=False)
+    monkeypatch.setattr(config, "URL_TERMO_DOMAINS", ["termo.example"], raising=False)
+    monkeypatch.setattr(config, "REDE_ENXUTA_DOMINIOS_EXTRAS", ["cdn.prata.example"], raising=False)
+    monkeypatch.setattr(config, "REDE_ENXUTA_TIPOS_BLOQUEADOS", ["image", "font", "media"], raising=False)
+
+
+def _perfil(monkeypatch, terceiros: bool) -> PerfilRedeEnxuta:
+    monkeypatch.setattr(config, "REDE_ENXUTA_BLOQUEAR_TERCEIROS", terceiros, raising=False)
+    return PerfilRedeEnxuta()
+
+
+@pytest.mark.parametrize("url", [
+    "https://admin.prata.example/logo.png",
+    "https://admin.prata.example/fonts/inter.woff2?v=3",
+    "https://admin.prata.example/img/foto.JPG#x",
+    "https://outro.example/video.mp4",
+])
+def test_extensoes_pesadas_sao_candidatas(monkeypatch, dominios, url):
+    assert _perfil(monkeypatch, False).padrao().search(url)
+
+
+@pytest.mark.parametrize("url", [
+    "https://admin.prata.example/app.js",
+    "https://admin.prata.example/api/pngs",
+    "https://admin.prata.example/arquivo.png.json",
+    "https://analytics.example/collect",
+])
+def test_sem_terceiros_o_resto_fica_no_navegador(monkeypatch, dominios, url):
+    assert not _perfil(monkeypatch, False).padrao().search(url)
+
+
+@pytest.mark.parametrize("url,candidata", [
+    ("https://analytics.example/collect", True),
+    ("https://prata.example.evil.com/x.js", True),
+    ("https://admin.prata.example/app.js", False),
+    ("https://sub.admin.prata.example/app.js", False),
+    ("https://admin.prata.example:8443/app.js", False),
+    ("https://termo.example?x=1", False),
+    ("http://127.0.0.1:8765/consultas", False),
+    ("https://cdn.prata.example/app.css", False),
+])
+def test_com_terceiros_so_hosts_fora_da_lista(monkeypatch, dominios, url, candidata):
+    assert bool(_perfil(monkeypatch, True).padrao().search(url)) is candidata
+
+
+def test_deve_bloquear_nunca_corta_documentos(monkeypatch, dominios):
+    perfil = _perfil(monkeypatch, True)
+    assert not perfil.deve_bloquear("https://analytics.example/", "document")
+    assert perfil.deve_bloquear("https://admin.prata.example/logo.png", "image")
+    assert perfil.deve_bloquear("https://analytics.example/a.js", "script")
+    assert not perfil.deve_bloquear("https://admin.prata.example/a.js", "script")
+    assert not _perfil(monkeypatch, False).deve_bloquear("https://analytics.example/a.js", "script")
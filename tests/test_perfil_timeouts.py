@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+import config
+from robo.passivos import perfil_timeouts
+from robo.passivos.perfil_timeouts import PerfilTimeouts
+
+
+@pytest.fixture(autouse=True)
+def _config_do_perfil(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "PERFIL_TIMEOUTS_MIN_AMOSTRAS", 10, raising=False)
+    monkeypatch.setattr(config, "PERFIL_TIMEOUTS_PERCENTIL", 90, raising=False)
+    monkeypatch.setattr(config, "PERFIL_TIMEOUTS_MARGEM", 2.0, raising=False)
+    monkeypatch.setattr(config, "PERFIL_TIMEOUTS_PISO_MS", 500, raising=False)
+    monkeypatch.setattr(config, "PERFIL_TIMEOUTS_EXPLORAR_A_CADA", 5, raising=False)
+    monkeypatch.setattr(config, "PERFIL_TIMEOUTS_JANELA", 50, raising=False)
+    monkeypatch.setattr(config, "TIMEOUT_TESTE_MS", 10000, raising=False)
+    monkeypatch.setattr(config, "TIMEOUTS_MANUAIS", {}, raising=False)
+    monkeypatch.setattr(config, "TIMEOUTS_ADAPTATIVOS", True, raising=False)
+    monkeypatch.setattr(config, "ARQUIVO_PERFIL_TIMEOUTS", None, raising=False)
+    monkeypatch.setattr(perfil_timeouts, "_PERFIL", None)
+
+
+def _alimentar(perfil: PerfilTimeouts, nome: str, valores) -> None:
+    for v in valores:
+        perfil.registrar(nome, v, True)
+
+
+def test_sem_amostras_suficientes_vale_o_config():
+    perfil = PerfilTimeouts()
+    _alimentar(perfil, "TIMEOUT_TESTE_MS", [100] * 9)
+    assert perfil.aprendido("TIMEOUT_TESTE_MS") is None
+    assert perfil.timeout("TIMEOUT_TESTE_MS") == 10000
+
+
+def test_percentil_com_margem_piso_e_teto():
+    perfil = PerfilTimeouts()
+    _alimentar(perfil, "TIMEOUT_TESTE_MS", [100 * i for i in range(1, 11)])  # p90 = 900
+    assert perfil.aprendido("TIMEOUT_TESTE_MS") == 1800
+    assert perfil.timeout("TIMEOUT_TESTE_MS") == 1800
+    assert perfil.timeout("TIMEOUT_TESTE_MS", base_ms=1000) == 1000  # o config continua sendo o teto
+    _alimentar(perfil, "TIMEOUT_TESTE_MS:local", [10] * 10)
+    assert perfil.aprendido("TIMEOUT_TESTE_MS:local") == 500  # piso
+    assert perfil.timeout("TIMEOUT_TESTE_MS:local") == 500  # ":local" lê o mesmo valor do config como teto
+
+
+def test_exploracao_periodica_usa_o_valor_fixo():
+    perfil = PerfilTimeouts()
+    _alimentar(perfil, "TIMEOUT_TESTE_MS", [100] * 10)
+    usos = [perfil.timeout("TIMEOUT_TESTE_MS") for _ in range(10)]
+    assert usos.count(10000) == 2 and usos[4] == usos[9] == 10000
+
+
+def test_estouro_so_conta_e_a_janela_descarta_as_antigas():
+    perfil = PerfilTimeouts()
+    perfil.registrar("TIMEOUT_TESTE_MS", 10000, False)
+    assert perfil.estouros == {"TIMEOUT_TESTE_MS": 1}
+    assert "TIMEOUT_TESTE_MS" not in perfil.amostras
+    _alimentar(perfil, "TIMEOUT_TESTE_MS", range(60))
+    assert perfil.amostras["TIMEOUT_TESTE_MS"] == [float(v) for v in range(10, 60)]
+
+
+def test_salvar_e_recarregar(tmp_path):
+    caminho = str(tmp_path / "perfil.json")
+    perfil = PerfilTimeouts(caminho)
+    _alimentar(perfil, "TIMEOUT_TESTE_MS", [123.45])
+    perfil.registrar("TIMEOUT_TESTE_MS", 10000, False)
+    perfil.salvar()
+    with open(caminho, encoding="utf-8") as f:
+        assert json.load(f) == {"amostras": {"TIMEOUT_TESTE_MS": [123.5]}, "estouros": {"TIMEOUT_TESTE_MS": 1}}
+    recarregado = PerfilTimeouts(caminho)
+    assert recarregado.amostras == {"TIMEOUT_TESTE_MS": [123.5]}
+
+
+def test_arquivo_corrompido_comeca_vazio(tmp_path):
+    caminho = tmp_path / "perfil.json"
+    caminho.write_text("{nao e json", encoding="utf-8")
+    assert PerfilTimeouts(str(caminho)).amostras == {}
+
+
+def test_esperar_registra_acerto_estouro_e_acertou():
+    perfil = perfil_timeouts.obter_perfil()
+    assert perfil is not None
+    limites = []
+    assert perfil_timeouts.esperar("TIMEOUT_TESTE_MS", lambda t: limites.append(t) or "ok") == "ok"
+    assert limites == [10000]
+    assert len(perfil.amostras["TIMEOUT_TESTE_MS"]) == 1
+
+    # espera que não levanta no timeout: `acertou` decide
+    assert perfil_timeouts.esperar("TIMEOUT_TESTE_MS", lambda t: None, acertou=bool) is None
+    assert perfil.estouros["TIMEOUT_TESTE_MS"] == 1
+    assert len(perfil.amostras["TIMEOUT_TESTE_MS"]) == 1
+
+    def estourar(_t):
+        raise TimeoutError("estourou")
+
+    with pytest.raises(TimeoutError):
+        perfil_timeouts.esperar("TIMEOUT_TESTE_MS", estourar)
+    assert perfil.estouros["TIMEOUT_TESTE_MS"] == 2
+
+
+def test_manual_vence_e_sem_perfil_vale_o_config(monkeypatch):
+    monkeypatch.setattr(config, "TIMEOUTS_MANUAIS", {"TIMEOUT_TESTE_MS": 1234})
+    assert perfil_timeouts.timeout("TIMEOUT_TESTE_MS") == 1234
+    monkeypatch.setattr(config, "TIMEOUTS_MANUAIS", {})
+    monkeypatch.setattr(config, "TIMEOUTS_ADAPTATIVOS", False)
+    assert perfil_timeouts.obter_perfil() is None
+    assert perfil_timeouts.timeout("TIMEOUT_TESTE_MS", base_ms=777) == 777
+    assert perfil_timeouts.esperar("TIMEOUT_TESTE_MS", lambda t: t) == 10000
@@ -0,0 +1,111 @@
+import threading
+
+from robo.passivos.diario import DiarioResultados
+from robo.passivos.saida import SaidaResultados
+
+
+def _linha(cpf: str, banco: str, tipo: str = "parcela", status: str = "sucesso") -> dict:
+    return {"cpf": cpf, "banco": banco, "tipo": tipo, "status": status}
+
+
+class _CacheFalso:
+    """Só registra o que a thread escritora mandaria ao cache."""
+
+    def __init__(self) -> None:
+        self.gravados: list = []
+
+    def gravar(self, cpf, banco, linhas) -> None:
+        self.gravados.append((cpf, banco, len(linhas)))
+
+
+def test_sem_diario_retem_tudo():
+    saida = SaidaResultados()
+    saida.append(_linha("111", "QiTech"))
+    saida.fechar_par("111", "QiTech")
+    saida.append(_linha("111", "", "erro", "falha_historico"))
+    saida.fechar_cliente("111")
+    saida.fechar()
+    assert len(saida) == 2 and saida.parcelas == 1
+    assert [l["tipo"] for l in saida] == ["parcela", "erro"]
+
+
+def test_com_diario_as_linhas_saem_da_memoria(tmp_path):
+    diario = DiarioResultados(str(tmp_path / "r.diario.jsonl"))
+    saida = SaidaResultados(diario)
+    saida.extend([_linha("111", "QiTech"), _linha("111", "QiTech")])
+    saida.fechar_par("111", "QiTech")
+    saida.fechar_cliente("111")
+    saida.fechar()
+    assert list(saida) == []
+    assert len(saida) == 2
+    assert diario.pares_concluidos == {("111", "QiTech")}
+    assert diario.clientes_concluidos == {"111"}
+    assert len(list(diario.iterar_linhas())) == 2
+
+
+def test_fila_cheia_segura_o_produtor(tmp_path):
+    diario = DiarioResultados(str(tmp_path / "r.diario.jsonl"))
+    liberar = threading.Event()
+    registrar_original = diario.registrar_par
+
+    def registrar_lento(cpf, banco, linhas):
+        liberar.wait(5)
+        registrar_original(cpf, banco, linhas)
+
+    diario.registrar_par = registrar_lento  # type: ignore[method-assign]
+    saida = SaidaResultados(diario, max_fila=1)
+    produzidos = []
+
+    def produzir():
+        for i in range(4):
+            saida.append(_linha(str(i), "QiTech"))
+            saida.fechar_par(str(i), "QiTech")
+            produzidos.append(i)
+
+    produtor = threading.Thread(target=produzir)
+    produtor.start()
+    produtor.join(0.3)
+    assert produtor.is_alive() and len(produzidos) < 4  # escritor parado no primeiro registro, fila de 1
+    liberar.set()
+    produtor.join(5)
+    saida.fechar()
+    assert produzidos == [0, 1, 2, 3]
+    assert len(diario.pares_concluidos) == 4
+
+
+def test_fechar_clientes_separa_por_cpf_e_so_cacheia_pares_concluidos(tmp_path):
+    diario = DiarioResultados(str(tmp_path / "r.diario.jsonl"))
+    cache = _CacheFalso()
+    saida = SaidaResultados(diario, cache=cache)  # type: ignore[arg-type]
+    saida.extend([_linha("111", "QiTech"), _linha("222", "QiTech"), _linha("111", "Celcoin"), _linha("222", "Celcoin")])
+    saida.fechar_clientes(["111", "222"], {("111", "QiTech"), ("222", "Celcoin")})
+    saida.fechar()
+    assert diario.clientes_concluidos == {"111", "222"}
+    assert sorted(cache.gravados) == [("111", "QiTech", 1), ("222", "Celcoin", 1)]
+
+
+def test_fechar_por_par_agrupa_as_colheitas(tmp_path):
+    diario = DiarioResultados(str(tmp_path / "r.diario.jsonl"))
+    saida = SaidaResultados(diario)
+    saida.extend([_linha("111", "Celcoin"), _linha("222", "QiTech"), _linha("111", "Celcoin"), _linha("333", "", "erro", "cpf_invalido")])
+    saida.fechar_por_par()
+    saida.fechar()
+    assert diario.pares_concluidos == {("111", "Celcoin"), ("222", "QiTech")}
+    assert diario.clientes_concluidos == {"333"}
+
+
+def test_conclusao_adiada_ate_a_colheita(tmp_path):
+    caminho = str(tmp_path / "r.diario.jsonl")
+    saida = SaidaResultados(DiarioResultados(caminho))
+    saida.adiar_conclusao(["111"])
+    saida.append(_linha("111", "QiTech"))
+    saida.fechar_par("111", "QiTech")
+    saida.fechar_cliente("111")
+    saida.fechar_cliente("222")
+    saida.fechar()
+    retomado = DiarioResultados(caminho)
+    assert retomado.clientes_concluidos == {"222"}  # uma queda aqui não pula o 111 na retomada
+    assert retomado.pares_concluidos == {("111", "QiTech")}
+    saida.concluir_adiados()
+    saida.fechar()
+    assert DiarioResultados(caminho).clientes_concluidos == {"111", "222"}